@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
-from .models import User, UserLanguageFluency
+from .models import LeaderboardEntry, User, UserLanguageFluency
 
 class CustomUserAdmin(UserAdmin):
     """
@@ -28,6 +28,16 @@ class UserLanguageFluencyAdmin(admin.ModelAdmin):
     list_filter = ('fluency', 'verified', 'language')
     search_fields = ('user__username', 'language__name')
 
+class LeaderboardEntryAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for the LeaderboardEntry model
+    """
+    list_display = ('user', 'board', 'period', 'language', 'score')
+    list_filter = ('board', 'period', 'language')
+    search_fields = ('user__username',)
+    raw_id_fields = ('user',)
+
 # Register the models with their admin classes
 admin.site.register(User, CustomUserAdmin)
 admin.site.register(UserLanguageFluency, UserLanguageFluencyAdmin)
+admin.site.register(LeaderboardEntry, LeaderboardEntryAdmin)
\ No newline at end of file
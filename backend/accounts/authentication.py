@@ -0,0 +1,74 @@
+"""
+JWT authentication backed by a short-lived cache of users' auth fields.
+
+simplejwt's JWTAuthentication loads the user row on every request. Here the
+fields needed to authenticate and authorize a request are cached per user for
+AUTH_USER_CACHE_TTL seconds, and request.user is rebuilt from them with every
+other field deferred. A cache hit therefore costs no query. Any other field
+is loaded from the database on first access, and save() on such an instance
+only writes the loaded fields.
+
+Entries are dropped when the user is saved or deleted (see signals.py). With a
+per-process cache backend, other processes see the change within the TTL.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+# Fields kept in the cache; bump CACHE_VERSION whenever this list changes
+AUTH_FIELDS = ('id', 'is_superuser', 'username', 'is_staff', 'is_active', 'email', 'role')
+CACHE_VERSION = 1
+CACHE_KEY = 'accounts:auth-user:{version}:{user_id}'
+
+
+def get_cache_ttl():
+    return getattr(settings, 'AUTH_USER_CACHE_TTL', 60)
+
+
+def cache_key(user_id):
+    return CACHE_KEY.format(version=CACHE_VERSION, user_id=user_id)
+
+
+def invalidate_cached_user(user_id):
+    """Drop a user's cached auth fields now and again once the transaction commits"""
+    key = cache_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user from the auth user cache
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = cache_key(user_id)
+        values = cache.get(key)
+        if values is None:
+            values = get_user_model().objects.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).values(*AUTH_FIELDS).first()
+            if values is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            cache.set(key, values, get_cache_ttl())
+
+        user = self.user_from_values(values)
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+    def user_from_values(self, values):
+        # from_db expects the loaded fields in model order; the rest are deferred
+        field_names = [
+            field.attname for field in get_user_model()._meta.concrete_fields if field.attname in values
+        ]
+        return get_user_model().from_db(DEFAULT_DB_ALIAS, field_names, [values[name] for name in field_names])
@@ -0,0 +1,129 @@
+"""
+Contributor and validator leaderboards.
+
+Scores are kept in LeaderboardEntry rows, one per (board, period, language,
+user) plus a global row without a language, for the all-time, current week
+and current month periods. Like the contribution counters, increments are
+grouped per row and applied as `UPDATE ... SET score = score + n`, so reading
+a board never aggregates contributions or validations, and ranking never
+touches the user table beyond the users on the page.
+
+Ranks cost a COUNT over the leaderboard_rank_idx range above a score, which
+grows with the rank: a user far down a big board has many rows above them.
+Pages avoid it by counting only the ties before their first entry. A single
+user's rank (`score_rank`) is cached per score for LEADERBOARD_RANK_CACHE_TTL
+seconds; low scores are shared by many users, so the expensive counts are
+the ones most often reused.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import LeaderboardEntry
+
+WINDOWS = ('all', 'week', 'month')
+RANK_CACHE_KEY = 'accounts:leaderboard-rank:{board}:{period}:{language_id}:{score}'
+
+
+def get_rank_cache_ttl():
+    return getattr(settings, 'LEADERBOARD_RANK_CACHE_TTL', 60)
+
+
+def period_for(window, day=None):
+    """Period key of the given window that contains `day` (default: today)"""
+    if window == 'all':
+        return 'all'
+    day = day or timezone.localdate()
+    if window == 'week':
+        year, week, _ = day.isocalendar()
+        return f'{year}-W{week:02d}'
+    if window == 'month':
+        return f'{day.year}-{day.month:02d}'
+    raise ValueError(f'Unknown leaderboard window: {window}')
+
+
+def collect_contribution_scores(contributions, deltas=None):
+    """Group score increments for new contributions; anonymous ones are not ranked"""
+    if deltas is None:
+        deltas = Counter()
+    for contribution in contributions:
+        if not contribution.anonymous:
+            deltas[(LeaderboardEntry.Board.CONTRIBUTIONS, contribution.language_id, contribution.user_id)] += 1
+    return deltas
+
+
+def collect_validation_score(validation, deltas=None):
+    """Group the score increment for one new validation"""
+    if deltas is None:
+        deltas = Counter()
+    deltas[(LeaderboardEntry.Board.VALIDATIONS, validation.contribution.language_id, validation.validator_id)] += 1
+    return deltas
+
+
+def apply_score_deltas(deltas, day=None):
+    """Add grouped deltas to every window's board, per language and globally"""
+    rows = Counter()
+    periods = [period_for(window, day) for window in WINDOWS]
+    for (board, language_id, user_id), n in deltas.items():
+        for period in periods:
+            rows[(board, period, language_id, user_id)] += n
+            rows[(board, period, None, user_id)] += n
+
+    # Sorted so concurrent writers lock rows in the same order
+    for key in sorted(rows, key=lambda key: (key[0], key[1], key[2] or 0, key[3])):
+        board, period, language_id, user_id = key
+        lookup = {'board': board, 'period': period, 'language_id': language_id, 'user_id': user_id}
+        if LeaderboardEntry.objects.filter(**lookup).update(score=F('score') + rows[key]):
+            continue
+        try:
+            with transaction.atomic():
+                LeaderboardEntry.objects.create(score=rows[key], **lookup)
+        except IntegrityError:
+            # Another writer created the row first
+            LeaderboardEntry.objects.filter(**lookup).update(score=F('score') + rows[key])
+
+
+def board_entries(board, window='all', language_id=None):
+    """Entries of one board, best first"""
+    return LeaderboardEntry.objects.filter(
+        board=board, period=period_for(window), language_id=language_id, score__gt=0
+    ).order_by('-score', 'user_id')
+
+
+def rank_of(entries, score):
+    """Competition rank ("1224") of `score` within a board's entries"""
+    return entries.filter(score__gt=score).count() + 1
+
+
+def score_rank(board, window, language_id, score):
+    """
+    rank_of for one board, cached per score; may lag the board by
+    LEADERBOARD_RANK_CACHE_TTL seconds
+    """
+    key = RANK_CACHE_KEY.format(board=board, period=period_for(window), language_id=language_id, score=score)
+    rank = cache.get(key)
+    if rank is None:
+        rank = rank_of(board_entries(board, window, language_id), score)
+        cache.set(key, rank, get_rank_cache_ttl())
+    return rank
+
+
+def assign_ranks(entries, page, offset):
+    """
+    Return [(rank, entry)] for a page of a board's entries in board order,
+    where `offset` is the position of the page's first entry on the board
+    """
+    ranked = []
+    for position, entry in enumerate(page):
+        if position == 0:
+            # Ties may carry over from the previous page; they sort by user_id
+            ties_before = entries.filter(score=entry.score, user_id__lt=entry.user_id).count()
+            rank = offset + 1 - ties_before
+        elif entry.score != page[position - 1].score:
+            rank = offset + position + 1
+        ranked.append((rank, entry))
+    return ranked
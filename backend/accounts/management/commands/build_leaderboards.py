@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from accounts.leaderboards import WINDOWS, period_for
+from accounts.models import LeaderboardEntry
+from contributions.models import Contribution
+from validations.models import Validation
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the all-time, current week and current month leaderboards from contributions and validations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        week_start = today - timedelta(days=today.weekday())
+        starts = {'all': None, 'week': week_start, 'month': today.replace(day=1)}
+        sources = {
+            LeaderboardEntry.Board.CONTRIBUTIONS: (
+                Contribution.objects.filter(anonymous=False), 'language_id', 'user_id', 'created_at'
+            ),
+            LeaderboardEntry.Board.VALIDATIONS: (
+                Validation.objects.all(), 'contribution__language_id', 'validator_id', 'created_at'
+            ),
+        }
+
+        with transaction.atomic():
+            periods = [period_for(window, today) for window in WINDOWS]
+            LeaderboardEntry.objects.filter(period__in=periods).delete()
+
+            entries = []
+            for board, (queryset, language_field, user_field, date_field) in sources.items():
+                for window in WINDOWS:
+                    rows = queryset.order_by()
+                    if starts[window] is not None:
+                        rows = rows.filter(**{f'{date_field}__date__gte': starts[window]})
+                    period = period_for(window, today)
+
+                    per_language = rows.values(language_field, user_field).annotate(score=Count('pk'))
+                    entries.extend(
+                        LeaderboardEntry(board=board, period=period, language_id=row[language_field],
+                                         user_id=row[user_field], score=row['score'])
+                        for row in per_language
+                    )
+                    overall = rows.values(user_field).annotate(score=Count('pk'))
+                    entries.extend(
+                        LeaderboardEntry(board=board, period=period, user_id=row[user_field], score=row['score'])
+                        for row in overall
+                    )
+            LeaderboardEntry.objects.bulk_create(entries, batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(entries)} leaderboard entries'))
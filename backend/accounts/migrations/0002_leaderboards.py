@@ -0,0 +1,39 @@
+# Generated by Django 4.2.21 on 2026-10-18 16:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('languages', '0001_initial'),
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('contributions', 'Contributions'), ('validations', 'Validations')], max_length=20)),
+                ('period', models.CharField(max_length=16)),
+                ('score', models.PositiveIntegerField(default=0)),
+                ('language', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='languages.language')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Leaderboard entries',
+                'indexes': [models.Index(fields=['board', 'period', 'language', '-score', 'user'], name='leaderboard_rank_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('board', 'period', 'language', 'user'), name='leaderboard_language_entry_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('language__isnull', True)), fields=('board', 'period', 'user'), name='leaderboard_global_entry_unique'),
+        ),
+    ]
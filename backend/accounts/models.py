@@ -49,3 +49,43 @@ class UserLanguageFluency(models.Model):
         
     def __str__(self):
         return f"{self.user.username} - {self.language.name} ({self.get_fluency_display()})"
+
+class LeaderboardEntry(models.Model):
+    """
+    A user's score on one leaderboard, for one period, in one language or globally
+
+    `period` is 'all' for the all-time board, an ISO week such as '2026-W07'
+    or a month such as '2026-02'. Global entries have no language. Maintained
+    incrementally by accounts/leaderboards.py; rebuild with `build_leaderboards`.
+    """
+    class Board(models.TextChoices):
+        CONTRIBUTIONS = 'contributions', _('Contributions')
+        VALIDATIONS = 'validations', _('Validations')
+
+    board = models.CharField(max_length=20, choices=Board.choices)
+    period = models.CharField(max_length=16)
+    language = models.ForeignKey('languages.Language', on_delete=models.CASCADE, null=True, blank=True, related_name='leaderboard_entries')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    score = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name_plural = 'Leaderboard entries'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['board', 'period', 'language', 'user'],
+                name='leaderboard_language_entry_unique',
+            ),
+            # NULLs never collide in a unique index, so global entries need their own
+            models.UniqueConstraint(
+                fields=['board', 'period', 'user'],
+                condition=models.Q(language__isnull=True),
+                name='leaderboard_global_entry_unique',
+            ),
+        ]
+        indexes = [
+            # Top-N reads and rank lookups walk one board in score order
+            models.Index(fields=['board', 'period', 'language', '-score', 'user'], name='leaderboard_rank_idx'),
+        ]
+        
+    def __str__(self):
+        return f"{self.user_id} on {self.board}/{self.period}/{self.language_id or 'global'}: {self.score}"
@@ -0,0 +1,58 @@
+"""
+Per-user cache of the profile document served by UserProfileView.
+
+The profile is read on every page load of the frontend, so its serialized
+form, fluencies included, is cached per user for PROFILE_CACHE_TTL seconds.
+Language names are not trusted from the cache: they are filled in from the
+language registry on every read, so renaming a language needs no invalidation.
+
+Entries are dropped when the user is saved or deleted, when one of the user's
+fluencies changes (see signals.py), and when the contribution or validation
+counters move, which happens through UPDATE queries that send no signals.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from languages.registry import language_registry
+
+# Bump CACHE_VERSION whenever the profile document changes shape
+CACHE_VERSION = 1
+CACHE_KEY = 'accounts:profile:{version}:{user_id}'
+
+
+def get_cache_ttl():
+    return getattr(settings, 'PROFILE_CACHE_TTL', 300)
+
+
+def cache_key(user_id):
+    return CACHE_KEY.format(version=CACHE_VERSION, user_id=user_id)
+
+
+def invalidate_cached_profile(user_id):
+    """Drop a user's cached profile now and again once the transaction commits"""
+    key = cache_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def invalidate_cached_profiles(user_ids):
+    keys = [cache_key(user_id) for user_id in user_ids]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def cached_profile(user_id, build):
+    """
+    Return the profile document of a user, calling `build` to serialize it
+    when it is not cached
+    """
+    key = cache_key(user_id)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, get_cache_ttl())
+    for fluency in data['language_fluencies']:
+        fluency['language_name'] = language_registry.name_for(fluency['language'])
+    return data
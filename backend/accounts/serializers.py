@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import UserLanguageFluency
+from languages.registry import language_registry
+from .models import LeaderboardEntry, UserLanguageFluency
 
 User = get_user_model()
 
@@ -8,13 +9,16 @@ class UserLanguageFluencySerializer(serializers.ModelSerializer):
     """
     Serializer for user language fluency
     """
-    language_name = serializers.ReadOnlyField(source='language.name')
+    language_name = serializers.SerializerMethodField()
     
     class Meta:
         model = UserLanguageFluency
         fields = ['id', 'language', 'language_name', 'fluency', 'verified']
         read_only_fields = ['id', 'verified']
         
+    def get_language_name(self, obj):
+        return language_registry.name_for(obj.language_id)
+        
     def create(self, validated_data):
         # Set user from the context
         validated_data['user'] = self.context['request'].user
@@ -56,4 +60,16 @@ class SocialAuthSerializer(serializers.Serializer):
     Serializer for social authentication
     """
     provider = serializers.CharField(required=True)
-    access_token = serializers.CharField(required=True)
\ No newline at end of file
+    access_token = serializers.CharField(required=True)
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    """
+    Serializer for one ranked leaderboard entry
+    """
+    rank = serializers.IntegerField(read_only=True)
+    username = serializers.ReadOnlyField(source='user.username')
+    
+    class Meta:
+        model = LeaderboardEntry
+        fields = ['rank', 'user', 'username', 'score']
+        read_only_fields = fields
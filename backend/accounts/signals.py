@@ -0,0 +1,20 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+from .models import UserLanguageFluency
+from .profiles import invalidate_cached_profile
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_auth_user_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+    invalidate_cached_profile(instance.pk)
+
+
+@receiver(post_save, sender=UserLanguageFluency)
+@receiver(post_delete, sender=UserLanguageFluency)
+def invalidate_profile_cache(sender, instance, **kwargs):
+    invalidate_cached_profile(instance.user_id)
@@ -0,0 +1,89 @@
+"""
+Provider token verification for the async social login view.
+
+A provider access token is verified by fetching the provider's userinfo
+endpoint with it. Those calls go through one pooled httpx.AsyncClient per
+event loop, so a burst of logins shares keep-alive connections instead of
+holding a worker for each round trip. A token that verified recently is
+remembered for SOCIAL_LOGIN_TOKEN_CACHE_TTL seconds, as a SHA-256 hash (never
+the token itself) mapped to the user it logged in, so an SPA that sends the
+same token again does not reach the provider at all.
+"""
+import asyncio
+import hashlib
+import weakref
+
+import httpx
+from django.conf import settings
+from social_django.utils import load_backend, load_strategy
+
+DEFAULT_USERINFO_URLS = {
+    'google-oauth2': 'https://www.googleapis.com/oauth2/v3/userinfo',
+}
+CACHE_KEY = 'accounts:social-token:{provider}:{digest}'
+
+_clients = weakref.WeakKeyDictionary()
+
+
+class InvalidProviderToken(Exception):
+    """The identity provider rejected the access token"""
+
+
+class ProviderUnavailable(Exception):
+    """The identity provider could not be reached or gave an unusable answer"""
+
+
+def get_userinfo_url(provider):
+    return getattr(settings, 'SOCIAL_LOGIN_USERINFO_URLS', DEFAULT_USERINFO_URLS).get(provider)
+
+
+def get_token_cache_ttl():
+    return getattr(settings, 'SOCIAL_LOGIN_TOKEN_CACHE_TTL', 300)
+
+
+def token_cache_key(provider, access_token):
+    digest = hashlib.sha256(access_token.encode('utf-8')).hexdigest()
+    return CACHE_KEY.format(provider=provider, digest=digest)
+
+
+def get_http_client():
+    """Return the pooled HTTP client of the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        max_connections = getattr(settings, 'SOCIAL_LOGIN_HTTP_MAX_CONNECTIONS', 20)
+        client = _clients[loop] = httpx.AsyncClient(
+            timeout=getattr(settings, 'SOCIAL_LOGIN_HTTP_TIMEOUT', 10.0),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+    return client
+
+
+async def fetch_user_data(provider, access_token):
+    """Verify `access_token` with the provider and return the user data it reports"""
+    try:
+        response = await get_http_client().get(
+            get_userinfo_url(provider), headers={'Authorization': f'Bearer {access_token}'}
+        )
+    except httpx.HTTPError as exc:
+        raise ProviderUnavailable(str(exc))
+
+    if response.status_code in (400, 401, 403):
+        raise InvalidProviderToken('The provider rejected the access token')
+    if response.status_code != 200:
+        raise ProviderUnavailable(f'Unexpected status {response.status_code} from the provider')
+    try:
+        return response.json()
+    except ValueError:
+        raise ProviderUnavailable('The provider returned invalid JSON')
+
+
+def complete_login(request, provider, access_token, user_data):
+    """
+    Run the social auth pipeline on already verified provider data and
+    return the user, as backend.do_auth does after its own userinfo call
+    """
+    strategy = load_strategy(request)
+    backend = load_backend(strategy=strategy, name=provider, redirect_uri=None)
+    response = dict(user_data, access_token=access_token)
+    return backend.strategy.authenticate(response=response, backend=backend)
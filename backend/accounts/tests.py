@@ -1,3 +1,254 @@
-from django.test import TestCase
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+from asgiref.testing import ApplicationCommunicator
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from contributions.counters import apply_counter_deltas
+from languages.models import Language
+from languages.registry import language_registry
+from .leaderboards import score_rank
+from .models import LeaderboardEntry, User, UserLanguageFluency
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    """
+    Auth user cache behind CachedJWTAuthentication
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='amina', email='amina@example.com', password='pass')
+
+    def setUp(self):
+        cache.clear()
+        language_registry.invalidate()
+        language_registry.snapshot()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def test_cache_hit_costs_no_auth_query(self):
+        url = reverse('pending_validations')
+        with self.assertNumQueries(3):  # user lookup, fluencies, queue
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with self.assertNumQueries(2):  # fluencies and queue only
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_saving_the_user_invalidates_the_cache(self):
+        url = reverse('pending_validations')
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_profile_loads_the_full_user(self):
+        self.client.get(reverse('pending_validations'))
+        User.objects.filter(pk=self.user.pk).update(bio='Mwalimu')
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['bio'], 'Mwalimu')
+
+
+class CachedProfileTests(TestCase):
+    """
+    Cached profile document and fluency listing
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='otieno', email='otieno@example.com', password='pass')
+        cls.swahili = Language.objects.create(name='Swahili', code='sw', category='bantu')
+        cls.luo = Language.objects.create(name='Luo', code='luo', category='nilotic')
+        UserLanguageFluency.objects.create(user=cls.user, language=cls.swahili, fluency='fluent')
+        UserLanguageFluency.objects.create(user=cls.user, language=cls.luo, fluency='native')
+
+    def setUp(self):
+        cache.clear()
+        language_registry.invalidate()
+        language_registry.snapshot()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def test_cached_profile_costs_no_query(self):
+        with self.assertNumQueries(3):  # auth fields, user, fluencies
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(
+            sorted(fluency['language_name'] for fluency in response.data['language_fluencies']), ['Luo', 'Swahili']
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('profile')).data, response.data)
+
+    def test_changes_invalidate_the_cached_profile(self):
+        url = reverse('profile')
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            UserLanguageFluency.objects.filter(user=self.user, language=self.luo).delete()
+        self.assertEqual(len(self.client.get(url).data['language_fluencies']), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_counter_deltas({}, {self.user.pk: 2})
+        self.assertEqual(self.client.get(url).data['total_contributions'], 2)
+
+        response = self.client.patch(url, {'bio': 'Jaduong'})
+        self.assertEqual(response.data['bio'], 'Jaduong')
+        self.assertEqual(self.client.get(url).data['bio'], 'Jaduong')
+
+    def test_fluency_listing_takes_no_join_per_row(self):
+        url = reverse('language_fluencies')
+        self.client.get(url)
+        with self.assertNumQueries(2):  # count, page
+            response = self.client.get(url)
+        self.assertEqual([row['language_name'] for row in response.data['results']], ['Swahili', 'Luo'])
+
+
+class StandInProvider(BaseHTTPRequestHandler):
+    """
+    Local stand-in for a provider's userinfo endpoint
+    """
+    users = {
+        'good-token': {'sub': '1001', 'email': 'wanjiru@example.com', 'name': 'Wanjiru Kamau',
+                       'given_name': 'Wanjiru', 'family_name': 'Kamau'},
+    }
+    calls = 0
+
+    def do_GET(self):
+        StandInProvider.calls += 1
+        token = self.headers.get('Authorization', '').replace('Bearer ', '', 1)
+        user = self.users.get(token)
+        body = json.dumps(user or {'error': 'invalid_token'}).encode('utf-8')
+        self.send_response(200 if user else 401)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class AsyncSocialLoginTests(TestCase):
+    """
+    AsyncSocialLoginView against a local stand-in provider
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.provider = ThreadingHTTPServer(('127.0.0.1', 0), StandInProvider)
+        threading.Thread(target=cls.provider.serve_forever, daemon=True).start()
+        cls.addClassCleanup(cls.provider.server_close)
+        cls.addClassCleanup(cls.provider.shutdown)
+        userinfo_url = f'http://127.0.0.1:{cls.provider.server_port}/userinfo'
+        cls.provider_settings = {'google-oauth2': userinfo_url}
+
+    def setUp(self):
+        cache.clear()
+        StandInProvider.calls = 0
+
+    async def login(self, token, provider='google-oauth2'):
+        with self.settings(SOCIAL_LOGIN_USERINFO_URLS=self.provider_settings):
+            return await self.async_client.post(
+                reverse('social_login_async'),
+                {'provider': provider, 'access_token': token},
+                content_type='application/json',
+            )
+
+    async def test_repeated_login_skips_the_provider(self):
+        response = await self.login('good-token')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['email'], 'wanjiru@example.com')
+        self.assertIn('access', response.json())
+
+        response = await self.login('good-token')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(StandInProvider.calls, 1)
+        self.assertEqual(await User.objects.filter(email='wanjiru@example.com').acount(), 1)
+
+    async def test_rejected_token(self):
+        response = await self.login('bad-token')
+        self.assertEqual(response.status_code, 400)
+        response = await self.login('bad-token')
+        self.assertEqual(StandInProvider.calls, 2)
+
+    async def test_unknown_provider(self):
+        response = await self.login('good-token', provider='myspace')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(StandInProvider.calls, 0)
+
+
+class AsgiRoutingTests(SimpleTestCase):
+    """
+    config.asgi serves the async views only
+    """
+    async def request(self, path, method='GET'):
+        from config.asgi import application
+
+        communicator = ApplicationCommunicator(application, {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+            'headers': [(b'host', b'localhost'), (b'content-type', b'application/json')],
+            'client': ('127.0.0.1', 1234), 'server': ('localhost', 80),
+        })
+        await communicator.send_input({'type': 'http.request', 'body': b'{}', 'more_body': False})
+        start = await communicator.receive_output(5)
+        await communicator.receive_output(5)
+        await communicator.wait(5)
+        return start['status']
+
+    async def test_sync_views_are_not_served(self):
+        self.assertEqual(await self.request(reverse('contribution_list')), 404)
+
+    async def test_async_views_are_served(self):
+        # An empty body reaches the view and fails its validation
+        self.assertEqual(await self.request(reverse('social_login_async'), method='POST'), 400)
+
+
+class LeaderboardRankTests(TestCase):
+    """
+    Competition ranks on leaderboard pages and for the current user
+    """
+    @classmethod
+    def setUpTestData(cls):
+        # 18 distinct scores, a five-way tie across the page boundary, then a pair
+        scores = list(range(100, 82, -1)) + [50] * 5 + [10] * 2
+        cls.users = []
+        for i, score in enumerate(scores):
+            user = User.objects.create_user(username=f'rank{i:02d}', email=f'rank{i}@example.com', password='pass')
+            LeaderboardEntry.objects.create(board='contributions', period='all', user=user, score=score)
+            cls.users.append(user)
+        cls.expected = list(range(1, 19)) + [19] * 5 + [24] * 2
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('leaderboard', kwargs={'board': 'contributions'})
+
+    def ranks(self):
+        ranks = {}
+        for page in (1, 2):
+            for row in self.client.get(self.url, {'page': page}).data['results']:
+                ranks[row['user']] = row['rank']
+        return ranks
+
+    def test_ties_carry_over_the_page_boundary(self):
+        ranks = self.ranks()
+        self.assertEqual([ranks[user.pk] for user in self.users], self.expected)
+
+    def test_page_and_user_ranks_agree(self):
+        ranks = self.ranks()
+        for user in self.users[17:]:
+            self.client.force_authenticate(user)
+            response = self.client.get(reverse('leaderboard_rank', kwargs={'board': 'contributions'}))
+            self.assertEqual(response.data['rank'], ranks[user.pk])
+
+    def test_user_rank_is_cached_per_score(self):
+        self.assertEqual(score_rank('contributions', 'all', None, 50), 19)
+        newcomer = User.objects.create_user(username='newcomer', email='newcomer@example.com', password='pass')
+        LeaderboardEntry.objects.create(board='contributions', period='all', user=newcomer, score=60)
+        with self.assertNumQueries(0):
+            self.assertEqual(score_rank('contributions', 'all', None, 50), 19)
+        cache.clear()
+        self.assertEqual(score_rank('contributions', 'all', None, 50), 20)
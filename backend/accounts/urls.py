@@ -4,12 +4,18 @@ from .views import (
     RegisterView,
     UserProfileView,
     SocialLoginView,
-    UserLanguageFluencyView
+    AsyncSocialLoginView,
+    UserLanguageFluencyView,
+    LeaderboardView,
+    LeaderboardRankView
 )
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('profile/', UserProfileView.as_view(), name='profile'),
     path('login/social/', SocialLoginView.as_view(), name='social_login'),
+    path('login/social/async/', AsyncSocialLoginView.as_view(), name='social_login_async'),
     path('profile/languages/', UserLanguageFluencyView.as_view(), name='language_fluencies'),
+    path('leaderboards/<str:board>/', LeaderboardView.as_view(), name='leaderboard'),
+    path('leaderboards/<str:board>/me/', LeaderboardRankView.as_view(), name='leaderboard_rank'),
 ]
\ No newline at end of file
@@ -1,13 +1,34 @@
+import json
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from social_django.utils import load_strategy, load_backend
 from social_core.exceptions import MissingBackend, AuthTokenError, AuthForbidden
+from django.http import Http404
 
-from .serializers import UserSerializer, UserProfileSerializer, SocialAuthSerializer, UserLanguageFluencySerializer
+from languages.registry import language_registry
+from .leaderboards import WINDOWS, assign_ranks, board_entries, score_rank
+from .models import LeaderboardEntry, UserLanguageFluency
+from .profiles import cached_profile
+from .social import (
+    InvalidProviderToken, ProviderUnavailable, complete_login, fetch_user_data,
+    get_token_cache_ttl, get_userinfo_url, token_cache_key
+)
+from .serializers import (
+    UserSerializer, UserProfileSerializer, SocialAuthSerializer,
+    UserLanguageFluencySerializer, LeaderboardEntrySerializer
+)
 
 User = get_user_model()
 
@@ -27,7 +48,21 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     
     def get_object(self):
-        return self.request.user
+        # request.user only has its auth fields loaded, see authentication.py
+        return User.objects.prefetch_related('language_fluencies').get(pk=self.request.user.pk)
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(cached_profile(
+            request.user.pk, lambda: self.get_serializer(self.get_object()).data
+        ))
+
+def login_response_data(user):
+    refresh = RefreshToken.for_user(user)
+    return {
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+        'user': UserSerializer(user).data
+    }
 
 class SocialLoginView(APIView):
     """
@@ -54,18 +89,58 @@ class SocialLoginView(APIView):
             user = backend.do_auth(access_token)
             
             if user:
-                refresh = RefreshToken.for_user(user)
-                return Response({
-                    'refresh': str(refresh),
-                    'access': str(refresh.access_token),
-                    'user': UserSerializer(user).data
-                })
+                return Response(login_response_data(user))
                 
         except (AuthTokenError, AuthForbidden) as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
         return Response({'error': 'Invalid credentials'}, status=status.HTTP_400_BAD_REQUEST)
 
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncSocialLoginView(View):
+    """
+    Async variant of SocialLoginView, served by the ASGI auth process (see
+    config/asgi.py) so a provider round trip does not hold a worker
+
+    The provider is called through a pooled async HTTP client, and a token
+    that verified recently is answered from the cache without calling it.
+    """
+    async def post(self, request):
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        serializer = SocialAuthSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=400)
+            
+        provider = serializer.validated_data['provider']
+        access_token = serializer.validated_data['access_token']
+        if get_userinfo_url(provider) is None:
+            return JsonResponse({'error': 'Invalid provider'}, status=400)
+            
+        key = token_cache_key(provider, access_token)
+        user = None
+        user_id = await cache.aget(key)
+        if user_id is not None:
+            user = await User.objects.filter(pk=user_id, is_active=True).afirst()
+            
+        if user is None:
+            try:
+                user_data = await fetch_user_data(provider, access_token)
+                user = await sync_to_async(complete_login)(request, provider, access_token, user_data)
+            except MissingBackend:
+                return JsonResponse({'error': 'Invalid provider'}, status=400)
+            except (InvalidProviderToken, AuthTokenError, AuthForbidden) as e:
+                return JsonResponse({'error': str(e)}, status=400)
+            except ProviderUnavailable:
+                return JsonResponse({'error': 'The identity provider is unavailable'}, status=502)
+            if not user:
+                return JsonResponse({'error': 'Invalid credentials'}, status=400)
+            await cache.aset(key, user.pk, get_token_cache_ttl())
+            
+        return JsonResponse(login_response_data(user))
+
 class UserLanguageFluencyView(generics.ListCreateAPIView):
     """
     API endpoint for managing user language fluencies
@@ -74,7 +149,71 @@ class UserLanguageFluencyView(generics.ListCreateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     
     def get_queryset(self):
-        return self.request.user.language_fluencies.all()
+        # Language names come from the registry, so no join is needed
+        return UserLanguageFluency.objects.filter(user_id=self.request.user.pk).order_by('pk')
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+
+class LeaderboardMixin:
+    """
+    Resolves the board, window and language of a leaderboard request
+
+    Query parameters: window ('all', 'week' or 'month') and language (code;
+    omit for the global board).
+    """
+    def get_board_key(self):
+        """Return (board, window, language_id)"""
+        board = self.kwargs['board']
+        if board not in LeaderboardEntry.Board.values:
+            raise Http404
+        window = self.request.query_params.get('window', 'all')
+        if window not in WINDOWS:
+            raise ValidationError({'window': f"Must be one of {', '.join(WINDOWS)}"})
+        language_id = None
+        language_code = self.request.query_params.get('language')
+        if language_code:
+            language_id = language_registry.id_for_code(language_code)
+            if language_id is None:
+                raise Http404
+        return board, window, language_id
+        
+    def get_board(self):
+        return board_entries(*self.get_board_key())
+
+class LeaderboardView(LeaderboardMixin, generics.ListAPIView):
+    """
+    API endpoint for the top contributors or validators, best first
+    """
+    serializer_class = LeaderboardEntrySerializer
+    permission_classes = (permissions.AllowAny,)
+    
+    def get_queryset(self):
+        # Only the users on the page are joined
+        return self.get_board().select_related('user').only('score', 'user_id', 'user__username')
+        
+    def list(self, request, *args, **kwargs):
+        entries = self.get_queryset()
+        page = self.paginate_queryset(entries)
+        offset = (self.paginator.page.number - 1) * self.paginator.page.paginator.per_page
+        for rank, entry in assign_ranks(entries, page, offset):
+            entry.rank = rank
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+class LeaderboardRankView(LeaderboardMixin, APIView):
+    """
+    API endpoint for the current user's score and rank on a leaderboard
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+    
+    def get(self, request, board):
+        key = self.get_board_key()
+        entry = board_entries(*key).filter(user=request.user).only('score').first()
+        return Response({
+            'board': board,
+            'window': request.query_params.get('window', 'all'),
+            'language': request.query_params.get('language'),
+            'score': entry.score if entry else 0,
+            'rank': score_rank(*key, entry.score) if entry else None,
+        })
@@ -3,6 +3,14 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The web process serves everything through WSGI (config.wsgi). This ASGI
+application only serves the natively async views listed in ASYNC_VIEWS, and
+runs as its own process (the `auth` process in the Procfile) that the front
+proxy routes those paths to; under WSGI the same views still work, holding a
+worker thread while they wait. Every other path gets a 404 here: Django 4.2
+buffers sync streaming responses in full under ASGI, which would break audio
+streaming and corpus exports.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -10,7 +18,24 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from django.urls import reverse
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# URL names of the views served by this process
+ASYNC_VIEWS = ('social_login_async',)
+ASYNC_PATHS = frozenset(reverse(name) for name in ASYNC_VIEWS)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] not in ASYNC_PATHS:
+        await send({
+            'type': 'http.response.start',
+            'status': 404,
+            'headers': [(b'content-type', b'application/json')],
+        })
+        await send({'type': 'http.response.body', 'body': b'{"detail": "Not found."}'})
+        return
+    await django_application(scope, receive, send)
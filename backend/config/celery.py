@@ -0,0 +1,15 @@
+"""
+Celery application for background tasks.
+
+Only used when CELERY_BROKER_URL is configured; see contributions.tasks.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+app = Celery('config')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -0,0 +1,109 @@
+"""
+Conditional GET support for API views.
+
+Views compute a cheap fingerprint of what they would return: max(updated_at)
+plus a row count for lists, or updated_at for a single object. When the
+client's If-None-Match / If-Modified-Since still matches, a 304 goes back
+before any serialization happens.
+
+List views whose pages are already cheap (keyset pages) can skip the
+aggregate and fingerprint the rendered page instead; a match then saves the
+transfer but not the page query.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+    return quote_etag(digest)
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag/Last-Modified validation to a DRF view's GET.
+
+    Subclasses implement `get_validators()` returning (etag, last_modified),
+    either of which may be None. Views that define their own `get` call
+    `check_not_modified()` first and return its response if there is one.
+    """
+    conditional_validators = None
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def check_not_modified(self, request):
+        etag, last_modified = self.get_validators()
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        self.conditional_validators = (etag, timestamp)
+        return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+    def get(self, request, *args, **kwargs):
+        return self.check_not_modified(request) or super().get(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.conditional_validators and response.status_code in (200, 304):
+            etag, timestamp = self.conditional_validators
+            if etag:
+                response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+            # Let browsers keep the body but revalidate on every use
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+        return response
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    """
+    Conditional GET for list views, keyed on the filtered queryset's
+    max(updated_at) and row count plus the request's query parameters.
+    """
+    conditional_per_user = False
+
+    def validate_rendered_page(self):
+        """Whether this request's ETag is taken from the page instead of an aggregate"""
+        return False
+
+    def get(self, request, *args, **kwargs):
+        if not self.validate_rendered_page():
+            return super().get(request, *args, **kwargs)
+        response = super(ConditionalGetMixin, self).get(request, *args, **kwargs)
+        etag = make_etag(*self.get_request_parts(), response.data)
+        self.conditional_validators = (etag, None)
+        return get_conditional_response(request, etag=etag, response=response)
+
+    def get_request_parts(self):
+        user_id = self.request.user.pk if self.conditional_per_user else None
+        return (self.request.path, sorted(self.request.query_params.lists()), user_id)
+
+    def get_validators(self):
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        state = queryset.aggregate(last_modified=Max('updated_at'), total=Count('pk'))
+        # Paginators that support it reuse this count instead of running their own
+        self.conditional_total = state['total']
+        etag = make_etag(*self.get_request_parts(), state['last_modified'], state['total'])
+        return etag, state['last_modified']
+
+
+class ConditionalObjectMixin(ConditionalGetMixin):
+    """
+    Conditional GET for detail views, keyed on the object's updated_at.
+
+    The object is fetched once and reused when the full response is built.
+    """
+    def get_object(self):
+        if not hasattr(self, '_conditional_object'):
+            self._conditional_object = super().get_object()
+        return self._conditional_object
+
+    def get_etag_parts(self, obj):
+        return (obj.pk, obj.updated_at)
+
+    def get_validators(self):
+        obj = self.get_object()
+        return make_etag(self.request.path, *self.get_etag_parts(obj)), obj.updated_at
@@ -168,7 +168,7 @@ AUTH_USER_MODEL = 'accounts.User'
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
@@ -191,6 +191,12 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+# Seconds a user's auth fields stay cached by CachedJWTAuthentication
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=60, cast=int)
+# Seconds a user's serialized profile stays cached, see accounts/profiles.py
+PROFILE_CACHE_TTL = config('PROFILE_CACHE_TTL', default=300, cast=int)
+# Seconds a leaderboard rank stays cached per score, see accounts/leaderboards.py
+LEADERBOARD_RANK_CACHE_TTL = config('LEADERBOARD_RANK_CACHE_TTL', default=60, cast=int)
 
 # CORS settings
 # More restrictive CORS settings for production
@@ -238,6 +244,11 @@ SOCIAL_AUTH_GOOGLE_OAUTH2_SCOPE = [
     'https://www.googleapis.com/auth/userinfo.email',
     'https://www.googleapis.com/auth/userinfo.profile',
 ]
+# Async social login: seconds a verified provider token maps to its user, and
+# the pooled client used to verify tokens with the provider
+SOCIAL_LOGIN_TOKEN_CACHE_TTL = config('SOCIAL_LOGIN_TOKEN_CACHE_TTL', default=300, cast=int)
+SOCIAL_LOGIN_HTTP_MAX_CONNECTIONS = config('SOCIAL_LOGIN_HTTP_MAX_CONNECTIONS', default=20, cast=int)
+SOCIAL_LOGIN_HTTP_TIMEOUT = config('SOCIAL_LOGIN_HTTP_TIMEOUT', default=10.0, cast=float)
 
 # AWS S3 Storage Settings (for production)
 # Uncomment and configure with your AWS credentials in production
@@ -257,6 +268,56 @@ SOCIAL_AUTH_GOOGLE_OAUTH2_SCOPE = [
 # In development, use local file system for media files
 DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
 
+# Audio delivery: set AUDIO_SENDFILE_HEADER to 'X-Accel-Redirect' (nginx, with an
+# internal location at AUDIO_SENDFILE_PREFIX aliased to MEDIA_ROOT) or
+# 'X-Sendfile' (Apache/lighttpd) to let the front proxy stream the files
+AUDIO_SENDFILE_HEADER = config('AUDIO_SENDFILE_HEADER', default=None)
+AUDIO_SENDFILE_PREFIX = config('AUDIO_SENDFILE_PREFIX', default='/protected-media/')
+AUDIO_URL_MAX_AGE = 60 * 60  # Lifetime of signed audio stream URLs, in seconds
+
+# Background tasks
+# Without a broker, audio processing runs on a local executor in the web process
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default=None)
+CELERY_TASK_IGNORE_RESULT = True
+# Threads of the local executor, so one slow upload does not hold up the rest
+BACKGROUND_TASK_WORKERS = config('BACKGROUND_TASK_WORKERS', default=4, cast=int)
+
+# Uploaded audio is normalized and transcoded to this format after upload
+AUDIO_OUTPUT_FORMAT = config('AUDIO_OUTPUT_FORMAT', default='mp3')
+AUDIO_OUTPUT_SAMPLE_RATE = config('AUDIO_OUTPUT_SAMPLE_RATE', default=16000, cast=int)
+AUDIO_OUTPUT_CHANNELS = 1
+AUDIO_PROCESSING_WORKERS = config('AUDIO_PROCESSING_WORKERS', default=2, cast=int)
+# Seconds after which a processing run that never finished may be retried
+AUDIO_PROCESSING_TIMEOUT = 600
+# Keep the uploaded recording next to the transcoded file (AudioContribution.original_file)
+AUDIO_KEEP_ORIGINALS = config('AUDIO_KEEP_ORIGINALS', default=True, cast=bool)
+# Retries, with a doubling delay starting at this many seconds, before a
+# finalized upload that cannot be assembled is marked failed
+AUDIO_ASSEMBLY_RETRIES = config('AUDIO_ASSEMBLY_RETRIES', default=3, cast=int)
+AUDIO_ASSEMBLY_RETRY_DELAY = config('AUDIO_ASSEMBLY_RETRY_DELAY', default=30, cast=int)
+
+# Corpus exports stop at rows last updated this many seconds ago; it must be
+# longer than any write transaction, see contributions/export.py
+EXPORT_WATERMARK_LAG = config('EXPORT_WATERMARK_LAG', default=300, cast=int)
+
+# Shared cache, used for cross-process invalidation of in-process caches.
+# Production needs Redis/Memcached: local memory is per process, so with more
+# than one worker, language edits would never reach the other workers.
+# `manage.py check --deploy` fails while this is left at local memory.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='mylugha'),
+    }
+}
+# How often, in seconds, a process checks the shared cache for a newer language registry
+LANGUAGE_REGISTRY_CHECK_INTERVAL = config('LANGUAGE_REGISTRY_CHECK_INTERVAL', default=1.0, cast=float)
+# Seconds for which language counters and contributor estimates are cached
+LANGUAGE_COUNTERS_TTL = config('LANGUAGE_COUNTERS_TTL', default=30, cast=int)
+# Cached inter-annotator agreement sums are updated with new validations on
+# read, and rebuilt from scratch once older than this many seconds
+AGREEMENT_REBUILD_INTERVAL = config('AGREEMENT_REBUILD_INTERVAL', default=24 * 60 * 60, cast=int)
+
 # Vercel and Production Security Settings
 if not DEBUG:
     # Security settings for production
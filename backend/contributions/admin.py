@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Contribution, AudioContribution
+from django.db.models import Count
+from .models import Contribution, AudioContribution, ContributionSignature
+from .rollup import apply_rollup_deltas, collect_created, collect_deleted, collect_status_change
 
 class AudioContributionInline(admin.StackedInline):
     """
@@ -9,13 +11,51 @@ class AudioContributionInline(admin.StackedInline):
     readonly_fields = ('duration', 'file_size')
     extra = 0
 
+class NearDuplicateFilter(admin.SimpleListFilter):
+    """
+    Filter contributions by membership of a near-duplicate cluster
+    """
+    title = 'near duplicates'
+    parameter_name = 'near_duplicates'
+    
+    def lookups(self, request, model_admin):
+        return (
+            ('yes', 'Has near duplicates'),
+            ('no', 'No near duplicates'),
+        )
+        
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.filter(signature__cluster__isnull=False)
+        if self.value() == 'no':
+            return queryset.exclude(signature__cluster__isnull=False)
+        return queryset
+
+class DuplicateClusterFilter(admin.SimpleListFilter):
+    """
+    Filter contributions down to one of the largest duplicate clusters
+    """
+    title = 'duplicate cluster'
+    parameter_name = 'duplicate_cluster'
+    max_clusters = 20
+    
+    def lookups(self, request, model_admin):
+        clusters = ContributionSignature.objects.filter(cluster__isnull=False)\
+            .values('cluster').annotate(size=Count('contribution')).order_by('-size')[:self.max_clusters]
+        return [(str(row['cluster']), f"{str(row['cluster'])[:8]} ({row['size']})") for row in clusters]
+        
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(signature__cluster=self.value())
+        return queryset
+
 @admin.register(Contribution)
 class ContributionAdmin(admin.ModelAdmin):
     """
     Admin configuration for the Contribution model
     """
     list_display = ('id', 'user', 'language', 'type', 'content_type', 'status', 'created_at', 'validations_count')
-    list_filter = ('type', 'content_type', 'status', 'language', 'anonymous')
+    list_filter = ('type', 'content_type', 'status', 'language', 'anonymous', NearDuplicateFilter, DuplicateClusterFilter)
     search_fields = ('original_text', 'translated_text', 'user__username')
     readonly_fields = ('id', 'validations_count', 'positive_validations', 'created_at', 'updated_at')
     inlines = [AudioContributionInline]
@@ -35,6 +75,22 @@ class ContributionAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    
+    # Admin-side creations, status edits and deletions also feed the daily stats rollup
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change:
+            apply_rollup_deltas(collect_created([obj]))
+        elif 'status' in form.changed_data:
+            apply_rollup_deltas(collect_status_change(obj, form.initial['status']))
+            
+    def delete_model(self, request, obj):
+        apply_rollup_deltas(collect_deleted([obj]))
+        super().delete_model(request, obj)
+        
+    def delete_queryset(self, request, queryset):
+        apply_rollup_deltas(collect_deleted(queryset))
+        super().delete_queryset(request, queryset)
 
 @admin.register(AudioContribution)
 class AudioContributionAdmin(admin.ModelAdmin):
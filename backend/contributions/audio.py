@@ -0,0 +1,26 @@
+"""
+CPU-bound audio transcoding.
+
+Kept free of Django imports so it can run in a spawned worker process.
+"""
+import io
+
+
+def transcode_audio(data, output_format='mp3', sample_rate=16000, channels=1):
+    """
+    Decode `data`, peak-normalize it, resample and re-encode it.
+
+    Returns (encoded_bytes, duration_in_seconds).
+    """
+    # pydub warns at import time when ffmpeg is missing, so import lazily
+    from pydub import AudioSegment, effects
+
+    segment = AudioSegment.from_file(io.BytesIO(data))
+    duration = segment.duration_seconds
+
+    segment = effects.normalize(segment)
+    segment = segment.set_channels(channels).set_frame_rate(sample_rate)
+
+    output = io.BytesIO()
+    segment.export(output, format=output_format)
+    return output.getvalue(), duration
@@ -0,0 +1,101 @@
+"""
+Distinct contributors per language.
+
+Exact all-time counts come from the LanguageContributor membership table: a
+(language, user) row is inserted the first time a user contributes to a
+language, and only the writer whose insert succeeds bumps
+Language.contributors_count, so concurrent first contributions are not
+double counted.
+
+Rolling windows (the last 7 or 30 days) are estimated with HyperLogLog. Each
+language keeps one sketch per day as ContributorSketch rows. The sketch of a
+window is the register-wise max over its days, so an estimate reads at most
+days x 2**HLL_PRECISION small rows, however many contributions there are.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .hll import hll_estimate, hll_position
+from .models import ContributorSketch, LanguageContributor
+
+RECENT_WINDOWS = (7, 30)
+
+
+def contributor_entries(contributions, entries=None):
+    """Collect (language_id, user_id, day) for new contributions"""
+    if entries is None:
+        entries = set()
+    for contribution in contributions:
+        entries.add((contribution.language_id, contribution.user_id, timezone.localdate(contribution.created_at)))
+    return entries
+
+
+def record_contributors(entries, language_deltas):
+    """
+    Insert-if-absent the memberships and update the daily sketches for
+    `entries`, adding newly inserted memberships to
+    language_deltas[language_id]['contributors_count']
+    """
+    pairs = sorted({(language_id, user_id) for language_id, user_id, _ in entries})
+    for language_id, user_id in pairs:
+        if LanguageContributor.objects.filter(language_id=language_id, user_id=user_id).exists():
+            continue
+        try:
+            with transaction.atomic():
+                LanguageContributor.objects.create(language_id=language_id, user_id=user_id)
+        except IntegrityError:
+            # Someone else recorded this membership first
+            continue
+        language_deltas[language_id]['contributors_count'] += 1
+
+    ranks = {}
+    for language_id, user_id, day in entries:
+        register, rank = hll_position(user_id)
+        key = (language_id, day, register)
+        ranks[key] = max(ranks.get(key, 0), rank)
+    for (language_id, day, register), rank in sorted(ranks.items()):
+        _raise_register(language_id, day, register, rank)
+    return language_deltas
+
+
+def _raise_register(language_id, day, register, rank):
+    lookup = {'language_id': language_id, 'day': day, 'register': register}
+    if ContributorSketch.objects.filter(rank__lt=rank, **lookup).update(rank=rank):
+        return
+    if ContributorSketch.objects.filter(**lookup).exists():
+        return
+    try:
+        with transaction.atomic():
+            ContributorSketch.objects.create(rank=rank, **lookup)
+    except IntegrityError:
+        ContributorSketch.objects.filter(rank__lt=rank, **lookup).update(rank=rank)
+
+
+def recent_contributors(language_ids=None, windows=RECENT_WINDOWS):
+    """
+    Estimated distinct contributors over the last N days, for each window.
+
+    Returns {language_id: {days: estimate}} in one grouped query.
+    """
+    today = timezone.localdate()
+    starts = {days: today - timedelta(days=days - 1) for days in windows}
+    queryset = ContributorSketch.objects.filter(day__gte=min(starts.values()))
+    if language_ids is not None:
+        queryset = queryset.filter(language_id__in=language_ids)
+    rows = queryset.values('language_id', 'register').annotate(**{
+        f'rank_{days}': Max('rank', filter=Q(day__gte=start)) for days, start in starts.items()
+    })
+
+    sketches = defaultdict(lambda: {days: {} for days in windows})
+    for row in rows:
+        for days in windows:
+            if row[f'rank_{days}']:
+                sketches[row['language_id']][days][row['register']] = row[f'rank_{days}']
+    return {
+        language_id: {days: hll_estimate(sketch) for days, sketch in by_window.items()}
+        for language_id, by_window in sketches.items()
+    }
@@ -0,0 +1,83 @@
+"""
+Denormalized counters kept on Language and User for new contributions.
+
+Deltas are grouped per row and applied as a single `UPDATE ... SET col = col + n`
+per Language and per User, touching only the counter columns. Because the
+arithmetic happens in the database, concurrent writers cannot lose updates,
+and nothing is read back into Python. The deltas are applied by
+`CreatedContributions.apply` (see lifecycle.py) inside the transaction that
+creates the contributions, as its last statement, so the row locks on the hot
+Language row are held as briefly as possible.
+
+The language registry serves Language counters from a short-lived cache (see
+languages/registry.py), so nothing here invalidates it.
+"""
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.profiles import invalidate_cached_profiles
+from languages.models import Language
+
+
+
+def language_deltas_for(contribution_type, content_type):
+    """
+    Return the Language counter increments for one contribution.
+
+    contributors_count is not included: it only moves when a new
+    (language, user) membership is recorded, see contributors.py.
+    """
+    deltas = {}
+    if contribution_type == 'audio':
+        deltas['audio_count'] = 1
+    elif content_type == 'word':
+        deltas['words_count'] = 1
+    elif content_type == 'sentence':
+        deltas['sentences_count'] = 1
+    return deltas
+
+
+def collect_deltas(contributions, language_deltas=None, user_deltas=None):
+    """
+    Group counter increments for an iterable of new contributions.
+
+    Returns ({language_id: Counter(field -> n)}, Counter(user_id -> n)).
+    Pass the accumulators back in to keep summing across several chunks.
+    """
+    if language_deltas is None:
+        language_deltas = defaultdict(Counter)
+    if user_deltas is None:
+        user_deltas = Counter()
+    for contribution in contributions:
+        language_deltas[contribution.language_id].update(
+            language_deltas_for(contribution.type, contribution.content_type)
+        )
+        user_deltas[contribution.user_id] += 1
+    return language_deltas, user_deltas
+
+
+def apply_counter_deltas(language_deltas, user_deltas):
+    """
+    Apply grouped deltas with one F()-based UPDATE per affected row.
+
+    Every language in `language_deltas` gets its updated_at bumped, even with
+    no counter to move (paragraphs, stories, known contributors), since
+    conditional GETs of its stats are keyed on it.
+    """
+    now = timezone.now()
+    # Fixed ordering keeps lock acquisition consistent across transactions
+    for language_id in sorted(language_deltas):
+        changes = {field: F(field) + n for field, n in language_deltas[language_id].items() if n}
+        Language.objects.filter(pk=language_id).update(updated_at=now, **changes)
+
+    User = get_user_model()
+    for user_id in sorted(user_deltas):
+        if user_deltas[user_id]:
+            User.objects.filter(pk=user_id).update(
+                total_contributions=F('total_contributions') + user_deltas[user_id]
+            )
+    # Counters are part of the cached profiles
+    invalidate_cached_profiles(user_deltas)
@@ -0,0 +1,275 @@
+"""
+Near-duplicate detection with MinHash and LSH banding.
+
+Each contribution's normalized original + translated text is cut into
+character shingles and summarized by a NUM_PERM-value MinHash signature.
+The signature is split into BANDS bands of ROWS values, and each band is
+hashed to a bucket stored in ContributionBand. Contributions that share a
+bucket in any band are candidates. A candidate counts as a near-duplicate
+when its estimated Jaccard similarity reaches DUPLICATE_THRESHOLD. A lookup
+costs one index probe per band, whatever the size of the language, and reads
+at most DUPLICATE_BUCKET_CANDIDATES members of each bucket, so very common
+short entries cannot turn one lookup into a scan.
+
+Cluster ids are always UUIDs; the smallest id by string order wins, both
+here and in `cluster_language`.
+"""
+import hashlib
+import re
+import zlib
+from collections import defaultdict
+from itertools import groupby
+
+import numpy as np
+from django.conf import settings
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import Contribution, ContributionBand, ContributionSignature
+
+SHINGLE_SIZE = 4
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Universal hashing (a * x + b) mod P over 32-bit shingle hashes; P < 2**31
+# keeps a * x below 2**63, so the arithmetic never overflows uint64
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.RandomState(20240501)
+_A = _rng.randint(1, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def get_threshold():
+    return getattr(settings, 'DUPLICATE_THRESHOLD', 0.7)
+
+
+def get_bucket_candidates():
+    return getattr(settings, 'DUPLICATE_BUCKET_CANDIDATES', 50)
+
+
+def normalize(text):
+    return _WHITESPACE_RE.sub(' ', text.lower()).strip()
+
+
+def shingles(original_text, translated_text):
+    text = f'{normalize(original_text)} | {normalize(translated_text)}'
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(original_text, translated_text):
+    """Return the MinHash signature as a uint32 array of length NUM_PERM"""
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode('utf-8')) for shingle in shingles(original_text, translated_text)),
+        dtype=np.uint64,
+    )
+    values = (_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME
+    return values.min(axis=1).astype(np.uint32)
+
+
+def band_buckets(signature):
+    """Hash each band of the signature to a signed 64-bit bucket id"""
+    buckets = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+        digest = hashlib.blake2b(chunk, digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return buckets
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return float(np.count_nonzero(signature == other)) / NUM_PERM
+
+
+def _load_signature(raw):
+    return np.frombuffer(bytes(raw), dtype=np.uint32)
+
+
+def _find_matches(language_id, signature, buckets, exclude_id=None):
+    """Return [(contribution_id, cluster, similarity)] above the threshold"""
+    condition = Q()
+    for band, bucket in enumerate(buckets):
+        condition |= Q(band=band, bucket=bucket)
+    candidates = ContributionBand.objects.filter(condition, language_id=language_id)
+    if exclude_id is not None:
+        candidates = candidates.exclude(contribution_id=exclude_id)
+    # The oldest members of each bucket; they carry the bucket's cluster
+    candidates = candidates.annotate(
+        position=Window(RowNumber(), partition_by=[F('band'), F('bucket')], order_by=F('id').asc())
+    ).filter(position__lte=get_bucket_candidates())
+    candidate_ids = set(candidates.values_list('contribution_id', flat=True))
+    if not candidate_ids:
+        return []
+
+    threshold = get_threshold()
+    matches = []
+    rows = ContributionSignature.objects.filter(contribution_id__in=candidate_ids)\
+        .values_list('contribution_id', 'cluster', 'signature')
+    for contribution_id, cluster, raw in rows:
+        score = similarity(signature, _load_signature(raw))
+        if score >= threshold:
+            matches.append((contribution_id, cluster, score))
+    matches.sort(key=lambda match: -match[2])
+    return matches
+
+
+def find_duplicates(contribution):
+    """Near-duplicates of an indexed or unindexed contribution, best first"""
+    signature = minhash(contribution.original_text, contribution.translated_text)
+    return _find_matches(contribution.language_id, signature, band_buckets(signature), exclude_id=contribution.pk)
+
+
+def _merge_clusters(target, clusters):
+    others = [cluster for cluster in clusters if cluster is not None and cluster != target]
+    if others:
+        ContributionSignature.objects.filter(cluster__in=others).update(cluster=target)
+
+
+def index_contribution(contribution_id, language_id, original_text, translated_text):
+    """
+    Add one contribution to the index and join it to any duplicate cluster.
+    """
+    signature = minhash(original_text, translated_text)
+    buckets = band_buckets(signature)
+    matches = _find_matches(language_id, signature, buckets, exclude_id=contribution_id)
+
+    cluster = None
+    if matches:
+        clusters = {match_cluster for _, match_cluster, _ in matches}
+        # Existing cluster ids are their smallest member, so this is the
+        # smallest id of the merged cluster, as cluster_language would pick
+        cluster = min(
+            [contribution_id, *(match_id for match_id, _, _ in matches), *clusters - {None}], key=str
+        )
+        _merge_clusters(cluster, clusters)
+        # Matches that were not in any cluster yet join this one
+        ContributionSignature.objects.filter(
+            contribution_id__in=[match_id for match_id, match_cluster, _ in matches if match_cluster is None]
+        ).update(cluster=cluster)
+
+    ContributionSignature.objects.update_or_create(
+        contribution_id=contribution_id,
+        defaults={'language_id': language_id, 'signature': signature.tobytes(), 'cluster': cluster},
+    )
+    ContributionBand.objects.filter(contribution_id=contribution_id).delete()
+    ContributionBand.objects.bulk_create([
+        ContributionBand(contribution_id=contribution_id, language_id=language_id, band=band, bucket=bucket)
+        for band, bucket in enumerate(buckets)
+    ])
+
+
+def index_contributions(contributions):
+    """Index newly created contributions one by one"""
+    for contribution in contributions:
+        index_contribution(contribution.pk, contribution.language_id,
+                           contribution.original_text, contribution.translated_text)
+
+
+def index_contribution_ids(contribution_ids):
+    rows = Contribution.objects.filter(pk__in=contribution_ids)\
+        .values_list('id', 'language_id', 'original_text', 'translated_text')
+    for row in rows.iterator():
+        index_contribution(*row)
+
+
+def build_index(queryset, chunk_size=2000):
+    """
+    Bulk-build signatures and bands for `queryset`, skipping rows already
+    indexed. Returns the number of contributions added; run
+    `cluster_language` afterwards to form clusters.
+    """
+    rows = queryset.filter(signature__isnull=True)\
+        .values_list('id', 'language_id', 'original_text', 'translated_text')
+    added = 0
+    signatures, bands = [], []
+    for contribution_id, language_id, original_text, translated_text in rows.iterator(chunk_size=chunk_size):
+        signature = minhash(original_text, translated_text)
+        signatures.append(ContributionSignature(
+            contribution_id=contribution_id, language_id=language_id, signature=signature.tobytes()
+        ))
+        bands.extend(
+            ContributionBand(contribution_id=contribution_id, language_id=language_id, band=band, bucket=bucket)
+            for band, bucket in enumerate(band_buckets(signature))
+        )
+        if len(signatures) >= chunk_size:
+            ContributionSignature.objects.bulk_create(signatures, ignore_conflicts=True)
+            ContributionBand.objects.bulk_create(bands, batch_size=chunk_size)
+            added += len(signatures)
+            signatures, bands = [], []
+    if signatures:
+        ContributionSignature.objects.bulk_create(signatures, ignore_conflicts=True)
+        ContributionBand.objects.bulk_create(bands, batch_size=chunk_size)
+        added += len(signatures)
+    return added
+
+
+def cluster_language(language_id, max_pairwise=50):
+    """
+    Recompute duplicate clusters for a language from the band table.
+
+    Band rows are read in index order and only buckets with more than one
+    member are examined. Every candidate pair is verified against the
+    signatures before it is joined. Buckets larger than `max_pairwise` are
+    compared against their first member only, to avoid quadratic blow-ups on
+    very common short entries.
+    """
+    rows = ContributionBand.objects.filter(language_id=language_id)\
+        .order_by('band', 'bucket').values_list('band', 'bucket', 'contribution_id')
+    groups = []
+    for _, group in groupby(rows.iterator(chunk_size=10000), key=lambda row: (row[0], row[1])):
+        ids = [row[2] for row in group]
+        if len(ids) > 1:
+            groups.append(ids)
+
+    candidate_ids = {cid for ids in groups for cid in ids}
+    signatures = {}
+    for cid, raw in ContributionSignature.objects.filter(contribution_id__in=candidate_ids)\
+            .values_list('contribution_id', 'signature').iterator():
+        signatures[cid] = _load_signature(raw)
+
+    parent = {}
+
+    def find(node):
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(first, second):
+        root_a, root_b = find(first), find(second)
+        if root_a != root_b:
+            # The smallest id becomes the cluster id, so results are stable
+            parent[max(root_a, root_b, key=str)] = min(root_a, root_b, key=str)
+
+    threshold = get_threshold()
+    checked = set()
+    for ids in groups:
+        if len(ids) > max_pairwise:
+            pairs = ((ids[0], other) for other in ids[1:])
+        else:
+            pairs = ((a, b) for i, a in enumerate(ids) for b in ids[i + 1:])
+        for first, second in pairs:
+            pair = (first, second) if str(first) < str(second) else (second, first)
+            if pair in checked:
+                continue
+            checked.add(pair)
+            if similarity(signatures[first], signatures[second]) >= threshold:
+                union(first, second)
+
+    clusters = defaultdict(list)
+    for node in parent:
+        clusters[find(node)].append(node)
+
+    ContributionSignature.objects.filter(language_id=language_id, cluster__isnull=False).update(cluster=None)
+    count = 0
+    for root, ids in clusters.items():
+        if len(ids) > 1:
+            ContributionSignature.objects.filter(contribution_id__in=ids).update(cluster=root)
+            count += 1
+    return count
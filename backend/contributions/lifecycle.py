@@ -0,0 +1,72 @@
+"""
+Bookkeeping shared by every path that creates contributions.
+"""
+from django.db import transaction
+
+from accounts.leaderboards import apply_score_deltas, collect_contribution_scores
+
+from .contributors import contributor_entries, record_contributors
+from .counters import apply_counter_deltas, collect_deltas
+from .duplicates import index_contributions
+from .rollup import apply_rollup_deltas, collect_created
+from .tasks import enqueue_duplicate_indexing
+
+# Up to this many new contributions are added to the near-duplicate index
+# inline; larger batches are indexed in the background after commit
+INLINE_INDEX_LIMIT = 50
+
+
+class CreatedContributions:
+    """
+    Bookkeeping for the contributions created by one transaction
+
+    `add` is called with each chunk of saved rows and only sums their deltas,
+    so a large upload never holds more than a chunk. `apply` writes every
+    delta once, inside the creating transaction. The rows every submission to
+    a language contends for, its daily rollup row and its Language row, are
+    written last, so their locks are held only until commit.
+    """
+    def __init__(self):
+        self.count = 0
+        self.ids = []
+        self.to_index = []
+        self.language_deltas = None
+        self.user_deltas = None
+        self.rollup_deltas = None
+        self.score_deltas = None
+        self.contributors = set()
+
+    def add(self, contributions):
+        contributions = list(contributions)
+        self.count += len(contributions)
+        self.ids.extend(contribution.pk for contribution in contributions)
+        if self.count <= INLINE_INDEX_LIMIT:
+            self.to_index.extend(contributions)
+        else:
+            self.to_index = []
+        self.language_deltas, self.user_deltas = collect_deltas(
+            contributions, self.language_deltas, self.user_deltas
+        )
+        self.rollup_deltas = collect_created(contributions, self.rollup_deltas)
+        self.score_deltas = collect_contribution_scores(contributions, self.score_deltas)
+        contributor_entries(contributions, self.contributors)
+
+    def apply(self):
+        if not self.count:
+            return
+        if self.count <= INLINE_INDEX_LIMIT:
+            index_contributions(self.to_index)
+        else:
+            ids = list(self.ids)
+            transaction.on_commit(lambda: enqueue_duplicate_indexing(ids))
+        apply_score_deltas(self.score_deltas)
+        record_contributors(self.contributors, self.language_deltas)
+        apply_rollup_deltas(self.rollup_deltas)
+        apply_counter_deltas(self.language_deltas, self.user_deltas)
+
+
+def contributions_created(contributions):
+    """Run inside the creating transaction, after the rows are saved"""
+    created = CreatedContributions()
+    created.add(contributions)
+    created.apply()
@@ -0,0 +1,68 @@
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Q
+
+from contributions.models import Contribution, DailyContributionStats
+from languages.models import Language
+from validations.models import Validation
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily contribution stats rollup from the raw contributions and validations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--language', help='Only rebuild this language code')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        languages = Language.objects.all()
+        if options['language']:
+            languages = languages.filter(code=options['language'])
+            if not languages.exists():
+                raise CommandError(f"Language {options['language']} not found")
+
+        for language in languages:
+            with transaction.atomic():
+                rows = self.collect(language)
+                DailyContributionStats.objects.filter(language=language).delete()
+                DailyContributionStats.objects.bulk_create([
+                    DailyContributionStats(
+                        language=language, day=day, type=contribution_type,
+                        content_type=content_type, status=status, **counts
+                    )
+                    for (day, contribution_type, content_type, status), counts in rows.items()
+                ], batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'{language.name}: {len(rows)} daily stats rows'))
+
+    def collect(self, language):
+        rows = defaultdict(Counter)
+        contributions = Contribution.objects.filter(language=language).order_by()
+
+        # Every contribution entered `pending` on the day it was created
+        created = contributions.values('created_at__date', 'type', 'content_type').annotate(n=Count('id'))
+        for row in created:
+            key = (row['created_at__date'], row['type'], row['content_type'], Contribution.Status.PENDING)
+            rows[key]['entered_count'] += row['n']
+
+        # History is not kept, so decisions are dated by the contribution's last update
+        decided = contributions.exclude(status=Contribution.Status.PENDING)\
+            .values('updated_at__date', 'type', 'content_type', 'status').annotate(n=Count('id'))
+        for row in decided:
+            day, contribution_type, content_type = row['updated_at__date'], row['type'], row['content_type']
+            rows[(day, contribution_type, content_type, Contribution.Status.PENDING)]['left_count'] += row['n']
+            rows[(day, contribution_type, content_type, row['status'])]['entered_count'] += row['n']
+
+        # Likewise, validations are filed under the contribution's current status
+        validations = Validation.objects.filter(contribution__language=language).order_by()\
+            .values('created_at__date', 'contribution__type', 'contribution__content_type', 'contribution__status')\
+            .annotate(n=Count('id'), positive=Count('id', filter=Q(is_valid=True)))
+        for row in validations:
+            key = (
+                row['created_at__date'], row['contribution__type'],
+                row['contribution__content_type'], row['contribution__status'],
+            )
+            rows[key]['validations_count'] += row['n']
+            rows[key]['positive_validations_count'] += row['positive']
+        return rows
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from contributions.duplicates import build_index, cluster_language
+from contributions.models import Contribution, ContributionBand, ContributionSignature
+from languages.models import Language
+
+class Command(BaseCommand):
+    help = 'Build the MinHash/LSH near-duplicate index and recompute duplicate clusters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--language', help='Only index this language code')
+        parser.add_argument('--rebuild', action='store_true', help='Drop existing signatures first')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        languages = Language.objects.all()
+        if options['language']:
+            languages = languages.filter(code=options['language'])
+            if not languages.exists():
+                raise CommandError(f"Language {options['language']} not found")
+
+        for language in languages:
+            if options['rebuild']:
+                ContributionBand.objects.filter(language=language).delete()
+                ContributionSignature.objects.filter(language=language).delete()
+
+            added = build_index(Contribution.objects.filter(language=language), chunk_size=options['chunk_size'])
+            clusters = cluster_language(language.id)
+            self.stdout.write(self.style.SUCCESS(
+                f'{language.name}: indexed {added} contributions, {clusters} duplicate clusters'
+            ))
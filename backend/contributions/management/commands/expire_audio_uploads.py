@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from contributions.models import AudioContribution, AudioUpload
+from contributions.uploads import discard
+
+class Command(BaseCommand):
+    help = 'Delete resumable audio uploads that were abandoned, or finalized and no longer needed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=48, help='Age after which an upload is purged')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        # Finalized uploads are kept while their bytes may still be moved into place
+        assembling = AudioContribution.objects.filter(
+            contribution_id=OuterRef('contribution_id'),
+            processing_status=AudioContribution.ProcessingStatus.ASSEMBLING,
+        )
+        stale = AudioUpload.objects.filter(updated_at__lt=cutoff).exclude(Exists(assembling))
+
+        abandoned = finalized = 0
+        for upload in stale.iterator():
+            # Assembled uploads have nothing left; failed ones still hold their bytes
+            discard(upload)
+            upload.delete()
+            if upload.contribution_id:
+                finalized += 1
+            else:
+                abandoned += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {abandoned} abandoned and {finalized} finalized uploads'
+        ))
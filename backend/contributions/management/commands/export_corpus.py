@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from contributions.export import CONTENT_TYPES, export_queryset, get_watermark, iter_rows, render_rows
+
+class Command(BaseCommand):
+    help = 'Stream validated contributions as an NDJSON/CSV/TSV parallel corpus'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(CONTENT_TYPES), default='tsv')
+        parser.add_argument('--language', help='Language code to export')
+        parser.add_argument('--content-type', help='Only export this content type (word, sentence, ...)')
+        parser.add_argument('--since', help='Watermark from a previous export (ISO 8601)')
+        parser.add_argument('--output', help='File to write to (defaults to stdout)')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError('--since must be an ISO 8601 datetime')
+
+        queryset = export_queryset(
+            language_code=options['language'],
+            content_type=options['content_type'],
+            since=since,
+        )
+        # Pin the upper bound so rows written during the export land in the next one
+        watermark = get_watermark(queryset)
+        if watermark is None:
+            self.stderr.write('Nothing to export')
+            return
+        queryset = export_queryset(
+            language_code=options['language'],
+            content_type=options['content_type'],
+            since=since,
+            until=watermark,
+        )
+
+        lines = render_rows(iter_rows(queryset), options['format'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
+
+        self.stderr.write(self.style.SUCCESS(f'Export watermark: {watermark.isoformat()}'))
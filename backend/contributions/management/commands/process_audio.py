@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from contributions.models import AudioContribution, AudioUpload
+from contributions.tasks import get_processing_timeout, run_audio_processing, run_upload_assembly
+
+class Command(BaseCommand):
+    help = 'Process audio contributions that have not been probed and transcoded yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Maximum number of files to process')
+
+    def handle(self, *args, **options):
+        # Unprocessed rows, and rows whose processing run died mid-way
+        stale = timezone.now() - timedelta(seconds=get_processing_timeout())
+
+        # Finalized uploads whose assembly task was lost, e.g. with its process
+        stuck = AudioUpload.objects.filter(
+            contribution__audio__processing_status=AudioContribution.ProcessingStatus.ASSEMBLING,
+            contribution__audio__processing_started_at__lt=stale,
+        ).values_list('id', flat=True)
+        for upload_id in stuck:
+            try:
+                run_upload_assembly(upload_id)
+            except Exception as exc:
+                self.stderr.write(f'Could not assemble upload {upload_id}: {exc}')
+
+        pending = AudioContribution.objects.filter(
+            Q(processing_status=AudioContribution.ProcessingStatus.PENDING)
+            | Q(processing_status=AudioContribution.ProcessingStatus.PROCESSING, processing_started_at__lt=stale)
+        ).values_list('id', flat=True)
+        if options['limit']:
+            pending = pending[:options['limit']]
+
+        processed = 0
+        for audio_id in pending.iterator():
+            run_audio_processing(audio_id)
+            processed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} audio files'))
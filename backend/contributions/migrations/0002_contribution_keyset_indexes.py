@@ -0,0 +1,25 @@
+# Generated by Django 4.2.21 on 2026-10-18 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contribution',
+            index=models.Index(fields=['-created_at', '-id'], name='contrib_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contribution',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='contrib_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contribution',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='contrib_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,99 @@
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    "ALTER TABLE contributions_contribution ADD COLUMN search_vector tsvector",
+    """
+    CREATE FUNCTION contributions_contribution_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.original_text, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.translated_text, '')), 'A');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER contributions_contribution_search_vector_trg
+    BEFORE INSERT OR UPDATE OF original_text, translated_text ON contributions_contribution
+    FOR EACH ROW EXECUTE FUNCTION contributions_contribution_search_vector()
+    """,
+    # Touching the text columns fires the trigger to backfill existing rows
+    "UPDATE contributions_contribution SET original_text = original_text",
+    "CREATE INDEX contrib_search_vector_gin ON contributions_contribution USING gin (search_vector)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP TRIGGER IF EXISTS contributions_contribution_search_vector_trg ON contributions_contribution",
+    "DROP FUNCTION IF EXISTS contributions_contribution_search_vector()",
+    "DROP INDEX IF EXISTS contrib_search_vector_gin",
+    "ALTER TABLE contributions_contribution DROP COLUMN IF EXISTS search_vector",
+]
+
+# The shadow table is keyed by contribution_id rather than SQLite's rowid,
+# which is not stable across VACUUM for tables without an INTEGER PRIMARY KEY.
+# Edits and deletes of contribution text are rare, so the scan on those paths
+# is acceptable for the local fallback database.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE contributions_contribution_fts USING fts5(
+        contribution_id UNINDEXED, original_text, translated_text,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER contributions_contribution_fts_ai AFTER INSERT ON contributions_contribution
+    BEGIN
+        INSERT INTO contributions_contribution_fts (contribution_id, original_text, translated_text)
+        VALUES (new.id, new.original_text, new.translated_text);
+    END
+    """,
+    """
+    CREATE TRIGGER contributions_contribution_fts_au
+    AFTER UPDATE OF original_text, translated_text ON contributions_contribution
+    BEGIN
+        DELETE FROM contributions_contribution_fts WHERE contribution_id = old.id;
+        INSERT INTO contributions_contribution_fts (contribution_id, original_text, translated_text)
+        VALUES (new.id, new.original_text, new.translated_text);
+    END
+    """,
+    """
+    CREATE TRIGGER contributions_contribution_fts_ad AFTER DELETE ON contributions_contribution
+    BEGIN
+        DELETE FROM contributions_contribution_fts WHERE contribution_id = old.id;
+    END
+    """,
+    """
+    INSERT INTO contributions_contribution_fts (contribution_id, original_text, translated_text)
+    SELECT id, original_text, translated_text FROM contributions_contribution
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS contributions_contribution_fts_ai",
+    "DROP TRIGGER IF EXISTS contributions_contribution_fts_au",
+    "DROP TRIGGER IF EXISTS contributions_contribution_fts_ad",
+    "DROP TABLE IF EXISTS contributions_contribution_fts",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0002_contribution_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.21 on 2026-10-18 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0003_contribution_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contribution',
+            index=models.Index(fields=['status', 'updated_at', 'id'], name='contrib_status_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.21 on 2026-10-18 15:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('languages', '0001_initial'),
+        ('contributions', '0004_contribution_export_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('content_type', models.CharField(choices=[('word', 'Word'), ('sentence', 'Sentence'), ('paragraph', 'Paragraph'), ('story', 'Story')], max_length=20)),
+                ('original_text', models.TextField()),
+                ('translated_text', models.TextField()),
+                ('context', models.TextField(blank=True)),
+                ('anonymous', models.BooleanField(default=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('upload_length', models.PositiveBigIntegerField()),
+                ('offset', models.PositiveBigIntegerField(default=0)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('contribution', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='contributions.contribution')),
+                ('language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='languages.language')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audio_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
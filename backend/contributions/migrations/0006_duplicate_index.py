@@ -0,0 +1,37 @@
+# Generated by Django 4.2.21 on 2026-10-18 15:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('languages', '0001_initial'),
+        ('contributions', '0005_audioupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContributionSignature',
+            fields=[
+                ('contribution', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='contributions.contribution')),
+                ('signature', models.BinaryField()),
+                ('cluster', models.UUIDField(blank=True, db_index=True, null=True)),
+                ('language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='languages.language')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContributionBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('contribution', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_bands', to='contributions.contribution')),
+                ('language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='languages.language')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['language', 'band', 'bucket'], name='contrib_band_bucket_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.21 on 2026-10-18 15:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('languages', '0001_initial'),
+        ('contributions', '0006_duplicate_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyContributionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('type', models.CharField(choices=[('text', 'Text'), ('audio', 'Audio')], max_length=10)),
+                ('content_type', models.CharField(choices=[('word', 'Word'), ('sentence', 'Sentence'), ('paragraph', 'Paragraph'), ('story', 'Story')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('validated', 'Validated'), ('rejected', 'Rejected')], max_length=20)),
+                ('entered_count', models.PositiveIntegerField(default=0)),
+                ('left_count', models.PositiveIntegerField(default=0)),
+                ('validations_count', models.PositiveIntegerField(default=0)),
+                ('positive_validations_count', models.PositiveIntegerField(default=0)),
+                ('language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='languages.language')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily contribution stats',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailycontributionstats',
+            constraint=models.UniqueConstraint(fields=('language', 'day', 'type', 'content_type', 'status'), name='daily_stats_unique_key'),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.21 on 2026-10-18 15:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+from datetime import timedelta
+
+from django.db.models import Count, Min
+from django.utils import timezone
+
+
+def backfill_contributors(apps, schema_editor):
+    """
+    Record a membership per (language, user) that has contributed, make
+    Language.contributors_count the distinct count, and sketch the last 30 days
+    """
+    from contributions.hll import hll_position
+
+    Contribution = apps.get_model('contributions', 'Contribution')
+    LanguageContributor = apps.get_model('contributions', 'LanguageContributor')
+    ContributorSketch = apps.get_model('contributions', 'ContributorSketch')
+    Language = apps.get_model('languages', 'Language')
+
+    pairs = Contribution.objects.order_by().values('language_id', 'user_id').annotate(first=Min('created_at'))
+    LanguageContributor.objects.bulk_create([
+        LanguageContributor(language_id=row['language_id'], user_id=row['user_id'], first_contributed_at=row['first'])
+        for row in pairs
+    ], batch_size=1000, ignore_conflicts=True)
+
+    counts = dict(
+        LanguageContributor.objects.order_by().values('language_id')
+        .annotate(n=Count('id')).values_list('language_id', 'n')
+    )
+    for language in Language.objects.all():
+        Language.objects.filter(pk=language.pk).update(contributors_count=counts.get(language.pk, 0))
+
+    since = timezone.now() - timedelta(days=30)
+    ranks = {}
+    recent = Contribution.objects.filter(created_at__gte=since).order_by()\
+        .values_list('language_id', 'user_id', 'created_at__date').distinct()
+    for language_id, user_id, day in recent:
+        register, rank = hll_position(user_id)
+        key = (language_id, day, register)
+        ranks[key] = max(ranks.get(key, 0), rank)
+    ContributorSketch.objects.bulk_create([
+        ContributorSketch(language_id=language_id, day=day, register=register, rank=rank)
+        for (language_id, day, register), rank in ranks.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('languages', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('contributions', '0007_daily_contribution_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LanguageContributor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_contributed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contributor_memberships', to='languages.language')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contributor_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContributorSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('register', models.PositiveSmallIntegerField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contributor_sketches', to='languages.language')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='languagecontributor',
+            constraint=models.UniqueConstraint(fields=('language', 'user'), name='language_contributor_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='contributorsketch',
+            constraint=models.UniqueConstraint(fields=('language', 'day', 'register'), name='contributor_sketch_unique'),
+        ),
+        migrations.RunPython(backfill_contributors, migrations.RunPython.noop),
+    ]
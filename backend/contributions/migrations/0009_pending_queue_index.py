@@ -0,0 +1,17 @@
+# Generated by Django 4.2.21 on 2026-10-18 16:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0008_distinct_contributors'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contribution',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['language', '-validations_count', 'created_at'], name='contrib_pending_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.21 on 2026-10-18 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0009_pending_queue_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contribution',
+            name='consensus_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
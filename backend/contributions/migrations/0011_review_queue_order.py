@@ -0,0 +1,60 @@
+# Generated by Django 4.2.21 on 2026-10-18 16:42
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+
+def backfill_reviews_needed(apps, schema_editor):
+    """Set reviews_needed on pending contributions, per language and distinct pair of counts"""
+    from validations.consensus import reviews_needed
+
+    Contribution = apps.get_model('contributions', 'Contribution')
+    Language = apps.get_model('languages', 'Language')
+
+    for language in Language.objects.all():
+        pending = Contribution.objects.filter(language=language, status='pending')
+        pairs = list(pending.order_by().values_list('validations_count', 'positive_validations').distinct())
+        for validations_count, positive_validations in pairs:
+            pending.filter(
+                validations_count=validations_count, positive_validations=positive_validations
+            ).update(reviews_needed=reviews_needed(validations_count, positive_validations, language))
+
+
+def restore_search_triggers(apps, schema_editor):
+    """
+    SQLite adds a NOT NULL column by rebuilding the table, which drops the
+    full-text triggers from 0003; the shadow table itself is kept
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    search_index = import_module('contributions.migrations.0003_contribution_search_index')
+    for sql in search_index.SQLITE_FORWARD:
+        if 'CREATE TRIGGER' in sql:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('languages', '0002_consensus_thresholds'),
+        ('contributions', '0010_consensus_score'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='contribution',
+            name='contrib_pending_queue_idx',
+        ),
+        migrations.AddField(
+            model_name='contribution',
+            name='reviews_needed',
+            field=models.PositiveSmallIntegerField(default=3),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+        migrations.RunPython(backfill_reviews_needed, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='contribution',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['language', 'reviews_needed', 'created_at'], name='contrib_pending_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.21 on 2026-10-18 16:49
+
+from django.db import migrations, models
+
+
+def mark_processed(apps, schema_editor):
+    """Rows that already have a duration went through the pipeline"""
+    AudioContribution = apps.get_model('contributions', 'AudioContribution')
+    AudioContribution.objects.filter(duration__isnull=False).update(processing_status='processed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0011_review_queue_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiocontribution',
+            name='original_file',
+            field=models.FileField(blank=True, upload_to='audio_contributions/%Y/%m/'),
+        ),
+        migrations.AddField(
+            model_name='audiocontribution',
+            name='processing_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='audiocontribution',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('processed', 'Processed'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.RunPython(mark_processed, migrations.RunPython.noop),
+    ]
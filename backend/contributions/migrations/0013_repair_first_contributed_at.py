@@ -0,0 +1,31 @@
+# Generated by Django 4.2.21 on 2026-10-18 17:01
+
+from django.db import migrations
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def repair_first_contributed_at(apps, schema_editor):
+    """
+    0008 used to backfill memberships through an auto_now_add field, which
+    stamped them all with the migration time; date them by the user's first
+    contribution to the language instead
+    """
+    Contribution = apps.get_model('contributions', 'Contribution')
+    LanguageContributor = apps.get_model('contributions', 'LanguageContributor')
+
+    first = Contribution.objects.filter(
+        language_id=OuterRef('language_id'), user_id=OuterRef('user_id')
+    ).order_by('created_at').values('created_at')[:1]
+    LanguageContributor.objects.update(first_contributed_at=Coalesce(Subquery(first), F('first_contributed_at')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0012_audio_processing_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(repair_first_contributed_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.21 on 2026-10-18 17:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0013_repair_first_contributed_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='audiocontribution',
+            name='processing_status',
+            field=models.CharField(choices=[('assembling', 'Assembling'), ('pending', 'Pending'), ('processing', 'Processing'), ('processed', 'Processed'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.21 on 2026-10-18 17:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0014_audio_assembling_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contribution',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['reviews_needed', 'created_at'], name='contrib_pending_order_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from uuid import uuid4
@@ -36,7 +37,19 @@ class Contribution(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     validations_count = models.PositiveIntegerField(default=0)
     positive_validations = models.PositiveIntegerField(default=0)
+    # Posterior probability that the contribution is correct, from the
+    # reputation-weighted consensus job; null until it has been scored
+    consensus_score = models.FloatField(null=True, blank=True)
+    # Fewest further reviews that could settle a pending contribution under
+    # its language's thresholds, kept by validations.consensus.apply_verdict
+    reviews_needed = models.PositiveSmallIntegerField(default=3)
     
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            # A new contribution needs the language's minimum number of reviews
+            self.reviews_needed = self.language.consensus_min_reviews
+        super().save(*args, **kwargs)
+        
     def __str__(self):
         return f"{self.get_content_type_display()} by {self.user.username if not self.anonymous else 'Anonymous'}"
         
@@ -49,16 +62,180 @@ class Contribution(models.Model):
         
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination seeks on (created_at, id) within each listing mode
+            models.Index(fields=['-created_at', '-id'], name='contrib_created_id_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='contrib_user_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='contrib_status_created_idx'),
+            # Corpus exports walk validated rows by updated_at watermark
+            models.Index(fields=['status', 'updated_at', 'id'], name='contrib_status_updated_idx'),
+            # Per-language review queue, in the order pending items are served
+            models.Index(
+                fields=['language', 'reviews_needed', 'created_at'],
+                condition=models.Q(status='pending'),
+                name='contrib_pending_queue_idx',
+            ),
+            # The same queue across every language
+            models.Index(
+                fields=['reviews_needed', 'created_at'],
+                condition=models.Q(status='pending'),
+                name='contrib_pending_order_idx',
+            ),
+        ]
 
 class AudioContribution(models.Model):
     """
     Additional information for audio contributions
     """
+    class ProcessingStatus(models.TextChoices):
+        # The upload's chunks are still being moved into audio_file
+        ASSEMBLING = 'assembling', _('Assembling')
+        PENDING = 'pending', _('Pending')
+        PROCESSING = 'processing', _('Processing')
+        PROCESSED = 'processed', _('Processed')
+        FAILED = 'failed', _('Failed')
+
     contribution = models.OneToOneField(Contribution, on_delete=models.CASCADE, related_name='audio')
     audio_file = models.FileField(upload_to='audio_contributions/%Y/%m/')
+    # The recording as uploaded, kept once audio_file points at the transcoded copy
+    original_file = models.FileField(upload_to='audio_contributions/%Y/%m/', blank=True)
     duration = models.FloatField(null=True, blank=True)  # Duration in seconds
     file_size = models.PositiveIntegerField(null=True, blank=True)  # Size in KB
     transcription = models.TextField(blank=True)  # For any auto-generated transcription
+    processing_status = models.CharField(
+        max_length=20, choices=ProcessingStatus.choices, default=ProcessingStatus.PENDING
+    )
+    processing_started_at = models.DateTimeField(null=True, blank=True)
     
     def __str__(self):
         return f"Audio for {self.contribution.id}"
+
+class AudioUpload(models.Model):
+    """
+    An in-progress resumable audio upload.
+
+    Holds the contribution fields until the last chunk arrives and the upload
+    is finalized into a Contribution and AudioContribution.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='audio_uploads')
+    language = models.ForeignKey('languages.Language', on_delete=models.CASCADE, related_name='+')
+    content_type = models.CharField(max_length=20, choices=Contribution.ContentType.choices)
+    original_text = models.TextField()
+    translated_text = models.TextField()
+    context = models.TextField(blank=True)
+    anonymous = models.BooleanField(default=False)
+    filename = models.CharField(max_length=255)
+    upload_length = models.PositiveBigIntegerField()  # Total size in bytes
+    offset = models.PositiveBigIntegerField(default=0)  # Bytes received so far
+    locked_until = models.DateTimeField(null=True, blank=True)  # Guards against concurrent PATCHes
+    contribution = models.OneToOneField(Contribution, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Upload {self.id} ({self.offset}/{self.upload_length} bytes)"
+        
+    @property
+    def is_complete(self):
+        return self.offset >= self.upload_length
+
+class ContributionSignature(models.Model):
+    """
+    MinHash signature of a contribution's text, for near-duplicate detection.
+
+    Contributions whose signatures are similar enough share a `cluster`,
+    which is the smallest member id by string order.
+    """
+    contribution = models.OneToOneField(Contribution, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+    language = models.ForeignKey('languages.Language', on_delete=models.CASCADE, related_name='+')
+    signature = models.BinaryField()
+    cluster = models.UUIDField(null=True, blank=True, db_index=True)
+    
+    def __str__(self):
+        return f"Signature for {self.contribution_id}"
+
+class ContributionBand(models.Model):
+    """
+    One LSH band bucket of a contribution's MinHash signature.
+
+    Contributions that share any (language, band, bucket) are candidate
+    near-duplicates; looking them up is an index probe per band.
+    """
+    contribution = models.ForeignKey(Contribution, on_delete=models.CASCADE, related_name='lsh_bands')
+    language = models.ForeignKey('languages.Language', on_delete=models.CASCADE, related_name='+')
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['language', 'band', 'bucket'], name='contrib_band_bucket_idx'),
+        ]
+
+class DailyContributionStats(models.Model):
+    """
+    Daily rollup of contribution activity per language, type, content type and status
+
+    Every change of state is counted on the day it happens: creating a
+    contribution enters its initial status, a status change leaves one status
+    and enters another, and a deletion leaves the current one. The number of
+    contributions in a status is therefore sum(entered) - sum(left). Maintained
+    incrementally by contributions/rollup.py; rebuild with `build_daily_stats`.
+    """
+    language = models.ForeignKey('languages.Language', on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    type = models.CharField(max_length=10, choices=Contribution.Type.choices)
+    content_type = models.CharField(max_length=20, choices=Contribution.ContentType.choices)
+    status = models.CharField(max_length=20, choices=Contribution.Status.choices)
+    entered_count = models.PositiveIntegerField(default=0)
+    left_count = models.PositiveIntegerField(default=0)
+    # Validations cast that day, filed under the contribution's resulting status
+    validations_count = models.PositiveIntegerField(default=0)
+    positive_validations_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name_plural = 'Daily contribution stats'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['language', 'day', 'type', 'content_type', 'status'],
+                name='daily_stats_unique_key',
+            ),
+        ]
+        
+    def __str__(self):
+        return f"{self.language_id} {self.day} {self.type}/{self.content_type}/{self.status}"
+
+class LanguageContributor(models.Model):
+    """
+    Membership of a user in a language's contributors, created on their first contribution
+
+    Language.contributors_count counts these rows.
+    """
+    language = models.ForeignKey('languages.Language', on_delete=models.CASCADE, related_name='contributor_memberships')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='contributor_memberships')
+    # Not auto_now_add, so backfills can record the first contribution's date
+    first_contributed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['language', 'user'], name='language_contributor_unique'),
+        ]
+        
+    def __str__(self):
+        return f"{self.user_id} contributes to {self.language_id}"
+
+class ContributorSketch(models.Model):
+    """
+    One HyperLogLog register of a language's daily contributor sketch
+
+    Only registers that have been set are stored; see contributions/hll.py.
+    """
+    language = models.ForeignKey('languages.Language', on_delete=models.CASCADE, related_name='contributor_sketches')
+    day = models.DateField()
+    register = models.PositiveSmallIntegerField()
+    rank = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['language', 'day', 'register'], name='contributor_sketch_unique'),
+        ]
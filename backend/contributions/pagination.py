@@ -0,0 +1,188 @@
+import base64
+import binascii
+import json
+import uuid
+from collections import OrderedDict
+from functools import partial
+
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over (created_at, id), newest first.
+
+    Each page is fetched with a `WHERE (created_at, id) < (last_created_at, last_id)`
+    predicate instead of an OFFSET, and no COUNT(*) is run, so page N costs the
+    same as page 1. The next/previous tokens are opaque to clients.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    ordering = ('-created_at', '-id')
+
+    def __init__(self):
+        self.page_size = api_settings.PAGE_SIZE
+        self.next_position = None
+        self.previous_position = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.position, self.reverse = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        if self.reverse:
+            queryset = queryset.order_by('created_at', 'id')
+
+        if self.position is not None:
+            created_at, pk = self.position
+            if self.reverse:
+                queryset = queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                )
+
+        # Fetch one extra row to find out whether there is a following page
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        page = results[:self.page_size]
+
+        if self.reverse:
+            page.reverse()
+            has_next = self.position is not None
+            has_previous = has_more
+        else:
+            has_next = has_more
+            has_previous = self.position is not None
+
+        self.next_position = self._position_for(page[-1]) if has_next and page else None
+        self.previous_position = self._position_for(page[0]) if has_previous and page else None
+        return page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def _position_for(self, instance):
+        # Pages may hold model instances or values() rows
+        if isinstance(instance, dict):
+            return (instance['created_at'], instance['id'])
+        return (instance.created_at, instance.pk)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            created_at = parse_datetime(payload['c'])
+            pk = uuid.UUID(payload['i'])
+            reverse = bool(payload.get('r', False))
+        except (TypeError, ValueError, KeyError, AttributeError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (created_at, pk), reverse
+
+    def encode_cursor(self, position, reverse):
+        created_at, pk = position
+        payload = {'c': created_at.isoformat(), 'i': str(pk)}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+
+class PresetCountPaginator(DjangoPaginator):
+    """
+    Django paginator that trusts an already known row count.
+    """
+    def __init__(self, *args, count=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if count is not None:
+            self.__dict__['count'] = count
+
+
+class CountedPageNumberPagination(PageNumberPagination):
+    """
+    Page-number pagination that reuses the view's `conditional_total`, if set,
+    instead of running its own COUNT(*).
+    """
+    def paginate_queryset(self, queryset, request, view=None):
+        total = getattr(view, 'conditional_total', None)
+        if total is not None:
+            self.django_paginator_class = partial(PresetCountPaginator, count=total)
+        return super().paginate_queryset(queryset, request, view=view)
+
+
+class ContributionPagination(BasePagination):
+    """
+    Page-number pagination by default, keyset pagination on request.
+
+    Clients opt in with `?pagination=cursor` for the first page; the returned
+    next/previous links carry a `cursor` token that keeps them in keyset mode.
+    """
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self.paginator = None
+
+    @classmethod
+    def uses_keyset(cls, request):
+        mode = request.query_params.get(cls.mode_query_param, '')
+        return mode.lower() == 'cursor' or KeysetPagination.cursor_query_param in request.query_params
+
+    def _select(self, request):
+        if self.uses_keyset(request):
+            return KeysetPagination()
+        return CountedPageNumberPagination()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self._select(request)
+        return self.paginator.paginate_queryset(queryset, request, view=view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return PageNumberPagination().get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.paginator.to_html() if self.paginator else ''
+
+    def get_results(self, data):
+        return data['results']
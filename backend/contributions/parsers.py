@@ -0,0 +1,121 @@
+"""
+Incremental parsers for bulk contribution uploads.
+
+Both parsers return generators that read the request stream as they are
+consumed, so a large upload is never buffered whole in the worker.
+"""
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class InvalidItem:
+    """
+    Placeholder yielded for a record that could not be decoded
+    """
+    def __init__(self, message):
+        self.message = message
+
+
+def _encoding(parser_context):
+    return (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+
+
+def iter_json_array(stream, encoding='utf-8', chunk_size=64 * 1024):
+    """
+    Yield the elements of a top-level JSON array one at a time.
+    """
+    decoder = json.JSONDecoder()
+    reader = codecs.getreader(encoding)(stream)
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        data = reader.read(chunk_size)
+        if not data:
+            eof = True
+        buffer = buffer[pos:] + data
+        pos = 0
+
+    def next_token():
+        # Skip whitespace, reading more input as needed; returns '' at EOF
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if eof:
+                return ''
+            fill()
+
+    if next_token() != '[':
+        raise ParseError('Expected a JSON array')
+    pos += 1
+
+    if next_token() == ']':
+        return
+
+    while True:
+        next_token()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except ValueError as exc:
+                if eof:
+                    raise ParseError(f'JSON parse error - {exc}')
+                fill()
+                continue
+            # A value ending exactly at the buffer edge (e.g. a number) may
+            # continue in the next chunk
+            if end == len(buffer) and not eof:
+                fill()
+                continue
+            break
+        pos = end
+        yield item
+
+        token = next_token()
+        if token == ',':
+            pos += 1
+        elif token == ']':
+            return
+        else:
+            raise ParseError('JSON parse error - expected "," or "]" between array items')
+
+
+class StreamingJSONArrayParser(BaseParser):
+    """
+    Parses a JSON array request body into a lazy iterator of its items
+    """
+    media_type = 'application/json'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return iter_json_array(stream, encoding=_encoding(parser_context))
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline-delimited JSON into a lazy iterator of records.
+
+    A malformed line yields an `InvalidItem` instead of aborting the upload.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return self._iter_lines(stream, _encoding(parser_context))
+
+    def _iter_lines(self, stream, encoding):
+        for raw_line in stream:
+            line = raw_line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                yield InvalidItem(f'JSON parse error - {exc}')
@@ -0,0 +1,86 @@
+"""
+Incremental maintenance of the DailyContributionStats rollup.
+
+Like counters.py, changes are first grouped per rollup row and then applied
+as one `UPDATE ... SET col = col + n` per row, creating the row when it does
+not exist yet. Rows are touched in sorted key order so concurrent writers
+take their locks in the same order.
+"""
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DailyContributionStats
+
+
+def rollup_key(contribution, day, status=None):
+    return (
+        contribution.language_id, day, contribution.type,
+        contribution.content_type, status or contribution.status,
+    )
+
+
+def collect_created(contributions, deltas=None):
+    """Group rollup increments for newly created contributions"""
+    if deltas is None:
+        deltas = defaultdict(Counter)
+    for contribution in contributions:
+        day = timezone.localdate(contribution.created_at)
+        deltas[rollup_key(contribution, day)]['entered_count'] += 1
+    return deltas
+
+
+def collect_status_change(contribution, previous_status, deltas=None):
+    """Group rollup increments for a contribution that moved out of `previous_status`"""
+    if deltas is None:
+        deltas = defaultdict(Counter)
+    if previous_status != contribution.status:
+        day = timezone.localdate()
+        deltas[rollup_key(contribution, day, previous_status)]['left_count'] += 1
+        deltas[rollup_key(contribution, day)]['entered_count'] += 1
+    return deltas
+
+
+def collect_validation(contribution, is_valid, deltas=None):
+    """Group rollup increments for one validation of `contribution`"""
+    if deltas is None:
+        deltas = defaultdict(Counter)
+    row = deltas[rollup_key(contribution, timezone.localdate())]
+    row['validations_count'] += 1
+    if is_valid:
+        row['positive_validations_count'] += 1
+    return deltas
+
+
+def collect_deleted(contributions, deltas=None):
+    """Group rollup increments for contributions about to be deleted"""
+    if deltas is None:
+        deltas = defaultdict(Counter)
+    day = timezone.localdate()
+    for contribution in contributions:
+        deltas[rollup_key(contribution, day)]['left_count'] += 1
+    return deltas
+
+
+def apply_rollup_deltas(deltas):
+    """Apply grouped deltas with one F()-based UPDATE (or INSERT) per rollup row"""
+    for key in sorted(deltas):
+        counts = {field: n for field, n in deltas[key].items() if n}
+        if not counts:
+            continue
+        language_id, day, contribution_type, content_type, status = key
+        lookup = {
+            'language_id': language_id, 'day': day, 'type': contribution_type,
+            'content_type': content_type, 'status': status,
+        }
+        changes = {field: F(field) + n for field, n in counts.items()}
+        if DailyContributionStats.objects.filter(**lookup).update(**changes):
+            continue
+        try:
+            with transaction.atomic():
+                DailyContributionStats.objects.create(**lookup, **counts)
+        except IntegrityError:
+            # Another writer created the row first
+            DailyContributionStats.objects.filter(**lookup).update(**changes)
@@ -0,0 +1,71 @@
+"""
+Full-text search over contribution original_text/translated_text.
+
+The index itself lives in the database and is maintained by triggers created
+in migration 0003, so it stays current for every write path (ORM saves,
+bulk_create, raw updates):
+
+* PostgreSQL: a `search_vector` tsvector column with a GIN index.
+* SQLite: an FTS5 shadow table, `contributions_contribution_fts`.
+
+Other backends fall back to the old ICONTAINS scan.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+CONTRIBUTION_TABLE = 'contributions_contribution'
+FTS_TABLE = 'contributions_contribution_fts'
+
+# Kenyan languages have no stemming dictionaries, so index raw tokens
+TEXT_SEARCH_CONFIG = 'simple'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _fts5_query(text):
+    """Quote each token so user input can never be parsed as FTS5 syntax"""
+    return ' '.join('"%s"' % token for token in _TOKEN_RE.findall(text))
+
+
+def search_contributions(queryset, text):
+    """
+    Filter a Contribution queryset to rows matching `text`, best matches first.
+
+    The relevance score is exposed as the `search_rank` attribute.
+    """
+    text = (text or '').strip()
+    if not text:
+        return queryset
+
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        tsquery = "websearch_to_tsquery('%s', %%s)" % TEXT_SEARCH_CONFIG
+        return queryset.extra(
+            select={'search_rank': f'ts_rank_cd("{CONTRIBUTION_TABLE}"."search_vector", {tsquery})'},
+            select_params=[text],
+            where=[f'"{CONTRIBUTION_TABLE}"."search_vector" @@ {tsquery}'],
+            params=[text],
+            order_by=['-search_rank', '-created_at'],
+        )
+
+    if vendor == 'sqlite':
+        match = _fts5_query(text)
+        if not match:
+            return queryset.none()
+        # FTS5's rank is bm25(), where lower means more relevant
+        return queryset.extra(
+            select={'search_rank': f'"{FTS_TABLE}".rank'},
+            tables=[FTS_TABLE],
+            where=[
+                f'"{FTS_TABLE}".contribution_id = "{CONTRIBUTION_TABLE}"."id"',
+                f'"{FTS_TABLE}" MATCH %s',
+            ],
+            params=[match],
+            order_by=['search_rank', '-created_at'],
+        )
+
+    return queryset.filter(
+        Q(original_text__icontains=text) | Q(translated_text__icontains=text)
+    )
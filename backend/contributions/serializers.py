@@ -1,21 +1,37 @@
+import math
+
+from django.db.models import F
 from rest_framework import serializers
-from .models import Contribution, AudioContribution
-from languages.serializers import LanguageListSerializer
+from django.conf import settings
+from .models import Contribution, AudioContribution, AudioUpload
+from .streaming import sign_audio_url
+from languages.models import Language
+from languages.registry import language_registry
+from languages.serializers import RegisteredLanguageField
 
 class AudioContributionSerializer(serializers.ModelSerializer):
     """
     Serializer for audio contribution details
     """
+    stream_url = serializers.SerializerMethodField()
+    
     class Meta:
         model = AudioContribution
-        fields = ['audio_file', 'duration', 'file_size', 'transcription']
+        fields = ['audio_file', 'stream_url', 'duration', 'file_size', 'transcription']
         read_only_fields = ['duration', 'file_size']
+        
+    def get_stream_url(self, obj):
+        # Signed so that <audio> elements can play it without auth headers
+        request = self.context.get('request')
+        if request is None:
+            return None
+        return sign_audio_url(request, obj.contribution_id)
 
 class ContributionListSerializer(serializers.ModelSerializer):
     """
     Serializer for listing contributions
     """
-    language_name = serializers.ReadOnlyField(source='language.name')
+    language_name = serializers.SerializerMethodField()
     username = serializers.ReadOnlyField(source='user.username')
     
     class Meta:
@@ -26,12 +42,52 @@ class ContributionListSerializer(serializers.ModelSerializer):
             'validations_count', 'positive_validations'
         ]
         read_only_fields = fields
+        
+    def get_language_name(self, obj):
+        return language_registry.name_for(obj.language_id)
+
+class ContributionRowSerializer(serializers.BaseSerializer):
+    """
+    Read-only fast path for listing contributions
+
+    Serializes rows from `ContributionRowSerializer.values(queryset)` into the
+    same output as ContributionListSerializer, without per-field
+    ModelSerializer overhead or model instantiation.
+    """
+    value_fields = [
+        'id', 'type', 'content_type', 'language_id', 'original_text', 'translated_text',
+        'status', 'created_at', 'validations_count', 'positive_validations'
+    ]
+    # Language names come from the language registry, so only users are joined
+    value_expressions = {
+        'username': F('user__username'),
+    }
+    datetime_field = serializers.DateTimeField()
+    
+    @classmethod
+    def values(cls, queryset):
+        return queryset.values(*cls.value_fields, **cls.value_expressions)
+        
+    def to_representation(self, row):
+        return {
+            'id': str(row['id']),
+            'type': row['type'],
+            'content_type': row['content_type'],
+            'language_name': language_registry.name_for(row['language_id']),
+            'username': row['username'],
+            'original_text': row['original_text'],
+            'translated_text': row['translated_text'],
+            'status': row['status'],
+            'created_at': self.datetime_field.to_representation(row['created_at']),
+            'validations_count': row['validations_count'],
+            'positive_validations': row['positive_validations'],
+        }
 
 class ContributionDetailSerializer(serializers.ModelSerializer):
     """
     Serializer for contribution details
     """
-    language = LanguageListSerializer(read_only=True)
+    language = RegisteredLanguageField()
     username = serializers.ReadOnlyField(source='user.username')
     audio = AudioContributionSerializer(read_only=True)
     
@@ -64,6 +120,27 @@ class TextContributionCreateSerializer(serializers.ModelSerializer):
         validated_data['type'] = 'text'
         return super().create(validated_data)
 
+class PreloadedLanguageField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves language ids against a {id: Language} map in the serializer
+    context instead of issuing one query per item
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.context['languages'][int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+class BulkTextContributionSerializer(TextContributionCreateSerializer):
+    """
+    Validates one item of a bulk text upload without touching the database
+    """
+    language = PreloadedLanguageField(queryset=Language.objects.all())
+
 class AudioContributionCreateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating audio contributions
@@ -87,10 +164,33 @@ class AudioContributionCreateSerializer(serializers.ModelSerializer):
         # Create the contribution
         contribution = Contribution.objects.create(**validated_data)
         
-        # Create the audio contribution
+        # Create the audio contribution; duration is filled in by the
+        # background processing pipeline
         AudioContribution.objects.create(
             contribution=contribution,
-            audio_file=audio_file
+            audio_file=audio_file,
+            file_size=math.ceil(audio_file.size / 1024) if audio_file.size else None
         )
         
-        return contribution
\ No newline at end of file
+        return contribution
+
+class AudioUploadSerializer(serializers.ModelSerializer):
+    """
+    Serializer for starting and inspecting resumable audio uploads
+    """
+    class Meta:
+        model = AudioUpload
+        fields = [
+            'id', 'language', 'content_type', 'original_text', 'translated_text',
+            'context', 'anonymous', 'filename', 'upload_length', 'offset',
+            'contribution', 'created_at'
+        ]
+        read_only_fields = ['id', 'offset', 'contribution', 'created_at']
+        
+    def validate_upload_length(self, value):
+        max_size = getattr(settings, 'AUDIO_UPLOAD_MAX_SIZE', 50 * 1024 * 1024)
+        if value <= 0:
+            raise serializers.ValidationError('Must be greater than zero')
+        if value > max_size:
+            raise serializers.ValidationError(f'Uploads are limited to {max_size} bytes')
+        return value
@@ -0,0 +1,171 @@
+"""
+Efficient delivery of contribution audio.
+
+Supports conditional requests (ETag / Last-Modified) and single byte-range
+requests so players can seek without re-downloading. When a front proxy is
+configured (AUDIO_SENDFILE_HEADER), Django only authorizes the request and
+hands the transfer to nginx (X-Accel-Redirect) or Apache/lighttpd
+(X-Sendfile), so no Python worker is held for the length of the download.
+Both need the file on a local disk the proxy can read; files on other
+backends, such as S3, are always streamed.
+"""
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from django.urls import reverse
+
+BLOCK_SIZE = 64 * 1024
+SIGNING_SALT = 'contributions.audio-stream'
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def sign_audio_url(request, contribution_id):
+    """
+    Absolute stream URL carrying a short-lived signature, for <audio> tags
+    that cannot send an Authorization header
+    """
+    token = signing.TimestampSigner(salt=SIGNING_SALT).sign(str(contribution_id))
+    url = reverse('contribution_audio', kwargs={'pk': contribution_id})
+    return request.build_absolute_uri(f'{url}?sig={token}')
+
+
+def check_audio_signature(token, contribution_id):
+    max_age = getattr(settings, 'AUDIO_URL_MAX_AGE', 3600)
+    try:
+        value = signing.TimestampSigner(salt=SIGNING_SALT).unsign(token, max_age=max_age)
+    except signing.BadSignature:
+        return False
+    return value == str(contribution_id)
+
+
+def parse_range(header, size):
+    """
+    Parse a single `bytes=` range into an inclusive (start, end) pair.
+
+    Returns None when the header should be ignored (absent, malformed or a
+    multi-range request), or 'unsatisfiable' for a range outside the file.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0:
+            return 'unsatisfiable'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return 'unsatisfiable'
+    return start, end
+
+
+def _iter_range(fileobj, start, length):
+    try:
+        fileobj.seek(start)
+        remaining = length
+        while remaining > 0:
+            block = fileobj.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+    finally:
+        fileobj.close()
+
+
+def _local_path(storage, name):
+    try:
+        return storage.path(name)
+    except NotImplementedError:
+        return None
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or etag in etags
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since') or '')
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+def serve_audio(request, field_file):
+    """Build the response for streaming `field_file` to the client"""
+    storage = field_file.storage
+    name = field_file.name
+    size = storage.size(name)
+    last_modified = int(storage.get_modified_time(name).timestamp())
+    etag = quote_etag(f'{size:x}-{last_modified:x}')
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': 'private, max-age=3600',
+    }
+
+    if _not_modified(request, etag, last_modified):
+        response = HttpResponseNotModified()
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    sendfile_header = getattr(settings, 'AUDIO_SENDFILE_HEADER', None)
+    path = _local_path(storage, name) if sendfile_header else None
+    if path is not None:
+        # The proxy handles Range and If-Range itself
+        response = HttpResponse(content_type=content_type)
+        if sendfile_header.lower() == 'x-accel-redirect':
+            # nginx decodes the URI before matching the internal location
+            prefix = getattr(settings, 'AUDIO_SENDFILE_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(name)
+        else:
+            response['X-Sendfile'] = path
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if byte_range is not None and if_range:
+        # Only honour the range if the client's copy is still current
+        if if_range.startswith(('"', 'W/')):
+            if if_range != etag:
+                byte_range = None
+        elif parse_http_date_safe(if_range) != last_modified:
+            byte_range = None
+
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    fileobj = storage.open(name, 'rb')
+    if byte_range is None:
+        response = FileResponse(fileobj, content_type=content_type)
+        response['Content-Length'] = str(size)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _iter_range(fileobj, start, length), status=206, content_type=content_type
+        )
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    for key, value in headers.items():
+        response[key] = value
+    return response
@@ -0,0 +1,265 @@
+"""
+Background tasks for contributions.
+
+The `enqueue_*` functions are called once the creating transaction commits.
+With CELERY_BROKER_URL set, the work is sent to Celery. Otherwise it runs on
+a pool of BACKGROUND_TASK_WORKERS local threads inside the web process, and
+audio decoding is offloaded to a process pool. Either way the request never
+waits for the work.
+
+Assembling a finalized upload is retried AUDIO_ASSEMBLY_RETRIES times, by
+Celery or by a local timer, before its audio is marked FAILED; the received
+bytes are kept until expire_audio_uploads purges them.
+"""
+import logging
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .audio import transcode_audio
+from .duplicates import index_contribution_ids
+from .models import AudioContribution, AudioUpload, Contribution
+from .uploads import assemble
+
+logger = logging.getLogger(__name__)
+
+_executor_lock = threading.Lock()
+_local_executor = None
+_process_pool = None
+
+
+def _audio_settings():
+    return {
+        'output_format': getattr(settings, 'AUDIO_OUTPUT_FORMAT', 'mp3'),
+        'sample_rate': getattr(settings, 'AUDIO_OUTPUT_SAMPLE_RATE', 16000),
+        'channels': getattr(settings, 'AUDIO_OUTPUT_CHANNELS', 1),
+    }
+
+
+def _size_in_kb(num_bytes):
+    return math.ceil(num_bytes / 1024)
+
+
+def get_processing_timeout():
+    return getattr(settings, 'AUDIO_PROCESSING_TIMEOUT', 600)
+
+
+def get_assembly_retries():
+    return getattr(settings, 'AUDIO_ASSEMBLY_RETRIES', 3)
+
+
+def get_assembly_retry_delay():
+    return getattr(settings, 'AUDIO_ASSEMBLY_RETRY_DELAY', 30)
+
+
+def run_upload_assembly(upload_id):
+    """
+    Move the bytes of a finalized upload into its audio file, then schedule
+    processing. Does nothing once the audio has left the ASSEMBLING state, so
+    retries and duplicate runs are harmless.
+    """
+    upload = AudioUpload.objects.filter(pk=upload_id, contribution__isnull=False).first()
+    if upload is None:
+        return
+    audio = AudioContribution.objects.filter(
+        contribution_id=upload.contribution_id, processing_status=AudioContribution.ProcessingStatus.ASSEMBLING
+    ).first()
+    if audio is None:
+        return
+
+    stored_name = assemble(upload, audio.audio_file.name)
+    AudioContribution.objects.filter(pk=audio.pk).update(
+        audio_file=stored_name, processing_status=AudioContribution.ProcessingStatus.PENDING
+    )
+    enqueue_audio_processing(audio.pk)
+
+
+def fail_upload_assembly(upload_id):
+    """Give up on assembling an upload and mark its audio FAILED"""
+    logger.error('Giving up on assembling AudioUpload %s', upload_id)
+    contribution_id = AudioUpload.objects.filter(pk=upload_id).values_list('contribution_id', flat=True).first()
+    AudioContribution.objects.filter(
+        contribution_id=contribution_id, processing_status=AudioContribution.ProcessingStatus.ASSEMBLING
+    ).update(processing_status=AudioContribution.ProcessingStatus.FAILED)
+
+
+def claim_audio(audio_id):
+    """
+    Mark an AudioContribution as being processed and return it, or return
+    None when it is gone, already processed, or claimed by another run less
+    than AUDIO_PROCESSING_TIMEOUT seconds ago
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        audio = AudioContribution.objects.select_for_update().filter(pk=audio_id).first()
+        if audio is None or audio.processing_status in (
+            AudioContribution.ProcessingStatus.ASSEMBLING, AudioContribution.ProcessingStatus.PROCESSED
+        ):
+            return None
+        if (audio.processing_status == AudioContribution.ProcessingStatus.PROCESSING
+                and audio.processing_started_at > now - timedelta(seconds=get_processing_timeout())):
+            return None
+        AudioContribution.objects.filter(pk=audio_id).update(
+            processing_status=AudioContribution.ProcessingStatus.PROCESSING, processing_started_at=now
+        )
+    return audio
+
+
+def run_audio_processing(audio_id, pool=None):
+    """
+    Probe, normalize and transcode one AudioContribution, then record its
+    duration and file size.
+
+    Runs at most once per row at a time: duplicate or concurrent calls find
+    the row claimed and return. The uploaded recording is kept as
+    original_file unless AUDIO_KEEP_ORIGINALS is turned off.
+    """
+    audio = claim_audio(audio_id)
+    if audio is None:
+        return
+
+    original_name = audio.audio_file.name
+    with audio.audio_file.open('rb') as source:
+        data = source.read()
+
+    options = _audio_settings()
+    try:
+        if pool is not None:
+            encoded, duration = pool.submit(transcode_audio, data, **options).result()
+        else:
+            encoded, duration = transcode_audio(data, **options)
+    except Exception:
+        logger.exception('Could not decode audio for AudioContribution %s', audio_id)
+        AudioContribution.objects.filter(pk=audio_id).update(
+            file_size=_size_in_kb(len(data)), processing_status=AudioContribution.ProcessingStatus.FAILED
+        )
+        return
+
+    base_name = os.path.splitext(os.path.basename(original_name))[0]
+    new_name = audio.audio_file.field.generate_filename(audio, f"{base_name}.{options['output_format']}")
+    storage = audio.audio_file.storage
+    new_name = storage.save(new_name, ContentFile(encoded))
+
+    keep_original = getattr(settings, 'AUDIO_KEEP_ORIGINALS', True)
+    AudioContribution.objects.filter(pk=audio_id).update(
+        audio_file=new_name,
+        original_file=original_name if keep_original else '',
+        duration=duration,
+        file_size=_size_in_kb(len(encoded)),
+        processing_status=AudioContribution.ProcessingStatus.PROCESSED,
+    )
+    # Invalidate conditional GETs of the contribution detail
+    Contribution.objects.filter(pk=audio.contribution_id).update(updated_at=timezone.now())
+    if not keep_original and new_name != original_name:
+        storage.delete(original_name)
+
+
+@shared_task(ignore_result=True)
+def process_audio_file(audio_id):
+    """Celery entry point; runs the pipeline inline in the worker"""
+    run_audio_processing(audio_id)
+
+
+@shared_task(bind=True, ignore_result=True)
+def assemble_audio_upload(self, upload_id):
+    """Celery entry point; retried with a growing delay before giving up"""
+    try:
+        run_upload_assembly(upload_id)
+    except Exception as exc:
+        if self.request.retries >= get_assembly_retries():
+            fail_upload_assembly(upload_id)
+            return
+        raise self.retry(
+            exc=exc, countdown=get_assembly_retry_delay() * 2 ** self.request.retries,
+            max_retries=get_assembly_retries()
+        )
+
+
+@shared_task(ignore_result=True)
+def index_duplicates(contribution_ids):
+    """Add contributions to the near-duplicate index"""
+    index_contribution_ids(contribution_ids)
+
+
+def _get_local_executor():
+    global _local_executor
+    with _executor_lock:
+        if _local_executor is None:
+            _local_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BACKGROUND_TASK_WORKERS', 4), thread_name_prefix='contributions'
+            )
+    return _local_executor
+
+
+def _get_process_pool():
+    global _process_pool
+    with _executor_lock:
+        if _process_pool is None:
+            # Spawned children only import contributions.audio, never Django
+            _process_pool = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'AUDIO_PROCESSING_WORKERS', 2),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+    return _process_pool
+
+
+def _run_locally(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Background task %s failed', func.__name__)
+    finally:
+        connections.close_all()
+
+
+def _dispatch(task, *args, local=None):
+    """Send `task` to Celery when a broker is configured, else run it locally"""
+    if getattr(settings, 'CELERY_BROKER_URL', None):
+        task.delay(*args)
+        return
+    _get_local_executor().submit(_run_locally, local or task, *args)
+
+
+def _process_audio_locally(audio_id):
+    run_audio_processing(audio_id, pool=_get_process_pool())
+
+
+def _assemble_locally(upload_id, attempt=0):
+    try:
+        run_upload_assembly(upload_id)
+    except Exception:
+        if attempt >= get_assembly_retries():
+            logger.exception('Could not assemble AudioUpload %s', upload_id)
+            fail_upload_assembly(upload_id)
+            return
+        logger.warning('Could not assemble AudioUpload %s, retrying', upload_id, exc_info=True)
+        retry = threading.Timer(
+            get_assembly_retry_delay() * 2 ** attempt,
+            lambda: _get_local_executor().submit(_run_locally, _assemble_locally, upload_id, attempt + 1),
+        )
+        retry.daemon = True
+        retry.start()
+
+
+def enqueue_upload_assembly(upload_id):
+    """Schedule moving a finalized upload's bytes into its audio file"""
+    _dispatch(assemble_audio_upload, str(upload_id), local=_assemble_locally)
+
+
+def enqueue_audio_processing(audio_id):
+    """Schedule probing, normalizing and transcoding of an upload"""
+    _dispatch(process_audio_file, audio_id, local=_process_audio_locally)
+
+
+def enqueue_duplicate_indexing(contribution_ids):
+    """Schedule near-duplicate indexing, for batches too big to do inline"""
+    _dispatch(index_duplicates, [str(pk) for pk in contribution_ids])
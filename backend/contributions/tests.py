@@ -1,3 +1,1032 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import wave
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import connection, transaction
+from django.core.management import call_command
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from languages.models import Language
+from languages.registry import language_registry
+from .duplicates import cluster_language, find_duplicates, index_contributions
+from .export import export_queryset, iter_rows
+from .lifecycle import contributions_created
+from .models import (
+    AudioContribution, AudioUpload, Contribution, ContributionSignature, DailyContributionStats, LanguageContributor
+)
+from .rollup import apply_rollup_deltas, collect_status_change
+from .serializers import ContributionListSerializer, ContributionRowSerializer
+from .streaming import serve_audio
+from .tasks import _assemble_locally, get_assembly_retries, run_audio_processing, run_upload_assembly
+from .uploads import discard
+
+
+class ContributionReadPathTests(TestCase):
+    """
+    Query budgets for the contribution list and detail endpoints
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='pass')
+            for i in range(4)
+        ]
+        cls.languages = [
+            Language.objects.create(name=f'Language {i}', code=f'l{i}', category='bantu')
+            for i in range(3)
+        ]
+        for i in range(25):
+            Contribution.objects.create(
+                user=cls.users[i % 4],
+                language=cls.languages[i % 3],
+                type='text',
+                content_type='sentence',
+                original_text=f'Sentence number {i}',
+                translated_text=f'Sentensi nambari {i}',
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        # Warm the language registry, as in a long-running process
+        language_registry.invalidate()
+        language_registry.snapshot()
+        language_registry.counters()
+
+    def test_list_page_costs_count_plus_one_query(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('contribution_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_cursor_page_costs_one_query(self):
+        # No aggregate: the ETag is taken from the page itself
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('contribution_list'), {'pagination': 'cursor'})
+        self.assertEqual(len(response.data['results']), 20)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_cursor_page_revalidates_against_its_rows(self):
+        url = reverse('contribution_list')
+        etag = self.client.get(url, {'pagination': 'cursor'})['ETag']
+        response = self.client.get(url, {'pagination': 'cursor'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        newest = Contribution.objects.order_by('-created_at', '-id').first()
+        Contribution.objects.filter(pk=newest.pk).update(validations_count=2, updated_at=timezone.now())
+        response = self.client.get(url, {'pagination': 'cursor'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_search_page_stays_within_budget(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('contribution_list'), {'q': 'nambari'})
+        self.assertEqual(response.data['count'], 25)
+
+    def test_detail_costs_one_query(self):
+        contribution = Contribution.objects.first()
+        self.client.force_authenticate(self.users[0])
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('contribution_detail', kwargs={'pk': contribution.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['language']['code'], contribution.language.code)
+
+    def test_row_serializer_matches_model_serializer(self):
+        contribution = Contribution.objects.first()
+        row = ContributionRowSerializer.values(Contribution.objects.filter(pk=contribution.pk)).get()
+        self.assertEqual(
+            ContributionRowSerializer(row).data,
+            dict(ContributionListSerializer(contribution).data)
+        )
+
+    def test_unchanged_list_returns_not_modified(self):
+        url = reverse('contribution_list')
+        params = {'language_code': self.languages[0].code}
+        etag = self.client.get(url, params)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(url, {'language_code': self.languages[1].code}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        # Changes to other languages leave the filtered list's ETag alone
+        other = Contribution.objects.filter(language=self.languages[1]).first()
+        other.status = 'validated'
+        other.save()
+        self.assertEqual(self.client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_changed_list_invalidates_etag(self):
+        url = reverse('contribution_list')
+        params = {'language_code': self.languages[0].code}
+        etag = self.client.get(url, params)['ETag']
+
+        Contribution.objects.create(
+            user=self.users[0], language=self.languages[0], type='text', content_type='sentence',
+            original_text='Sentensi mpya', translated_text='A new sentence',
+        )
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 10)
+        etag = response['ETag']
+
+        contribution = Contribution.objects.filter(language=self.languages[0]).first()
+        contribution.status = 'rejected'
+        contribution.save()
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_changed_detail_invalidates_etag(self):
+        contribution = Contribution.objects.first()
+        url = reverse('contribution_detail', kwargs={'pk': contribution.pk})
+        self.client.force_authenticate(self.users[0])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        contribution.translated_text = 'Sentensi mpya'
+        contribution.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ContributionSearchTests(TestCase):
+    """
+    Ranked full-text search through ?q= and the triggers that keep its index current
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='searcher', email='searcher@example.com', password='pass')
+        cls.language = Language.objects.create(name='Swahili', code='sw', category='bantu')
+        cls.strong = cls.create('maji maji maji', 'water water water')
+        cls.weak = cls.create('Nataka maji ya kunywa leo asubuhi', 'I want water to drink this morning')
+        cls.other = cls.create('Habari ya asubuhi', 'Good morning')
+
+    @classmethod
+    def create(cls, original_text, translated_text):
+        return Contribution.objects.create(
+            user=cls.user, language=cls.language, type='text', content_type='sentence',
+            original_text=original_text, translated_text=translated_text,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        language_registry.invalidate()
+        language_registry.snapshot()
+
+    def search(self, text):
+        response = self.client.get(reverse('contribution_list'), {'q': text})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_matches_in_rank_order(self):
+        self.assertEqual(self.search('maji'), [str(self.strong.pk), str(self.weak.pk)])
+        self.assertEqual(self.search('morning'), [str(self.other.pk), str(self.weak.pk)])
+
+    def test_no_match_returns_nothing(self):
+        self.assertEqual(self.search('nyumba'), [])
+        # Punctuation alone leaves no tokens to look for
+        self.assertEqual(self.search('"*'), [])
+
+    def test_saved_text_is_reindexed(self):
+        self.other.original_text = 'Nyumba yangu'
+        self.other.save()
+        self.assertEqual(self.search('nyumba'), [str(self.other.pk)])
+        self.assertEqual(self.search('habari'), [])
+
+    def test_updated_text_is_reindexed(self):
+        Contribution.objects.filter(pk=self.strong.pk).update(original_text='Chai', translated_text='Tea')
+        self.assertEqual(self.search('maji'), [str(self.weak.pk)])
+        self.assertEqual(self.search('chai'), [str(self.strong.pk)])
+
+    def test_deleted_rows_leave_the_index(self):
+        self.weak.delete()
+        self.assertEqual(self.search('maji'), [str(self.strong.pk)])
+        self.assertEqual(self.search('kunywa'), [])
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    Cursor pages of the contribution list
+    """
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='kamau', email='kamau@example.com', password='pass')
+        language = Language.objects.create(name='Kikuyu', code='ki', category='bantu')
+        Contribution.objects.bulk_create([
+            Contribution(
+                user=user, language=language, type='text', content_type='word',
+                original_text=f'Word {i}', translated_text=f'Kiugo {i}',
+            )
+            for i in range(45)
+        ])
+        # Groups of rows share a created_at, so pages must break ties on id
+        base = timezone.now()
+        for i, contribution in enumerate(Contribution.objects.order_by('pk')):
+            Contribution.objects.filter(pk=contribution.pk).update(created_at=base - timedelta(seconds=i // 7))
+
+    def setUp(self):
+        self.client = APIClient()
+        language_registry.invalidate()
+        language_registry.snapshot()
+
+    def walk(self, response, link):
+        pages = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['results']])
+            if not response.data[link]:
+                return pages
+            response = self.client.get(response.data[link])
+
+    def test_cursor_round_trip(self):
+        expected = [str(pk) for pk in Contribution.objects.order_by('-created_at', '-id').values_list('pk', flat=True)]
+        first = self.client.get(reverse('contribution_list'), {'pagination': 'cursor'})
+        forward = self.walk(first, 'next')
+        self.assertEqual([pk for page in forward for pk in page], expected)
+        self.assertEqual([len(page) for page in forward], [20, 20, 5])
+
+        last = self.client.get(reverse('contribution_list'), {'pagination': 'cursor'})
+        for _ in range(2):
+            last = self.client.get(last.data['next'])
+        backward = self.walk(last, 'previous')
+        self.assertEqual(backward, forward[::-1])
+
+    def test_tampered_cursor_is_not_found(self):
+        created_at = timezone.now().isoformat()
+        payloads = [
+            {'c': created_at, 'i': 'not-a-uuid'},
+            {'c': created_at, 'i': 12},
+            {'c': 'yesterday', 'i': str(Contribution.objects.first().pk)},
+            {'i': str(Contribution.objects.first().pk)},
+            ['c', 'i'],
+        ]
+        cursors = [base64.urlsafe_b64encode(json.dumps(payload).encode()).decode() for payload in payloads]
+        for cursor in cursors + ['%%%', 'bm90IGpzb24=']:
+            response = self.client.get(reverse('contribution_list'), {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+
+class BulkTextContributionTests(TestCase):
+    """
+    Bulk text uploads through /api/contributions/text/bulk/
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='achieng', email='achieng@example.com', password='pass')
+        cls.language = Language.objects.create(name='Luo', code='luo', category='nilotic')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('text_contribution_bulk_create')
+
+    def item(self, i, **overrides):
+        item = {
+            'language': self.language.pk, 'content_type': 'sentence',
+            'original_text': f'Sentence {i}', 'translated_text': f'Wach {i}',
+        }
+        item.update(overrides)
+        return item
+
+    def test_partial_failure_is_reported_per_item(self):
+        items = [self.item(0), self.item(1, language=999), 'not an object', self.item(3, content_type='word')]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 2))
+        self.assertEqual(
+            [result['status'] for result in response.data['results']], ['created', 'error', 'error', 'created']
+        )
+        self.assertIn('language', response.data['results'][1]['errors'])
+
+        # The shared bookkeeping ran once for the created rows
+        self.language.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual((self.language.sentences_count, self.language.words_count), (1, 1))
+        self.assertEqual(self.language.contributors_count, 1)
+        self.assertEqual(self.user.total_contributions, 2)
+        self.assertTrue(LanguageContributor.objects.filter(language=self.language, user=self.user).exists())
+        self.assertEqual(ContributionSignature.objects.count(), 2)
+
+    def test_ndjson_with_a_malformed_line(self):
+        body = '\n'.join([json.dumps(self.item(0)), '{not json', json.dumps(self.item(2))])
+        response = self.client.generic('POST', self.url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']], ['created', 'error', 'created']
+        )
+
+    def test_nothing_created_is_a_bad_request(self):
+        response = self.client.post(self.url, [self.item(0, original_text='')], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], 0)
+
+    @override_settings(CONTRIBUTION_BULK_MAX_ITEMS=2)
+    def test_row_limit(self):
+        response = self.client.post(self.url, [self.item(i) for i in range(3)], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Contribution.objects.exists())
+        self.assertEqual(self.client.post(self.url, [self.item(i) for i in range(2)], format='json').status_code, 201)
+
+
+class ContributionExportTests(TestCase):
+    """
+    Streamed corpus exports from /api/contributions/export/ and export_corpus
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='wambui', email='wambui@example.com', password='pass')
+        cls.swahili = Language.objects.create(name='Swahili', code='sw', category='bantu')
+        cls.luo = Language.objects.create(name='Luo', code='luo', category='nilotic')
+        cls.base = timezone.now() - timedelta(days=1)
+        texts = [
+            (cls.swahili, 'sentence', 'Habari, "rafiki"', 'Hello, "friend"\nagain'),
+            (cls.swahili, 'word', 'Tab\there', 'Maji ya ndizi'),
+            (cls.luo, 'sentence', 'Oyawore', 'Good morning'),
+            (cls.swahili, 'sentence', 'Bado', 'Not yet'),
+        ]
+        cls.contributions = []
+        for i, (language, content_type, original_text, translated_text) in enumerate(texts):
+            contribution = Contribution.objects.create(
+                user=cls.user, language=language, type='text', content_type=content_type,
+                original_text=original_text, translated_text=translated_text,
+            )
+            # The last one is still pending and never exported
+            Contribution.objects.filter(pk=contribution.pk).update(
+                status='validated' if i < 3 else 'pending', updated_at=cls.base + timedelta(minutes=i)
+            )
+            cls.contributions.append(contribution)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        language_registry.invalidate()
+        language_registry.snapshot()
+
+    def export(self, **params):
+        response = self.client.get(reverse('contribution_export'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv_has_a_header_and_escapes_fields(self):
+        response, body = self.export(output='csv')
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0], ['id', 'language', 'content_type', 'original_text',
+                                   'translated_text', 'context', 'audio_path'])
+        self.assertEqual(rows[1][1:5], ['sw', 'sentence', 'Habari, "rafiki"', 'Hello, "friend"\nagain'])
+        self.assertEqual([row[0] for row in rows[1:]], [str(c.pk) for c in self.contributions[:3]])
+        self.assertEqual(response['X-Export-Watermark'], (self.base + timedelta(minutes=2)).isoformat())
+
+    def test_tsv_keeps_tabs_inside_fields(self):
+        _, body = self.export(output='tsv', content_type='word')
+        rows = list(csv.reader(io.StringIO(body), delimiter='\t'))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][3], 'Tab\there')
+
+    def test_ndjson_filters_and_watermark(self):
+        _, body = self.export(language='sw')
+        lines = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([line['original_text'] for line in lines], ['Habari, "rafiki"', 'Tab\there'])
+
+        since = (self.base + timedelta(minutes=1)).isoformat()
+        _, body = self.export(since=since)
+        self.assertEqual([json.loads(line)['language'] for line in body.splitlines()], ['luo'])
+
+        response, body = self.export(since=(self.base + timedelta(minutes=2)).isoformat())
+        self.assertEqual(body, '')
+        self.assertNotIn('X-Export-Watermark', response)
+        self.assertEqual(self.client.get(reverse('contribution_export'), {'since': 'soon'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('contribution_export'), {'output': 'xml'}).status_code, 400)
+
+    def test_recent_rows_wait_for_the_next_export(self):
+        # Still inside the lag: its transaction may not have committed everywhere
+        recent = self.contributions[3]
+        Contribution.objects.filter(pk=recent.pk).update(status='validated', updated_at=timezone.now())
+        response, body = self.export()
+        self.assertNotIn(str(recent.pk), body)
+        watermark = response['X-Export-Watermark']
+        self.assertEqual(watermark, (self.base + timedelta(minutes=2)).isoformat())
+
+        with self.settings(EXPORT_WATERMARK_LAG=0):
+            response, body = self.export(since=watermark)
+        self.assertEqual([json.loads(line)['id'] for line in body.splitlines()], [str(recent.pk)])
+
+    def test_rows_are_read_in_chunks_in_watermark_order(self):
+        rows = list(iter_rows(export_queryset(), chunk_size=2))
+        self.assertEqual([row[0] for row in rows], [str(c.pk) for c in self.contributions[:3]])
+
+    def test_management_command(self):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('export_corpus', format='ndjson', language='luo', stdout=stdout, stderr=stderr)
+        self.assertEqual([json.loads(line)['original_text'] for line in stdout.getvalue().splitlines()], ['Oyawore'])
+        self.assertIn('Export watermark', stderr.getvalue())
+
+
+class ResumableAudioUploadTests(TestCase):
+    """
+    tus-style uploads through /api/contributions/audio/uploads/
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='akinyi', email='akinyi@example.com', password='pass')
+        cls.language = Language.objects.create(name='Luo', code='luo', category='nilotic')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        # Assembly is run by hand below; transcoding is covered by AudioProcessingTests
+        for target, attr in (('contributions.views.enqueue_upload_assembly', 'enqueued'),
+                             ('contributions.tasks.enqueue_audio_processing', 'processing')):
+            patcher = mock.patch(target)
+            setattr(self, attr, patcher.start())
+            self.addCleanup(patcher.stop)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse('audio_upload_create'), {
+            'language': self.language.pk, 'content_type': 'sentence', 'original_text': 'Oyawore',
+            'translated_text': 'Good morning', 'filename': 'greeting.wav', 'upload_length': 10,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.upload = AudioUpload.objects.get(pk=response.data['id'])
+        self.url = reverse('audio_upload_detail', args=[self.upload.pk])
+        self.finalize_url = reverse('audio_upload_finalize', args=[self.upload.pk])
+
+    def send(self, data, offset):
+        return self.client.generic(
+            'PATCH', self.url, data, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def test_resume_from_reported_offset(self):
+        self.assertEqual(self.send(b'0123', 0).status_code, 204)
+        response = self.client.get(self.url)
+        self.assertEqual(response['Upload-Offset'], '4')
+        self.assertEqual(response['Upload-Length'], '10')
+
+        response = self.send(b'456789', int(response['Upload-Offset']))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response['Upload-Offset'], '10')
+
+    def test_offset_mismatch_and_missing_length_are_rejected(self):
+        self.send(b'0123', 0)
+        response = self.send(b'0123', 0)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '4')
+
+        self.assertEqual(self.send(b'', 4).status_code, 411)
+        self.assertEqual(self.send(b'45678901', 4).status_code, 400)
+        self.upload.refresh_from_db()
+        self.assertEqual(self.upload.offset, 4)
+
+    def test_incomplete_upload_cannot_be_finalized(self):
+        self.send(b'0123', 0)
+        response = self.client.post(self.finalize_url)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Contribution.objects.exists())
+
+    def finalize(self):
+        self.send(b'0123456789', 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.finalize_url)
+        self.assertEqual(response.status_code, 201)
+        self.enqueued.assert_called_once_with(self.upload.pk)
+        return AudioContribution.objects.get(contribution_id=response.data['id'])
+
+    def test_file_moves_after_commit_and_finalize_is_idempotent(self):
+        self.send(b'0123456789', 0)
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(self.finalize_url)
+        self.assertEqual(response.status_code, 201)
+        audio = AudioContribution.objects.get(contribution_id=response.data['id'])
+        self.assertEqual(audio.processing_status, AudioContribution.ProcessingStatus.ASSEMBLING)
+        storage = audio.audio_file.storage
+        self.assertFalse(storage.exists(audio.audio_file.name))
+        audio_url = reverse('contribution_audio', args=[audio.contribution_id])
+        self.assertEqual(self.client.get(audio_url).status_code, 404)
+
+        for callback in callbacks:
+            callback()
+        self.enqueued.assert_called_once_with(self.upload.pk)
+        run_upload_assembly(self.upload.pk)
+        with storage.open(audio.audio_file.name) as stored:
+            self.assertEqual(stored.read(), b'0123456789')
+        audio.refresh_from_db()
+        self.assertEqual(audio.processing_status, AudioContribution.ProcessingStatus.PENDING)
+        self.processing.assert_called_once_with(audio.pk)
+        self.assertEqual(self.client.get(audio_url).status_code, 200)
+        # A duplicate run finds nothing left to assemble
+        run_upload_assembly(self.upload.pk)
+        self.processing.assert_called_once()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(self.finalize_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], str(audio.contribution_id))
+        self.assertEqual(callbacks, [])
+        self.assertEqual(Contribution.objects.count(), 1)
+        self.assertEqual(self.send(b'', 10).status_code, 409)
+
+    def test_failed_assembly_is_retried_then_marked_failed(self):
+        audio = self.finalize()
+        discard(self.upload)
+
+        with mock.patch('contributions.tasks.threading.Timer') as timer, self.assertLogs('contributions.tasks'):
+            _assemble_locally(self.upload.pk)
+        timer.return_value.start.assert_called_once_with()
+        audio.refresh_from_db()
+        self.assertEqual(audio.processing_status, AudioContribution.ProcessingStatus.ASSEMBLING)
+
+        with self.assertLogs('contributions.tasks', 'ERROR'):
+            _assemble_locally(self.upload.pk, attempt=get_assembly_retries())
+        audio.refresh_from_db()
+        self.assertEqual(audio.processing_status, AudioContribution.ProcessingStatus.FAILED)
+        self.processing.assert_not_called()
+
+    def test_expired_uploads_are_purged(self):
+        audio = self.finalize()
+        AudioUpload.objects.create(
+            user=self.user, language=self.language, content_type='word', original_text='Pi',
+            translated_text='Water', filename='water.wav', upload_length=4,
+        )
+        AudioUpload.objects.update(updated_at=timezone.now() - timedelta(days=3))
+
+        # Not yet assembled: kept, bytes and all
+        stdout = io.StringIO()
+        call_command('expire_audio_uploads', stdout=stdout)
+        self.assertIn('Removed 1 abandoned and 0 finalized uploads', stdout.getvalue())
+        self.assertEqual(list(AudioUpload.objects.values_list('pk', flat=True)), [self.upload.pk])
+
+        run_upload_assembly(self.upload.pk)
+        stdout = io.StringIO()
+        call_command('expire_audio_uploads', stdout=stdout)
+        self.assertFalse(AudioUpload.objects.exists())
+        self.assertIn('Removed 0 abandoned and 1 finalized uploads', stdout.getvalue())
+        self.assertTrue(AudioContribution.objects.filter(pk=audio.pk).exists())
+
+
+class RemoteStorage(FileSystemStorage):
+    """A storage without local paths, like S3"""
+    def path(self, name):
+        raise NotImplementedError
+
+    def _local_path(self, name):
+        return super().path(name)
+
+    def _open(self, name, mode='rb'):
+        return File(open(self._local_path(name), mode))
+
+    def size(self, name):
+        return os.path.getsize(self._local_path(name))
+
+    def get_modified_time(self, name):
+        return datetime.fromtimestamp(os.path.getmtime(self._local_path(name)), tz=dt_timezone.utc)
+
+
+class DuplicateDetectionTests(TestCase):
+    """
+    MinHash near-duplicate index and the duplicates endpoints
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='njeri', email='njeri@example.com', password='pass')
+        cls.language = Language.objects.create(name='Swahili', code='sw', category='bantu')
+
+    def setUp(self):
+        language_registry.invalidate()
+        language_registry.snapshot()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def contribute(self, original_text, translated_text):
+        contribution = Contribution.objects.create(
+            user=self.user, language=self.language, type='text', content_type='sentence',
+            original_text=original_text, translated_text=translated_text,
+        )
+        index_contributions([contribution])
+        return contribution
+
+    def cluster_of(self, contribution):
+        return ContributionSignature.objects.get(contribution=contribution).cluster
+
+    def test_near_duplicates_share_a_cluster(self):
+        first = self.contribute('Habari ya asubuhi rafiki yangu', 'Good morning my friend')
+        second = self.contribute('Habari ya asubuhi, rafiki yangu', 'Good morning, my friend')
+        other = self.contribute('Mvua inanyesha sana leo', 'It is raining heavily today')
+
+        self.assertEqual(self.cluster_of(first), min(first.pk, second.pk, key=str))
+        self.assertEqual(self.cluster_of(second), min(first.pk, second.pk, key=str))
+        self.assertIsNone(self.cluster_of(other))
+        self.assertEqual([match[0] for match in find_duplicates(second)], [first.pk])
+
+        third = self.contribute('habari ya asubuhi   rafiki yangu', 'good morning my friend')
+        smallest = min(first.pk, second.pk, third.pk, key=str)
+        self.assertEqual({self.cluster_of(c) for c in (first, second, third)}, {smallest})
+
+        # Rebuilding the clusters from the band table gives the same ids
+        incremental = dict(ContributionSignature.objects.values_list('contribution_id', 'cluster'))
+        self.assertEqual(cluster_language(self.language.pk), 1)
+        self.assertEqual(dict(ContributionSignature.objects.values_list('contribution_id', 'cluster')), incremental)
+
+    def test_cluster_id_is_the_smallest_member(self):
+        # Whichever way round they are indexed, the cluster id is the same
+        for _ in range(5):
+            first = self.contribute('Ninapenda kusoma vitabu', 'I like reading books')
+            second = self.contribute('Ninapenda kusoma vitabu!', 'I like reading books!')
+            self.assertEqual(self.cluster_of(second), min(first.pk, second.pk, key=str))
+            Contribution.objects.filter(pk__in=[first.pk, second.pk]).delete()
+
+    def test_similar_endpoint(self):
+        first = self.contribute('Habari ya asubuhi rafiki yangu', 'Good morning my friend')
+        second = self.contribute('Habari ya asubuhi, rafiki yangu', 'Good morning, my friend')
+        self.contribute('Mvua inanyesha sana leo', 'It is raining heavily today')
+
+        response = self.client.get(reverse('contribution_duplicates', kwargs={'pk': second.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['id'], str(first.pk))
+        self.assertGreaterEqual(response.data['results'][0]['similarity'], 0.7)
+
+        response = self.client.get(reverse('duplicate_clusters'), {'language_code': 'sw'})
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['size'], 2)
+
+    @override_settings(DUPLICATE_BUCKET_CANDIDATES=2)
+    def test_candidates_are_capped_per_bucket(self):
+        copies = [self.contribute('Asante', 'Thank you') for _ in range(4)]
+        matches = find_duplicates(copies[-1])
+        self.assertEqual({match[0] for match in matches}, {copies[0].pk, copies[1].pk})
+
+
+class AudioStreamingTests(TestCase):
+    """
+    Audio delivery through /api/contributions/<id>/audio/
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='kamau', email='kamau@example.com', password='pass')
+        cls.language = Language.objects.create(name='Kikuyu', code='ki', category='bantu')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        contribution = Contribution.objects.create(
+            user=self.user, language=self.language, type='audio', content_type='word',
+            original_text='Thayu', translated_text='Peace',
+        )
+        self.audio = AudioContribution(contribution=contribution)
+        self.audio.audio_file.save('thayú.mp3', ContentFile(bytes(range(100))), save=False)
+        self.audio.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('contribution_audio', kwargs={'pk': contribution.pk})
+
+    def get(self, **headers):
+        return self.client.get(self.url, **headers)
+
+    def test_ranges(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(100)))
+
+        response = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(10, 20)))
+
+        response = self.get(HTTP_RANGE='bytes=-5')
+        self.assertEqual(response['Content-Range'], 'bytes 95-99/100')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(95, 100)))
+
+        response = self.get(HTTP_RANGE='bytes=90-')
+        self.assertEqual(response['Content-Range'], 'bytes 90-99/100')
+
+        response = self.get(HTTP_RANGE='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+        # A stale If-Range gets the whole file
+        response = self.get(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_get(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    @override_settings(AUDIO_SENDFILE_HEADER='X-Accel-Redirect', AUDIO_SENDFILE_PREFIX='/protected-media/')
+    def test_accel_redirect_is_quoted(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertTrue(response['X-Accel-Redirect'].startswith('/protected-media/audio_contributions/'))
+        self.assertTrue(response['X-Accel-Redirect'].endswith('/thay%C3%BA.mp3'))
+
+    @override_settings(AUDIO_SENDFILE_HEADER='X-Sendfile')
+    def test_sendfile(self):
+        response = self.get()
+        self.assertEqual(response['X-Sendfile'], self.audio.audio_file.path)
+        self.assertEqual(response.content, b'')
+
+    @override_settings(AUDIO_SENDFILE_HEADER='X-Sendfile')
+    def test_storage_without_paths_is_streamed(self):
+        field_file = self.audio.audio_file
+        field_file.storage = RemoteStorage()
+        request = RequestFactory().get(self.url, HTTP_RANGE='bytes=0-3')
+        response = serve_audio(request, field_file)
+        self.assertNotIn('X-Sendfile', response)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(4)))
+
+
+class AudioProcessingTests(TestCase):
+    """
+    Background probing and transcoding of uploaded audio
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='otieno', email='otieno@example.com', password='pass')
+        cls.language = Language.objects.create(name='Luo', code='luo', category='nilotic')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def upload(self, data):
+        contribution = Contribution.objects.create(
+            user=self.user, language=self.language, type='audio', content_type='sentence',
+            original_text='Oyawore', translated_text='Good morning',
+        )
+        audio = AudioContribution(contribution=contribution)
+        audio.audio_file.save('greeting.wav', ContentFile(data), save=False)
+        audio.save()
+        return audio
+
+    def wav(self):
+        output = io.BytesIO()
+        with wave.open(output, 'wb') as recording:
+            recording.setnchannels(1)
+            recording.setsampwidth(2)
+            recording.setframerate(8000)
+            recording.writeframes(struct.pack('<8000h', *([1000, -1000] * 4000)))
+        return output.getvalue()
+
+    def test_run_in_progress_is_not_repeated(self):
+        audio = self.upload(b'not audio')
+        started = timezone.now()
+        AudioContribution.objects.filter(pk=audio.pk).update(
+            processing_status=AudioContribution.ProcessingStatus.PROCESSING, processing_started_at=started
+        )
+        run_audio_processing(audio.pk)
+        audio.refresh_from_db()
+        self.assertEqual(audio.processing_status, AudioContribution.ProcessingStatus.PROCESSING)
+        self.assertEqual(audio.processing_started_at, started)
+        self.assertIsNone(audio.file_size)
+
+    def test_stale_run_is_reclaimed(self):
+        audio = self.upload(b'not audio')
+        AudioContribution.objects.filter(pk=audio.pk).update(
+            processing_status=AudioContribution.ProcessingStatus.PROCESSING,
+            processing_started_at=timezone.now() - timedelta(hours=1),
+        )
+        with self.assertLogs('contributions.tasks', 'ERROR'):
+            run_audio_processing(audio.pk)
+        audio.refresh_from_db()
+        self.assertEqual(audio.processing_status, AudioContribution.ProcessingStatus.FAILED)
+
+    def test_undecodable_upload_is_marked_failed_and_kept(self):
+        audio = self.upload(b'not audio')
+        with self.assertLogs('contributions.tasks', 'ERROR'):
+            run_audio_processing(audio.pk)
+        audio.refresh_from_db()
+        self.assertEqual(audio.processing_status, AudioContribution.ProcessingStatus.FAILED)
+        self.assertEqual(audio.file_size, 1)
+        self.assertIsNone(audio.duration)
+        self.assertTrue(audio.audio_file.storage.exists(audio.audio_file.name))
+
+        # A failed row is retried by the next run
+        with self.assertLogs('contributions.tasks', 'ERROR'):
+            run_audio_processing(audio.pk)
+
+    @skipUnless(shutil.which('ffmpeg'), 'ffmpeg is not installed')
+    @override_settings(AUDIO_OUTPUT_FORMAT='mp3')
+    def test_transcoded_once_and_original_kept(self):
+        audio = self.upload(self.wav())
+        original_name = audio.audio_file.name
+        run_audio_processing(audio.pk)
+        audio.refresh_from_db()
+        self.assertEqual(audio.processing_status, AudioContribution.ProcessingStatus.PROCESSED)
+        self.assertAlmostEqual(audio.duration, 1.0, places=1)
+        self.assertTrue(audio.audio_file.name.endswith('.mp3'))
+        self.assertEqual(audio.original_file.name, original_name)
+        self.assertTrue(audio.original_file.storage.exists(original_name))
+
+        processed_name = audio.audio_file.name
+        run_audio_processing(audio.pk)
+        audio.refresh_from_db()
+        self.assertEqual(audio.audio_file.name, processed_name)
+
+    @skipUnless(shutil.which('ffmpeg'), 'ffmpeg is not installed')
+    @override_settings(AUDIO_OUTPUT_FORMAT='mp3', AUDIO_KEEP_ORIGINALS=False)
+    def test_original_deleted_when_not_kept(self):
+        audio = self.upload(self.wav())
+        original_name = audio.audio_file.name
+        run_audio_processing(audio.pk)
+        audio.refresh_from_db()
+        self.assertEqual(audio.original_file.name, '')
+        self.assertFalse(audio.audio_file.storage.exists(original_name))
+
+
+class DailyStatsRollupTests(TestCase):
+    """
+    Incremental upserts into DailyContributionStats, checked against a rebuild
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='chebet', email='chebet@example.com', password='pass')
+        cls.language = Language.objects.create(name='Kalenjin', code='kln', category='nilotic')
+
+    def contribute(self, content_type='sentence'):
+        with transaction.atomic():
+            contribution = Contribution.objects.create(
+                user=self.user, language=self.language, type='text', content_type=content_type,
+                original_text=f'Chamgei {content_type}', translated_text=f'Hello {content_type}',
+            )
+            contributions_created([contribution])
+        return contribution
+
+    def rollup(self):
+        return {
+            (row.type, row.content_type, row.status): (
+                row.entered_count, row.left_count, row.validations_count, row.positive_validations_count
+            )
+            for row in DailyContributionStats.objects.filter(language=self.language, day=timezone.localdate())
+        }
+
+    def test_rows_are_created_then_incremented(self):
+        self.contribute()
+        self.assertEqual(self.rollup(), {('text', 'sentence', 'pending'): (1, 0, 0, 0)})
+        self.contribute()
+        self.contribute('word')
+        self.assertEqual(self.rollup(), {
+            ('text', 'sentence', 'pending'): (2, 0, 0, 0),
+            ('text', 'word', 'pending'): (1, 0, 0, 0),
+        })
+        self.assertEqual(DailyContributionStats.objects.count(), 2)
+
+    def test_status_changes_match_a_rebuild(self):
+        contribution = self.contribute()
+        self.contribute('word')
+        contribution.status = Contribution.Status.VALIDATED
+        contribution.save()
+        apply_rollup_deltas(collect_status_change(contribution, Contribution.Status.PENDING))
+        incremental = self.rollup()
+        self.assertEqual(incremental[('text', 'sentence', 'pending')], (1, 1, 0, 0))
+        self.assertEqual(incremental[('text', 'sentence', 'validated')], (1, 0, 0, 0))
+
+        call_command('build_daily_stats', language='kln', stdout=io.StringIO())
+        self.assertEqual(self.rollup(), incremental)
+
+
+class ContributorBackfillMigrationTests(TransactionTestCase):
+    """
+    Migrations 0008 and 0013 date memberships by the first contribution and
+    count distinct contributors
+    """
+    before = [('contributions', '0007_daily_contribution_stats'), ('languages', '0001_initial')]
+    backfilled = [('contributions', '0008_distinct_contributors')]
+    repaired = [('contributions', '0013_repair_first_contributed_at')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_backfill(self):
+        old_apps = self.migrate(self.before)
+        User = old_apps.get_model('accounts', 'User')
+        Language = old_apps.get_model('languages', 'Language')
+        Contribution = old_apps.get_model('contributions', 'Contribution')
+        users = [User.objects.create(username=f'backfill{i}', email=f'backfill{i}@example.com') for i in range(3)]
+        swahili = Language.objects.create(name='Swahili', code='sw', category='bantu')
+        luo = Language.objects.create(name='Luo', code='luo', category='nilotic')
+        first_day = timezone.now() - timedelta(days=90)
+        for i, (user, language) in enumerate([
+            (users[0], swahili), (users[0], swahili), (users[1], swahili), (users[0], luo),
+        ]):
+            contribution = Contribution.objects.create(
+                user=user, language=language, type='text', content_type='word',
+                original_text=f'Neno {i}', translated_text=f'Word {i}',
+            )
+            Contribution.objects.filter(pk=contribution.pk).update(created_at=first_day + timedelta(days=i))
+
+        expected = {
+            (swahili.pk, users[0].pk): first_day,
+            (swahili.pk, users[1].pk): first_day + timedelta(days=2),
+            (luo.pk, users[0].pk): first_day + timedelta(days=3),
+        }
+
+        new_apps = self.migrate(self.backfilled)
+        LanguageContributor = new_apps.get_model('contributions', 'LanguageContributor')
+        Language = new_apps.get_model('languages', 'Language')
+        memberships = LanguageContributor.objects.values_list('language_id', 'user_id', 'first_contributed_at')
+        self.assertEqual({(row[0], row[1]): row[2] for row in memberships}, expected)
+        self.assertEqual(Language.objects.get(pk=swahili.pk).contributors_count, 2)
+        self.assertEqual(Language.objects.get(pk=luo.pk).contributors_count, 1)
+
+        # Databases backfilled before the fix had every membership dated at migration time
+        LanguageContributor.objects.update(first_contributed_at=timezone.now())
+        self.migrate(self.repaired)
+        self.assertEqual({(row[0], row[1]): row[2] for row in memberships}, expected)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentCounterTests(TransactionTestCase):
+    """
+    Language and User counters stay exact under concurrent submissions
+    """
+    writers = 48
+    submissions = 2
+
+    def test_concurrent_submissions_keep_counters_exact(self):
+        language = Language.objects.create(name='Swahili', code='sw', category='bantu')
+        users = [
+            User.objects.create_user(username=f'writer{i}', email=f'writer{i}@example.com', password='pass')
+            for i in range(12)
+        ]
+        # Every writer submits to the same language at the same moment
+        barrier = threading.Barrier(self.writers)
+        errors = []
+
+        def submit(writer):
+            try:
+                client = APIClient()
+                client.force_authenticate(users[writer % len(users)])
+                barrier.wait()
+                for n in range(self.submissions):
+                    response = client.post(reverse('text_contribution_create'), {
+                        'language': language.pk,
+                        'content_type': 'word' if writer % 2 else 'sentence',
+                        'original_text': f'Text {writer}-{n}',
+                        'translated_text': f'Maandishi {writer}-{n}',
+                    }, format='json')
+                    if response.status_code != 201:
+                        errors.append(response.data)
+            except Exception as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit, args=(writer,)) for writer in range(self.writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+        language.refresh_from_db()
+        half = self.writers // 2 * self.submissions
+        self.assertEqual(language.words_count, half)
+        self.assertEqual(language.sentences_count, half)
+        self.assertEqual(language.contributors_count, len(users))
+        for user in users:
+            user.refresh_from_db()
+            self.assertEqual(user.total_contributions, self.writers // len(users) * self.submissions)
+        self.assertEqual(Contribution.objects.count(), self.writers * self.submissions)
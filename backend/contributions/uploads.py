@@ -0,0 +1,138 @@
+"""
+Storage for resumable (tus-style) audio uploads.
+
+Chunks go straight from the request stream to the storage backend in small
+blocks, so a worker only ever holds one block of an upload in memory.
+Backends with a local path (FileSystemStorage) append to a single file in
+place. Other backends, such as S3, store one object per chunk, and
+finalizing streams those parts into the final object.
+"""
+import os
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+UPLOAD_DIR = 'audio_uploads'
+BLOCK_SIZE = 64 * 1024
+
+
+def _local_path(storage, name):
+    try:
+        return storage.path(name)
+    except NotImplementedError:
+        return None
+
+
+def _data_name(upload):
+    return f'{UPLOAD_DIR}/{upload.pk}.part'
+
+
+def _parts_dir(upload):
+    return f'{UPLOAD_DIR}/{upload.pk}'
+
+
+class _LimitedReader:
+    """Reads at most `limit` bytes from `stream`, counting what was read"""
+    def __init__(self, stream, limit):
+        self.stream = stream
+        self.remaining = limit
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.stream.read(min(size, BLOCK_SIZE))
+        self.remaining -= len(data)
+        self.bytes_read += len(data)
+        return data
+
+
+def write_chunk(upload, stream, length, storage=default_storage):
+    """
+    Write up to `length` bytes from `stream` at `upload.offset`.
+
+    Returns the number of bytes actually received, which is less than
+    `length` if the client disconnected; the partial data is kept so the
+    client can resume from the new offset.
+    """
+    reader = _LimitedReader(stream, length)
+    path = _local_path(storage, _data_name(upload))
+    if path is not None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        mode = 'r+b' if os.path.exists(path) else 'wb'
+        with open(path, mode) as target:
+            # Drop anything past the recorded offset from an interrupted write
+            target.seek(upload.offset)
+            target.truncate()
+            while True:
+                block = reader.read(BLOCK_SIZE)
+                if not block:
+                    break
+                target.write(block)
+        return reader.bytes_read
+
+    part_name = f'{_parts_dir(upload)}/{upload.offset:015d}.part'
+    if storage.exists(part_name):
+        storage.delete(part_name)
+    reader.size = length
+    storage.save(part_name, File(reader, name=part_name))
+    return reader.bytes_read
+
+
+class _ConcatenatedParts:
+    """File-like reader over the chunk objects of an upload, in order"""
+    def __init__(self, storage, names, size):
+        self.storage = storage
+        self.names = list(names)
+        self.size = size
+        self.current = None
+
+    def read(self, size=-1):
+        while True:
+            if self.current is None:
+                if not self.names:
+                    return b''
+                self.current = self.storage.open(self.names.pop(0), 'rb')
+            data = self.current.read(BLOCK_SIZE if size is None or size < 0 else size)
+            if data:
+                return data
+            self.current.close()
+            self.current = None
+
+
+def assemble(upload, final_name, storage=default_storage):
+    """
+    Move the received bytes into `final_name`; returns the stored name.
+    """
+    path = _local_path(storage, _data_name(upload))
+    if path is not None:
+        final_name = storage.get_available_name(final_name)
+        final_path = storage.path(final_name)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(path, final_path)
+        return final_name
+
+    _, files = storage.listdir(_parts_dir(upload))
+    names = [f'{_parts_dir(upload)}/{name}' for name in sorted(files)]
+    reader = _ConcatenatedParts(storage, names, upload.upload_length)
+    final_name = storage.save(final_name, File(reader, name=final_name))
+    for name in names:
+        storage.delete(name)
+    return final_name
+
+
+def discard(upload, storage=default_storage):
+    """Remove any data received for an abandoned upload"""
+    path = _local_path(storage, _data_name(upload))
+    if path is not None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    try:
+        _, files = storage.listdir(_parts_dir(upload))
+    except FileNotFoundError:
+        return
+    for name in files:
+        storage.delete(f'{_parts_dir(upload)}/{name}')
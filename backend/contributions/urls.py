@@ -2,13 +2,29 @@ from django.urls import path
 from .views import (
     ContributionListView,
     ContributionDetailView,
+    ContributionAudioView,
+    ContributionDuplicatesView,
+    DuplicateClusterListView,
     TextContributionCreateView,
-    AudioContributionCreateView
+    BulkTextContributionCreateView,
+    AudioContributionCreateView,
+    ContributionExportView,
+    AudioUploadCreateView,
+    AudioUploadDetailView,
+    AudioUploadFinalizeView
 )
 
 urlpatterns = [
     path('', ContributionListView.as_view(), name='contribution_list'),
     path('<uuid:pk>/', ContributionDetailView.as_view(), name='contribution_detail'),
+    path('<uuid:pk>/duplicates/', ContributionDuplicatesView.as_view(), name='contribution_duplicates'),
+    path('duplicates/', DuplicateClusterListView.as_view(), name='duplicate_clusters'),
+    path('<uuid:pk>/audio/', ContributionAudioView.as_view(), name='contribution_audio'),
     path('text/', TextContributionCreateView.as_view(), name='text_contribution_create'),
+    path('text/bulk/', BulkTextContributionCreateView.as_view(), name='text_contribution_bulk_create'),
     path('audio/', AudioContributionCreateView.as_view(), name='audio_contribution_create'),
+    path('audio/uploads/', AudioUploadCreateView.as_view(), name='audio_upload_create'),
+    path('audio/uploads/<uuid:pk>/', AudioUploadDetailView.as_view(), name='audio_upload_detail'),
+    path('audio/uploads/<uuid:pk>/finalize/', AudioUploadFinalizeView.as_view(), name='audio_upload_finalize'),
+    path('export/', ContributionExportView.as_view(), name='contribution_export'),
 ]
\ No newline at end of file
@@ -1,35 +1,73 @@
+import math
 from django.shortcuts import render
-from rest_framework import generics, permissions, filters
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.db.models import Count, Q
+from django.utils import timezone
+from datetime import timedelta
+from django.utils.dateparse import parse_datetime
+from rest_framework import generics, permissions, filters, status
+from rest_framework.exceptions import NotAuthenticated, ValidationError
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Contribution, AudioContribution
+from django.db import transaction
+from .models import Contribution, AudioContribution, AudioUpload, ContributionSignature
 from .serializers import (
     ContributionListSerializer,
+    ContributionRowSerializer,
     ContributionDetailSerializer,
     TextContributionCreateSerializer,
-    AudioContributionCreateSerializer
+    BulkTextContributionSerializer,
+    AudioContributionCreateSerializer,
+    AudioUploadSerializer
 )
+from .export import CONTENT_TYPES, export_queryset, get_watermark, iter_rows, render_rows
+from .lifecycle import CreatedContributions, contributions_created
+from .parsers import InvalidItem, NDJSONParser, StreamingJSONArrayParser
+from .pagination import ContributionPagination
+from .tasks import enqueue_audio_processing, enqueue_upload_assembly
+from .uploads import discard, write_chunk
+from .streaming import check_audio_signature, serve_audio
+from .search import search_contributions
+from .duplicates import find_duplicates
 from languages.models import Language
+from languages.registry import language_registry
+from config.conditional import ConditionalListMixin, ConditionalObjectMixin
 
-class ContributionListView(generics.ListAPIView):
+class ContributionListView(ConditionalListMixin, generics.ListAPIView):
     """
     API endpoint for listing contributions
     """
     serializer_class = ContributionListSerializer
     permission_classes = [permissions.AllowAny]  # Allow anyone to view contributions
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['language__code', 'type', 'content_type', 'status']
+    filterset_fields = ['type', 'content_type', 'status']
     search_fields = ['original_text', 'translated_text']
     ordering_fields = ['created_at', 'validations_count']
+    # ?pagination=cursor switches to keyset pagination on (created_at, id);
+    # ordering parameters are ignored in that mode
+    pagination_class = ContributionPagination
+    # my_contributions and to_validate depend on who is asking
+    conditional_per_user = True
     
     def get_queryset(self):
         # By default, return contributions visible to the current user
         queryset = Contribution.objects.all()
         
-        # Filter by language if specified
-        language_code = self.request.query_params.get('language_code')
+        # Filter by language if specified. Codes resolve to ids through the
+        # language registry, so no join is needed
+        language_code = self.request.query_params.get('language_code') \
+            or self.request.query_params.get('language__code')
         if language_code:
-            queryset = queryset.filter(language__code=language_code)
+            queryset = queryset.filter(language_id=language_registry.id_for_code(language_code))
+            
+        # Ranked full-text search, backed by the tsvector/FTS5 index
+        q = self.request.query_params.get('q')
+        if q:
+            queryset = search_contributions(queryset, q)
             
         # Only apply user-specific filters if user is authenticated
         if self.request.user.is_authenticated:
@@ -47,14 +85,102 @@ class ContributionListView(generics.ListAPIView):
                 )
         
         return queryset
+        
+    def validate_rendered_page(self):
+        # Keyset pages cost one query; an aggregate ETag would double that
+        return ContributionPagination.uses_keyset(self.request)
+        
+    def list(self, request, *args, **kwargs):
+        # Fetch only the listed columns, joined in one query, as plain dicts
+        queryset = ContributionRowSerializer.values(self.filter_queryset(self.get_queryset()))
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(ContributionRowSerializer(page, many=True).data)
+        return Response(ContributionRowSerializer(queryset, many=True).data)
 
-class ContributionDetailView(generics.RetrieveAPIView):
+class ContributionDetailView(ConditionalObjectMixin, generics.RetrieveAPIView):
     """
     API endpoint for retrieving a single contribution
     """
-    queryset = Contribution.objects.all()
+    queryset = Contribution.objects.select_related('user', 'audio')
     serializer_class = ContributionDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
+    
+    def get_etag_parts(self, obj):
+        parts = super().get_etag_parts(obj)
+        if obj.type == Contribution.Type.AUDIO:
+            # The signed stream_url expires, so cached copies must too
+            max_age = getattr(settings, 'AUDIO_URL_MAX_AGE', 3600)
+            parts += (int(timezone.now().timestamp()) // max(max_age // 2, 1),)
+        return parts
+
+class ContributionAudioView(APIView):
+    """
+    API endpoint for streaming a contribution's audio
+
+    Requires an authenticated request or a signed `sig` parameter (see
+    AudioContributionSerializer.stream_url). Supports Range, ETag and
+    Last-Modified, and hands off to the front proxy when configured.
+    """
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request, pk):
+        signature = request.query_params.get('sig')
+        if not request.user.is_authenticated and not (signature and check_audio_signature(signature, pk)):
+            raise NotAuthenticated()
+            
+        # An upload still being assembled has no file to serve yet
+        audios = AudioContribution.objects.only('id', 'audio_file').exclude(
+            processing_status=AudioContribution.ProcessingStatus.ASSEMBLING
+        )
+        audio = get_object_or_404(audios, contribution_id=pk)
+        return serve_audio(request, audio.audio_file)
+
+class ContributionDuplicatesView(APIView):
+    """
+    API endpoint for listing near-duplicates of a contribution
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, pk):
+        contribution = get_object_or_404(Contribution, pk=pk)
+        matches = find_duplicates(contribution)
+        similar = Contribution.objects.select_related('user').in_bulk(
+            [contribution_id for contribution_id, _, _ in matches]
+        )
+        results = []
+        for contribution_id, _, score in matches:
+            if contribution_id in similar:
+                data = ContributionListSerializer(similar[contribution_id]).data
+                data['similarity'] = round(score, 3)
+                results.append(data)
+        return Response({'count': len(results), 'results': results})
+
+class DuplicateClusterListView(generics.ListAPIView):
+    """
+    API endpoint for listing clusters of near-duplicate contributions,
+    largest first
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        queryset = ContributionSignature.objects.filter(cluster__isnull=False)
+        language_code = self.request.query_params.get('language_code')
+        if language_code:
+            queryset = queryset.filter(language_id=language_registry.id_for_code(language_code))
+        return queryset.values('cluster').annotate(size=Count('contribution')).order_by('-size', 'cluster')
+        
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        clusters = {row['cluster']: {'cluster': row['cluster'], 'size': row['size'], 'contributions': []} for row in page}
+        members = Contribution.objects.filter(signature__cluster__in=list(clusters))\
+            .select_related('user', 'signature')
+        for contribution in members:
+            clusters[contribution.signature.cluster]['contributions'].append(
+                ContributionListSerializer(contribution).data
+            )
+        return self.get_paginated_response(list(clusters.values()))
 
 class TextContributionCreateView(generics.CreateAPIView):
     """
@@ -64,20 +190,82 @@ class TextContributionCreateView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def perform_create(self, serializer):
-        # Set the user on the contribution
-        contribution = serializer.save(user=self.request.user)
+        with transaction.atomic():
+            # Set the user on the contribution
+            contribution = serializer.save(user=self.request.user)
+            
+            # Update the language stats, user's contribution count and duplicate index
+            contributions_created([contribution])
+
+class BulkTextContributionCreateView(APIView):
+    """
+    API endpoint for creating many text contributions in one request
+
+    Accepts a JSON array or NDJSON stream of text contribution payloads and
+    returns a result for every item, in input order.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [StreamingJSONArrayParser, NDJSONParser]
+    chunk_size = 1000
+    
+    def get_max_items(self):
+        return getattr(settings, 'CONTRIBUTION_BULK_MAX_ITEMS', 50000)
+    
+    def post(self, request):
+        items = request.data
+        if isinstance(items, dict):
+            raise ValidationError('Expected a JSON array or NDJSON body')
+            
+        max_items = self.get_max_items()
+        context = {
+            'request': request,
+            'languages': Language.objects.in_bulk(),
+        }
+        results = []
+        pending = []
+        created = CreatedContributions()
         
-        # Update the language stats
-        language = contribution.language
-        language.words_count += 1 if contribution.content_type == 'word' else 0
-        language.sentences_count += 1 if contribution.content_type == 'sentence' else 0
-        language.contributors_count += 1
-        language.save()
+        def flush():
+            if not pending:
+                return
+            Contribution.objects.bulk_create(pending, batch_size=self.chunk_size)
+            created.add(pending)
+            pending.clear()
         
-        # Update user's contribution count
-        user = self.request.user
-        user.total_contributions += 1
-        user.save()
+        with transaction.atomic():
+            for index, item in enumerate(items):
+                if index >= max_items:
+                    raise ValidationError(f'A bulk upload may contain at most {max_items} items')
+                    
+                if isinstance(item, InvalidItem):
+                    results.append({'index': index, 'status': 'error', 'errors': {'non_field_errors': [item.message]}})
+                    continue
+                if not isinstance(item, dict):
+                    results.append({'index': index, 'status': 'error', 'errors': {'non_field_errors': ['Expected an object']}})
+                    continue
+                    
+                serializer = BulkTextContributionSerializer(data=item, context=context)
+                if not serializer.is_valid():
+                    results.append({'index': index, 'status': 'error', 'errors': serializer.errors})
+                    continue
+                    
+                contribution = Contribution(user=request.user, type='text', **serializer.validated_data)
+                # bulk_create skips Contribution.save, which sets this on insert
+                contribution.reviews_needed = contribution.language.consensus_min_reviews
+                pending.append(contribution)
+                results.append({'index': index, 'status': 'created', 'id': str(contribution.id)})
+                
+                if len(pending) >= self.chunk_size:
+                    flush()
+            flush()
+            # One rollup/counter update per affected row for the whole batch
+            created.apply()
+        
+        return Response({
+            'created': created.count,
+            'failed': len(results) - created.count,
+            'results': results,
+        }, status=status.HTTP_201_CREATED if created.count else status.HTTP_400_BAD_REQUEST)
 
 class AudioContributionCreateView(generics.CreateAPIView):
     """
@@ -88,27 +276,198 @@ class AudioContributionCreateView(generics.CreateAPIView):
     parser_classes = [MultiPartParser, FormParser]
     
     def perform_create(self, serializer):
-        # Set the user on the contribution
-        contribution = serializer.save(user=self.request.user)
+        with transaction.atomic():
+            # Set the user on the contribution
+            contribution = serializer.save(user=self.request.user)
+            
+            # Update the language stats, user's contribution count and duplicate index
+            contributions_created([contribution])
+            
+            # Probe, normalize and transcode the audio once the upload is committed
+            audio_id = contribution.audio.id
+            transaction.on_commit(lambda: enqueue_audio_processing(audio_id))
+
+class AudioUploadCreateView(generics.CreateAPIView):
+    """
+    API endpoint for starting a resumable audio upload
+
+    Takes the contribution fields plus `filename` and `upload_length`; the
+    audio bytes are then sent with PATCH requests to the returned location.
+    """
+    serializer_class = AudioUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+        
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response['Location'] = request.build_absolute_uri(f"{response.data['id']}/")
+        response['Upload-Offset'] = '0'
+        return response
+
+class AudioUploadDetailView(APIView):
+    """
+    API endpoint for one resumable audio upload (tus-style)
+
+    GET/HEAD reports the current offset, PATCH appends the bytes of an
+    `application/offset+octet-stream` body at the `Upload-Offset` header,
+    and DELETE abandons the upload.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    lock_ttl = timedelta(minutes=5)
+    
+    def get_object(self):
+        return get_object_or_404(AudioUpload, pk=self.kwargs['pk'], user=self.request.user)
+        
+    def _offset_response(self, upload, status_code=status.HTTP_200_OK, data=None):
+        response = Response(data, status=status_code)
+        response['Upload-Offset'] = str(upload.offset)
+        response['Upload-Length'] = str(upload.upload_length)
+        response['Cache-Control'] = 'no-store'
+        return response
         
-        # Update the language stats
-        language = contribution.language
-        language.audio_count += 1
-        language.contributors_count += 1
-        language.save()
+    def get(self, request, pk):
+        upload = self.get_object()
+        return self._offset_response(upload, data=AudioUploadSerializer(upload).data)
         
-        # Update user's contribution count
-        user = self.request.user
-        user.total_contributions += 1
-        user.save()
+    def patch(self, request, pk):
+        upload = self.get_object()
+        if upload.contribution_id:
+            return Response({'error': 'Upload has already been finalized'}, status=status.HTTP_409_CONFLICT)
+        if request.content_type != 'application/offset+octet-stream':
+            return Response({'error': 'Content-Type must be application/offset+octet-stream'}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+            
+        if not request.headers.get('Content-Length'):
+            return Response({'error': 'Content-Length header is required'}, status=status.HTTP_411_LENGTH_REQUIRED)
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            raise ValidationError('Upload-Offset and Content-Length headers are required')
+        if offset != upload.offset:
+            return self._offset_response(upload, status.HTTP_409_CONFLICT, {'error': 'Upload-Offset does not match'})
+        if offset + length > upload.upload_length:
+            raise ValidationError('Chunk would exceed the declared upload length')
+            
+        # Take a short lease on the upload so two PATCHes cannot interleave
+        now = timezone.now()
+        acquired = AudioUpload.objects.filter(pk=upload.pk, offset=offset).filter(
+            Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+        ).update(locked_until=now + self.lock_ttl)
+        if not acquired:
+            return self._offset_response(upload, status.HTTP_409_CONFLICT, {'error': 'Upload is busy'})
+            
+        received = 0
+        try:
+            received = write_chunk(upload, request.stream, length)
+        finally:
+            AudioUpload.objects.filter(pk=upload.pk).update(
+                offset=offset + received, locked_until=None, updated_at=timezone.now()
+            )
+        upload.offset = offset + received
+        return self._offset_response(upload, status.HTTP_204_NO_CONTENT)
+        
+    def delete(self, request, pk):
+        upload = self.get_object()
+        if not upload.contribution_id:
+            discard(upload)
+        upload.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class AudioUploadFinalizeView(APIView):
+    """
+    API endpoint for turning a completed upload into an audio contribution
+
+    The upload row is locked while the contribution is created, so finalizing
+    twice, even concurrently, creates one contribution. The received bytes are
+    moved into place by a background task once that transaction commits,
+    retried before the audio is marked FAILED; until then the audio is
+    ASSEMBLING.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request, pk):
+        with transaction.atomic():
+            upload = get_object_or_404(AudioUpload.objects.select_for_update(), pk=pk, user=request.user)
+            if upload.contribution_id:
+                # Finalizing twice returns the contribution created the first time
+                contribution = Contribution.objects.get(pk=upload.contribution_id)
+                return Response(ContributionDetailSerializer(contribution, context={'request': request}).data)
+            if not upload.is_complete:
+                return Response(
+                    {'error': f'Upload is incomplete ({upload.offset} of {upload.upload_length} bytes)'},
+                    status=status.HTTP_409_CONFLICT
+                )
+                
+            contribution = Contribution.objects.create(
+                user=request.user,
+                language=upload.language,
+                type=Contribution.Type.AUDIO,
+                content_type=upload.content_type,
+                original_text=upload.original_text,
+                translated_text=upload.translated_text,
+                context=upload.context,
+                anonymous=upload.anonymous,
+            )
+            audio = AudioContribution(contribution=contribution)
+            storage = audio.audio_file.storage
+            final_name = storage.get_available_name(audio.audio_file.field.generate_filename(audio, upload.filename))
+            audio.audio_file.name = final_name
+            audio.file_size = math.ceil(upload.upload_length / 1024)
+            audio.processing_status = AudioContribution.ProcessingStatus.ASSEMBLING
+            audio.processing_started_at = timezone.now()
+            audio.save()
+            
+            AudioUpload.objects.filter(pk=upload.pk).update(contribution=contribution)
+            contributions_created([contribution])
+            
+            transaction.on_commit(lambda: enqueue_upload_assembly(upload.pk))
+            
+        return Response(ContributionDetailSerializer(contribution, context={'request': request}).data, status=status.HTTP_201_CREATED)
+
+
+class ContributionExportView(APIView):
+    """
+    API endpoint for streaming validated contributions as a parallel corpus
+
+    Query parameters: language, content_type, since (watermark from the
+    previous export) and output (ndjson, csv or tsv). The watermark for the
+    next incremental export is returned in the X-Export-Watermark header.
+    Rows updated within the last EXPORT_WATERMARK_LAG seconds are left for
+    the next export, see export.py.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        output_format = request.query_params.get('output', 'ndjson')
+        if output_format not in CONTENT_TYPES:
+            raise ValidationError({'output': f'Must be one of {", ".join(sorted(CONTENT_TYPES))}'})
+            
+        since = request.query_params.get('since')
+        if since:
+            since = parse_datetime(since)
+            if since is None:
+                raise ValidationError({'since': 'Must be an ISO 8601 datetime'})
+                
+        filters = {
+            'language_code': request.query_params.get('language'),
+            'content_type': request.query_params.get('content_type'),
+            'since': since or None,
+        }
+        # Pin the upper bound so rows written while streaming land in the next export
+        watermark = get_watermark(export_queryset(**filters))
+        if watermark is None:
+            rows = iter(())
+        else:
+            rows = iter_rows(export_queryset(until=watermark, **filters))
         
-        # In a production environment, we would process the audio file here
-        # This would involve tasks like:
-        # 1. Converting the audio to a standard format (MP3/WAV)
-        # 2. Normalizing audio levels
-        # 3. Generating transcriptions if needed
-        # 4. Storing in S3 or other cloud storage
-        # 
-        # Example using a background task:
-        # from .tasks import process_audio_file
-        # process_audio_file.delay(str(contribution.audio.id))
+        response = StreamingHttpResponse(
+            render_rows(rows, output_format),
+            content_type=f'{CONTENT_TYPES[output_format]}; charset=utf-8'
+        )
+        filename = f"corpus-{filters['language_code'] or 'all'}.{output_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        if watermark is not None:
+            response['X-Export-Watermark'] = watermark.isoformat()
+        return response
@@ -14,6 +14,9 @@ class LanguageAdmin(admin.ModelAdmin):
         (None, {
             'fields': ('name', 'code', 'category', 'description')
         }),
+        ('Consensus', {
+            'fields': ('consensus_min_reviews', 'consensus_accept_ratio', 'consensus_reject_ratio'),
+        }),
         ('Statistics', {
             'fields': ('contributors_count', 'words_count', 'sentences_count', 'audio_count'),
             'classes': ('collapse',)
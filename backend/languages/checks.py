@@ -0,0 +1,27 @@
+"""
+Deployment checks for the language registry.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries are private to one process
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The registry's version key and counters must be visible to every worker,
+    or a language edit is never seen by the other processes
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in PROCESS_LOCAL_BACKENDS:
+        return [Error(
+            f'The default cache ({backend}) is not shared between processes.',
+            hint='Set CACHE_BACKEND and CACHE_LOCATION to a Redis or Memcached server.',
+            id='languages.E001',
+        )]
+    return []
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.21 on 2026-10-18 16:02
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('languages', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='language',
+            name='consensus_accept_ratio',
+            field=models.FloatField(default=0.7, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)]),
+        ),
+        migrations.AddField(
+            model_name='language',
+            name='consensus_min_reviews',
+            field=models.PositiveSmallIntegerField(default=3, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+        migrations.AddField(
+            model_name='language',
+            name='consensus_reject_ratio',
+            field=models.FloatField(default=0.3, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)]),
+        ),
+        migrations.AddConstraint(
+            model_name='language',
+            constraint=models.CheckConstraint(check=models.Q(('consensus_reject_ratio__lt', models.F('consensus_accept_ratio'))), name='language_consensus_ratios_ordered'),
+        ),
+    ]
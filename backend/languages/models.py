@@ -1,3 +1,4 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -19,6 +20,13 @@ class Language(models.Model):
     words_count = models.PositiveIntegerField(default=0)
     sentences_count = models.PositiveIntegerField(default=0)
     audio_count = models.PositiveIntegerField(default=0)
+    # Consensus rules for contributions in this language: once at least
+    # consensus_min_reviews validations are in, a positive share at or above
+    # the accept ratio validates the contribution, at or below the reject
+    # ratio rejects it
+    consensus_min_reviews = models.PositiveSmallIntegerField(default=3, validators=[MinValueValidator(1)])
+    consensus_accept_ratio = models.FloatField(default=0.7, validators=[MinValueValidator(0), MaxValueValidator(1)])
+    consensus_reject_ratio = models.FloatField(default=0.3, validators=[MinValueValidator(0), MaxValueValidator(1)])
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -27,3 +35,9 @@ class Language(models.Model):
 
     class Meta:
         ordering = ['name']
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(consensus_reject_ratio__lt=models.F('consensus_accept_ratio')),
+                name='language_consensus_ratios_ordered',
+            ),
+        ]
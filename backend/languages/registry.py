@@ -0,0 +1,193 @@
+"""
+In-process registry of languages.
+
+Languages are a small, nearly static table, so each process keeps a snapshot
+of every row's static fields (code, name, category, consensus settings) in
+memory. The snapshot is shared through the Django cache under a version
+number. Saving or deleting a Language bumps the version (see signals.py), and
+every process notices the new version within LANGUAGE_REGISTRY_CHECK_INTERVAL
+seconds and reloads its snapshot.
+
+Counters and contributor estimates move with every contribution, so they are
+not part of the snapshot. They are loaded in one pass for all languages and
+shared through the cache for LANGUAGE_COUNTERS_TTL seconds, and may lag the
+database by that much. New contributions never invalidate them; a Language
+save or delete does.
+
+Both caches only work across processes with a shared cache backend (Redis,
+Memcached); see checks.py.
+"""
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+VERSION_KEY = 'languages:registry:version'
+SNAPSHOT_KEY = 'languages:registry:{version}'
+# Rows carry rolling-window figures, so counters also expire with the day
+COUNTERS_KEY = 'languages:counters:{day}'
+
+COUNTER_FIELDS = ('contributors_count', 'words_count', 'sentences_count', 'audio_count')
+
+
+def get_check_interval():
+    return getattr(settings, 'LANGUAGE_REGISTRY_CHECK_INTERVAL', 1.0)
+
+
+def get_counters_ttl():
+    return getattr(settings, 'LANGUAGE_COUNTERS_TTL', 30)
+
+
+class LanguageSnapshot:
+    """
+    Immutable view of the static fields of all languages at one registry version
+    """
+    def __init__(self, version, rows):
+        self.version = version
+        # LanguageStaticSerializer rows in the model's default ordering
+        self.rows = rows
+        self.by_id = {row['id']: row for row in rows}
+        self.ids_by_code = {row['code']: row['id'] for row in rows}
+
+
+class LanguageCounters:
+    """
+    Counters, contributor estimates and updated_at of all languages, as of
+    one load
+    """
+    def __init__(self, day, rows, updated_at):
+        self.day = day
+        # {id: row} with the LanguageSerializer fields missing from the snapshot
+        self.rows = rows
+        # {id: updated_at} as datetimes, for conditional requests
+        self.updated_at = updated_at
+        self.last_modified = max(updated_at.values(), default=None)
+
+
+class LanguageRegistry:
+    """
+    Process-wide cache of languages, invalidated through a shared version key
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._counters = None
+        self._counters_checked_at = 0.0
+
+    def _current_version(self):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, 1, None)
+            version = cache.get(VERSION_KEY, 1)
+        return version
+
+    def _load(self, version):
+        from .models import Language
+        from .serializers import LanguageStaticSerializer
+
+        key = SNAPSHOT_KEY.format(version=version)
+        rows = cache.get(key)
+        if rows is None:
+            rows = [dict(row) for row in LanguageStaticSerializer(Language.objects.all(), many=True).data]
+            cache.set(key, rows, 60 * 60 * 24)
+        return LanguageSnapshot(version, rows)
+
+    def _load_counters(self):
+        from rest_framework.fields import DateTimeField
+
+        from .models import Language
+        from .serializers import recent_contributors_row
+
+        languages = list(Language.objects.values('id', 'updated_at', *COUNTER_FIELDS))
+        estimates = {}
+        if apps.is_installed('contributions'):
+            from contributions.contributors import recent_contributors
+            estimates = recent_contributors()
+        updated_at = DateTimeField()
+        rows = {}
+        for language in languages:
+            row = {field: language[field] for field in COUNTER_FIELDS}
+            row['recent_contributors'] = recent_contributors_row(estimates.get(language['id'], {}))
+            row['updated_at'] = updated_at.to_representation(language['updated_at'])
+            rows[language['id']] = row
+        return rows, {language['id']: language['updated_at'] for language in languages}
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < get_check_interval():
+            return snapshot
+
+        with self._lock:
+            version = self._current_version()
+            if self._snapshot is None or self._snapshot.version != version:
+                self._snapshot = self._load(version)
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def counters(self):
+        counters = self._counters
+        if counters is not None and time.monotonic() - self._counters_checked_at < get_check_interval():
+            return counters
+
+        with self._lock:
+            day = timezone.localdate()
+            key = COUNTERS_KEY.format(day=day.isoformat())
+            data = cache.get(key)
+            if data is None:
+                data = self._load_counters()
+                cache.set(key, data, get_counters_ttl())
+            self._counters = LanguageCounters(day, *data)
+            self._counters_checked_at = time.monotonic()
+            return self._counters
+
+    def invalidate(self):
+        """Drop this process's snapshot and counters and tell the other processes to do the same"""
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 1, None)
+        cache.delete(COUNTERS_KEY.format(day=timezone.localdate().isoformat()))
+        with self._lock:
+            self._snapshot = None
+            self._counters = None
+
+    def invalidate_on_commit(self):
+        transaction.on_commit(self.invalidate)
+
+    def _full_row(self, row, counters):
+        from .serializers import LanguageSerializer, recent_contributors_row
+
+        volatile = counters.rows.get(row['id'])
+        if volatile is None:
+            # Created since the counters were loaded
+            volatile = dict.fromkeys(COUNTER_FIELDS, 0)
+            volatile.update(recent_contributors=recent_contributors_row({}), updated_at=None)
+        merged = {**row, **volatile}
+        return {field: merged[field] for field in LanguageSerializer.Meta.fields}
+
+    def rows(self):
+        """Full LanguageSerializer rows of every language"""
+        counters = self.counters()
+        return [self._full_row(row, counters) for row in self.snapshot().rows]
+
+    def get(self, pk):
+        row = self.snapshot().by_id.get(pk)
+        return self._full_row(row, self.counters()) if row else None
+
+    def get_by_code(self, code):
+        return self.get(self.id_for_code(code))
+
+    def id_for_code(self, code):
+        return self.snapshot().ids_by_code.get(code)
+
+    def name_for(self, pk):
+        row = self.snapshot().by_id.get(pk)
+        return row['name'] if row else None
+
+
+language_registry = LanguageRegistry()
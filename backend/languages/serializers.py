@@ -1,26 +1,82 @@
 from rest_framework import serializers
 from .models import Language
 
+
+def recent_contributors_row(by_window):
+    """Serialize {days: estimate} as {'last_7_days': n, ...}"""
+    from contributions.contributors import RECENT_WINDOWS
+
+    return {f'last_{days}_days': by_window.get(days, 0) for days in RECENT_WINDOWS}
+
+
 class LanguageSerializer(serializers.ModelSerializer):
     """
     Serializer for the Language model
+
+    contributors_count is the exact number of distinct contributors;
+    recent_contributors estimates it over the last 7 and 30 days.
     """
+    recent_contributors = serializers.SerializerMethodField()
+    
     class Meta:
         model = Language
         fields = [
             'id', 'name', 'code', 'category', 'description',
-            'contributors_count', 'words_count', 'sentences_count',
-            'audio_count', 'created_at', 'updated_at'
+            'contributors_count', 'recent_contributors', 'words_count',
+            'sentences_count', 'audio_count', 'consensus_min_reviews',
+            'consensus_accept_ratio', 'consensus_reject_ratio', 'created_at', 'updated_at'
         ]
         read_only_fields = [
             'contributors_count', 'words_count', 'sentences_count',
-            'audio_count', 'created_at', 'updated_at'
+            'audio_count', 'consensus_min_reviews', 'consensus_accept_ratio',
+            'consensus_reject_ratio', 'created_at', 'updated_at'
         ]
         
+    def get_recent_contributors(self, obj):
+        from contributions.contributors import recent_contributors
+        
+        # Pass {language_id: {days: estimate}} as context to serialize many at once
+        estimates = self.context.get('recent_contributors')
+        if estimates is None:
+            estimates = recent_contributors([obj.pk])
+        return recent_contributors_row(estimates.get(obj.pk, {}))
+        
+class LanguageStaticSerializer(LanguageSerializer):
+    """
+    LanguageSerializer without the counters, contributor estimates and
+    updated_at, which change with every contribution; cached by the registry
+    """
+    recent_contributors = None
+    
+    class Meta(LanguageSerializer.Meta):
+        fields = [
+            'id', 'name', 'code', 'category', 'description', 'consensus_min_reviews',
+            'consensus_accept_ratio', 'consensus_reject_ratio', 'created_at'
+        ]
+        
+
 class LanguageListSerializer(serializers.ModelSerializer):
     """
     Simplified serializer for listing languages
     """
     class Meta:
         model = Language
-        fields = ['id', 'name', 'code', 'category', 'contributors_count', 'words_count']
\ No newline at end of file
+        fields = ['id', 'name', 'code', 'category', 'contributors_count', 'words_count']
+
+class RegisteredLanguageField(serializers.Field):
+    """
+    Read-only nested language in LanguageListSerializer's shape, looked up in
+    the language registry by id instead of joined in
+    """
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'language_id')
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, language_id):
+        from .registry import language_registry
+
+        row = language_registry.get(language_id)
+        if row is None:
+            return None
+        return {field: row[field] for field in LanguageListSerializer.Meta.fields}
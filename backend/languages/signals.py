@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Language
+from .registry import language_registry
+
+
+@receiver(post_save, sender=Language)
+@receiver(post_delete, sender=Language)
+def invalidate_language_registry(sender, **kwargs):
+    language_registry.invalidate_on_commit()
@@ -1,3 +1,191 @@
-from django.test import TestCase
+from collections import Counter
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .checks import check_shared_cache
+from .models import Language
+from .registry import COUNTERS_KEY, VERSION_KEY, language_registry
+from .serializers import LanguageSerializer
+
+
+class LanguageRegistryTests(TestCase):
+    """
+    Registry lookups and signal-driven invalidation
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.swahili = Language.objects.create(name='Swahili', code='sw', category='bantu')
+        language_registry.invalidate()
+
+    def test_lookups_skip_the_database_once_warm(self):
+        language_registry.snapshot()
+        language_registry.counters()
+        with self.assertNumQueries(0):
+            self.assertEqual(language_registry.id_for_code('sw'), self.swahili.pk)
+            self.assertIsNone(language_registry.id_for_code('xx'))
+            response = self.client.get(reverse('language_detail', kwargs={'code': 'sw'}))
+        self.assertEqual(response.data['name'], 'Swahili')
+
+    def test_saving_a_language_invalidates_the_registry(self):
+        self.assertEqual(language_registry.get(self.swahili.pk)['name'], 'Swahili')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.swahili.name = 'Kiswahili'
+            self.swahili.save()
+        self.assertEqual(language_registry.get(self.swahili.pk)['name'], 'Kiswahili')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.swahili.delete()
+        self.assertIsNone(language_registry.id_for_code('sw'))
+
+    @override_settings(LANGUAGE_REGISTRY_CHECK_INTERVAL=0)
+    def test_counters_are_cached_apart_from_the_snapshot(self):
+        from contributions.counters import apply_counter_deltas
+
+        language_registry.snapshot()
+        self.assertEqual(language_registry.get(self.swahili.pk)['words_count'], 0)
+        version = cache.get(VERSION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_counter_deltas({self.swahili.pk: Counter(words_count=2)}, Counter())
+
+        # New contributions leave the registry version alone, and counters
+        # lag until their cache entry expires
+        self.assertEqual(cache.get(VERSION_KEY), version)
+        with self.assertNumQueries(0):
+            self.assertEqual(language_registry.get(self.swahili.pk)['words_count'], 0)
+        cache.delete(COUNTERS_KEY.format(day=timezone.localdate().isoformat()))
+        row = language_registry.get(self.swahili.pk)
+        self.assertEqual(row['words_count'], 2)
+        self.assertEqual(list(row), LanguageSerializer.Meta.fields)
+
+
+class LanguageStatsTests(TestCase):
+    """
+    /api/languages/<code>/stats/ and its conditional GETs
+    """
+    @classmethod
+    def setUpTestData(cls):
+        from accounts.models import User
+
+        cls.language = Language.objects.create(name='Kikuyu', code='ki', category='bantu')
+        cls.user = User.objects.create_user(username='kamau', email='kamau@example.com', password='pass')
+
+    def setUp(self):
+        language_registry.invalidate()
+        self.client = APIClient()
+        self.url = reverse('language_stats', kwargs={'code': 'ki'})
+
+    def contribute(self, content_type):
+        from contributions.lifecycle import contributions_created
+        from contributions.models import Contribution
+
+        with self.captureOnCommitCallbacks(execute=True):
+            contribution = Contribution.objects.create(
+                user=self.user, language=self.language, type='text', content_type=content_type,
+                original_text='Ngai', translated_text='God',
+            )
+            contributions_created([contribution])
+        # Stand in for the counters cache expiring
+        cache.delete(COUNTERS_KEY.format(day=timezone.localdate().isoformat()))
+
+    @override_settings(LANGUAGE_REGISTRY_CHECK_INTERVAL=0)
+    def test_contributions_without_counters_change_the_etag(self):
+        self.contribute('sentence')
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # A story from a known contributor moves no Language counter
+        self.contribute('story')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            {'type': 'text', 'content_type': 'story', 'count': 1}, response.data['contribution_types']
+        )
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    """
+    The deploy check for a cache shared between processes
+    """
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_local_memory_cache_fails(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['languages.E001'])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379/1',
+    }})
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+
+class LanguageStatsTimeSeriesTests(TestCase):
+    """
+    /api/languages/<code>/stats/timeseries/, read from the daily rollup
+    """
+    @classmethod
+    def setUpTestData(cls):
+        from contributions.models import DailyContributionStats
+
+        cls.language = Language.objects.create(name='Kamba', code='kam', category='bantu')
+        cls.today = date(2024, 5, 15)  # A Wednesday
+        rows = [
+            (40, 'pending', 5, 0, 0, 0),
+            (3, 'pending', 2, 1, 0, 0),
+            (3, 'validated', 1, 0, 3, 2),
+            (1, 'pending', 1, 0, 2, 1),
+        ]
+        for days_ago, status, entered, left, validations, positive in rows:
+            DailyContributionStats.objects.create(
+                language=cls.language, day=cls.today - timedelta(days=days_ago), type='text',
+                content_type='sentence', status=status, entered_count=entered, left_count=left,
+                validations_count=validations, positive_validations_count=positive,
+            )
+
+    def setUp(self):
+        language_registry.invalidate()
+        self.client = APIClient()
+        self.url = reverse('language_stats_timeseries', kwargs={'code': 'kam'})
+
+    def get(self, **params):
+        return self.client.get(self.url, params)
+
+    def test_daily_buckets_fill_gaps_with_a_running_total(self):
+        response = self.get(since='2024-05-11', until='2024-05-15')
+        self.assertEqual(response.status_code, 200)
+        series = response.data['series']
+        self.assertEqual([entry['period'] for entry in series],
+                         ['2024-05-11', '2024-05-12', '2024-05-13', '2024-05-14', '2024-05-15'])
+        self.assertEqual([entry['new_contributions'] for entry in series], [0, 2, 0, 1, 0])
+        self.assertEqual([entry['total_contributions'] for entry in series], [5, 7, 7, 8, 8])
+        self.assertEqual(series[1]['validated'], 1)
+        self.assertEqual((series[1]['validations'], series[1]['positive_validations']), (3, 2))
+
+    def test_weekly_buckets_start_on_monday(self):
+        response = self.get(period='week', since='2024-05-08', until='2024-05-15')
+        self.assertEqual(response.data['since'], '2024-05-06')
+        series = response.data['series']
+        self.assertEqual([entry['period'] for entry in series], ['2024-05-06', '2024-05-13'])
+        self.assertEqual([entry['new_contributions'] for entry in series], [2, 1])
+        self.assertEqual(series[-1]['total_contributions'], 8)
+
+    def test_default_range(self):
+        response = self.get(until='2024-05-15')
+        self.assertEqual(len(response.data['series']), 30)
+        self.assertEqual(response.data['since'], '2024-04-16')
+
+    def test_invalid_parameters(self):
+        for params in [
+            {'until': 'abc'}, {'since': 'abc', 'until': '2024-05-15'}, {'until': '2024-02-30'},
+            {'since': '2024-05-16', 'until': '2024-05-15'}, {'since': '2023-01-01', 'until': '2024-05-15'},
+            {'period': 'month'},
+        ]:
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
+        self.assertEqual(self.get(since='2023-05-16', until='2024-05-15').status_code, 200)
+        missing = self.client.get(reverse('language_stats_timeseries', kwargs={'code': 'xx'}))
+        self.assertEqual(missing.status_code, 404)
@@ -1,8 +1,13 @@
 from django.urls import path
-from .views import LanguageListView, LanguageDetailView, LanguageStatsView
+from .views import (
+    LanguageListView, LanguageDetailView, LanguageStatsView, LanguageStatsTimeSeriesView,
+    LanguageAgreementView
+)
 
 urlpatterns = [
     path('', LanguageListView.as_view(), name='language_list'),
     path('<str:code>/', LanguageDetailView.as_view(), name='language_detail'),
     path('<str:code>/stats/', LanguageStatsView.as_view(), name='language_stats'),
+    path('<str:code>/stats/timeseries/', LanguageStatsTimeSeriesView.as_view(), name='language_stats_timeseries'),
+    path('<str:code>/stats/agreement/', LanguageAgreementView.as_view(), name='language_agreement'),
 ]
\ No newline at end of file
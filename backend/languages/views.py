@@ -5,9 +5,16 @@ from .models import Language
 from .serializers import LanguageSerializer, LanguageListSerializer
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Count, Sum
+from datetime import timedelta
+from django.db.models import F, Q, Sum
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.http import Http404
+from config.conditional import ConditionalListMixin, ConditionalGetMixin, make_etag
+from .registry import language_registry
 
-class LanguageListView(generics.ListAPIView):
+class LanguageListView(ConditionalListMixin, generics.ListAPIView):
     """
     API endpoint for listing all languages
     """
@@ -18,8 +25,32 @@ class LanguageListView(generics.ListAPIView):
     filterset_fields = ['category']
     search_fields = ['name', 'code']
     ordering_fields = ['name', 'contributors_count', 'words_count']
+    
+    def uses_registry(self):
+        # Plain (unfiltered, unsorted) listings are served from the language registry
+        return set(self.request.query_params) <= {self.paginator.page_query_param}
+    
+    def get_validators(self):
+        if not self.uses_registry():
+            return super().get_validators()
+        snapshot, counters = language_registry.snapshot(), language_registry.counters()
+        etag = make_etag(
+            self.request.path, sorted(self.request.query_params.lists()),
+            snapshot.version, counters.day, counters.last_modified
+        )
+        return etag, counters.last_modified
+    
+    def list(self, request, *args, **kwargs):
+        if not self.uses_registry():
+            return super().list(request, *args, **kwargs)
+        fields = LanguageListSerializer.Meta.fields
+        rows = [{field: row[field] for field in fields} for row in language_registry.rows()]
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(rows)
 
-class LanguageDetailView(generics.RetrieveAPIView):
+class LanguageDetailView(ConditionalGetMixin, generics.RetrieveAPIView):
     """
     API endpoint for retrieving a single language
     """
@@ -27,37 +58,175 @@ class LanguageDetailView(generics.RetrieveAPIView):
     serializer_class = LanguageSerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = 'code'
+    
+    def get_validators(self):
+        snapshot, counters = language_registry.snapshot(), language_registry.counters()
+        pk = snapshot.ids_by_code.get(self.kwargs['code'])
+        if pk is None:
+            raise Http404
+        updated_at = counters.updated_at.get(pk)
+        # recent_contributors is a rolling window, so the row also changes with the day
+        return make_etag(self.request.path, pk, snapshot.version, updated_at, counters.day), updated_at
+    
+    def retrieve(self, request, *args, **kwargs):
+        row = language_registry.get_by_code(kwargs['code'])
+        if row is None:
+            raise Http404
+        return Response(row)
 
-class LanguageStatsView(APIView):
+class LanguageStatsView(ConditionalGetMixin, APIView):
     """
     API endpoint for retrieving statistics about a language
     """
     permission_classes = [permissions.AllowAny]
     
+    def get_validators(self):
+        # Creating contributions bumps the language's updated_at, whether or
+        # not a counter moved (see contributions/counters.py); the counters
+        # are cached, so this lags by up to LANGUAGE_COUNTERS_TTL seconds
+        pk = language_registry.id_for_code(self.kwargs['code'])
+        if pk is None:
+            return None, None
+        counters = language_registry.counters()
+        updated_at = counters.updated_at.get(pk)
+        return make_etag(self.request.path, updated_at, counters.day), updated_at
+    
     def get(self, request, code):
-        try:
-            language = Language.objects.get(code=code)
+        not_modified = self.check_not_modified(request)
+        if not_modified:
+            return not_modified
+        
+        language = language_registry.get_by_code(code)
+        if language is None:
+            return Response({'error': 'Language not found'}, status=404)
+        
+        # Collect statistics about contributions for this language
+        stats = {
+            'total_words': language['words_count'],
+            'total_sentences': language['sentences_count'],
+            'total_audio': language['audio_count'],
+            'total_contributors': language['contributors_count'],
+            'recent_contributors': language['recent_contributors'],
+        }
+        
+        # Include contribution types distribution if contributions app is being used.
+        # It is read from the daily rollup, which stays small however many
+        # contributions there are, and the totals are derived from it
+        from django.apps import apps
+        if apps.is_installed('contributions'):
+            DailyContributionStats = apps.get_model('contributions', 'DailyContributionStats')
+            contribution_types = list(
+                DailyContributionStats.objects.filter(language_id=language['id'])
+                .values('type', 'content_type')
+                .annotate(count=Sum('entered_count') - Sum('left_count'))
+                .filter(count__gt=0)
+                .order_by('-count')
+            )
             
-            # Collect statistics about contributions for this language
-            stats = {
-                'total_words': language.words_count,
-                'total_sentences': language.sentences_count,
-                'total_audio': language.audio_count,
-                'total_contributors': language.contributors_count,
-            }
+            stats['total_words'] = sum(row['count'] for row in contribution_types
+                                       if row['type'] == 'text' and row['content_type'] == 'word')
+            stats['total_sentences'] = sum(row['count'] for row in contribution_types
+                                           if row['type'] == 'text' and row['content_type'] == 'sentence')
+            stats['total_audio'] = sum(row['count'] for row in contribution_types if row['type'] == 'audio')
+            stats['contribution_types'] = contribution_types
+        
+        return Response(stats)
+
+
+class LanguageStatsTimeSeriesView(APIView):
+    """
+    API endpoint for contribution growth and validation throughput of a
+    language over time, read from the daily stats rollup
+
+    Query parameters: period ('day' or 'week'), since and until (YYYY-MM-DD)
+    """
+    permission_classes = [permissions.AllowAny]
+    max_days = 366
+    default_buckets = {'day': 30, 'week': 12}
+    
+    def get(self, request, code):
+        language_id = language_registry.id_for_code(code)
+        if language_id is None:
+            return Response({'error': 'Language not found'}, status=404)
             
-            # Include contribution types distribution if contributions app is being used
-            from django.apps import apps
-            if apps.is_installed('contributions'):
-                Contribution = apps.get_model('contributions', 'Contribution')
-                contribution_types = Contribution.objects.filter(language=language)\
-                    .values('type', 'content_type')\
-                    .annotate(count=Count('id'))\
-                    .order_by('-count')
-                
-                stats['contribution_types'] = contribution_types
+        period = request.query_params.get('period', 'day')
+        if period not in self.default_buckets:
+            return Response({'error': "period must be 'day' or 'week'"}, status=400)
+        step = timedelta(days=7 if period == 'week' else 1)
+        
+        since = until = None
+        try:
+            until = parse_date(request.query_params['until']) if 'until' in request.query_params else timezone.localdate()
+            if 'since' in request.query_params:
+                since = parse_date(request.query_params['since'])
+            elif until is not None:
+                since = until - step * (self.default_buckets[period] - 1)
+        except ValueError:
+            # Well-formed but impossible dates, such as 2024-02-30
+            since = until = None
+        if since is None or until is None:
+            return Response({'error': 'since and until must be dates (YYYY-MM-DD)'}, status=400)
+        if period == 'week':
+            # Weeks start on Monday, as in TruncWeek
+            since -= timedelta(days=since.weekday())
+        if since > until or (until - since).days >= self.max_days:
+            return Response({'error': f'The range must cover between 1 and {self.max_days} days'}, status=400)
             
-            return Response(stats)
+        from django.apps import apps
+        DailyContributionStats = apps.get_model('contributions', 'DailyContributionStats')
+        rows = DailyContributionStats.objects.filter(language_id=language_id)
+        
+        before = rows.filter(day__lt=since).aggregate(entered=Sum('entered_count'), left=Sum('left_count'))
+        total = (before['entered'] or 0) - (before['left'] or 0)
+        
+        buckets = rows.filter(day__range=(since, until))\
+            .annotate(period=TruncWeek('day') if period == 'week' else F('day'))\
+            .values('period')\
+            .annotate(
+                new_contributions=Sum('entered_count') - Sum('left_count'),
+                validated=Sum('entered_count', filter=Q(status='validated')),
+                rejected=Sum('entered_count', filter=Q(status='rejected')),
+                validations=Sum('validations_count'),
+                positive_validations=Sum('positive_validations_count'),
+            )
+        by_period = {row['period']: row for row in buckets}
+        
+        # One entry per period, including quiet ones, with a running total
+        series = []
+        start = since
+        while start <= until:
+            row = by_period.get(start, {})
+            total += row.get('new_contributions') or 0
+            series.append({
+                'period': start.isoformat(),
+                'new_contributions': row.get('new_contributions') or 0,
+                'total_contributions': total,
+                'validated': row.get('validated') or 0,
+                'rejected': row.get('rejected') or 0,
+                'validations': row.get('validations') or 0,
+                'positive_validations': row.get('positive_validations') or 0,
+            })
+            start += step
             
-        except Language.DoesNotExist:
+        return Response({
+            'language': code,
+            'period': period,
+            'since': since.isoformat(),
+            'until': until.isoformat(),
+            'series': series,
+        })
+
+class LanguageAgreementView(APIView):
+    """
+    API endpoint for inter-annotator agreement on a language's contributions,
+    overall and per content type (Fleiss' kappa and Krippendorff's alpha)
+    """
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request, code):
+        language_id = language_registry.id_for_code(code)
+        if language_id is None:
             return Response({'error': 'Language not found'}, status=404)
+            
+        from validations.agreement import language_agreement
+        return Response({'language': code, **language_agreement(language_id)})
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Validation
+from .models import Validation, ValidationLease, ValidatorReliability, ConsensusRun
 
 @admin.register(Validation)
 class ValidationAdmin(admin.ModelAdmin):
@@ -23,3 +23,29 @@ class ValidationAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+@admin.register(ValidationLease)
+class ValidationLeaseAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for the ValidationLease model
+    """
+    list_display = ('contribution', 'validator', 'created_at', 'expires_at')
+    search_fields = ('validator__username',)
+    readonly_fields = ('created_at',)
+
+@admin.register(ValidatorReliability)
+class ValidatorReliabilityAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for the ValidatorReliability model
+    """
+    list_display = ('validator', 'sensitivity', 'specificity', 'validations_count', 'updated_at')
+    search_fields = ('validator__username',)
+    readonly_fields = ('validator', 'sensitivity', 'specificity', 'validations_count', 'updated_at')
+
+@admin.register(ConsensusRun)
+class ConsensusRunAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for the ConsensusRun model
+    """
+    list_display = ('started_at', 'finished_at', 'incremental', 'iterations', 'contributions_scored', 'status_changes')
+    list_filter = ('incremental',)
@@ -0,0 +1,171 @@
+"""
+Inter-annotator agreement per language and content type.
+
+Verdicts are binary and contributions get different numbers of reviews, so
+both metrics are taken in their variable-raters form, over contributions
+with at least two reviews:
+
+- Fleiss' kappa compares the pairwise agreement observed on each
+  contribution, averaged, with the agreement expected by chance from the
+  overall share of accepts.
+- Krippendorff's alpha (nominal) is 1 - (n - 1) * D / (n_accept * n_reject),
+  where D sums accepts * rejects / (reviews - 1) over contributions.
+
+Both only depend on sums over contributions, which are kept per content type
+(see STATS) and cached per language together with the id of the newest
+validation they include. A later read loads just the contributions that got a
+validation since then, subtracts what they added before and adds what they
+add now. The sums are rebuilt from scratch once they are older than
+AGREEMENT_REBUILD_INTERVAL, which also accounts for deleted rows.
+"""
+import time
+from array import array
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from contributions.models import Contribution
+from .models import Validation
+
+CONTENT_TYPES = list(Contribution.ContentType.values)
+# Per content type: contributions, reviews, accepts, summed pairwise
+# agreement and summed accept/reject disagreement
+STATS = ('items', 'ratings', 'accepts', 'agreement', 'disagreement')
+CACHE_KEY = 'validations:agreement:{language_id}'
+
+
+def get_rebuild_interval():
+    return getattr(settings, 'AGREEMENT_REBUILD_INTERVAL', 24 * 60 * 60)
+
+
+def load_columns(validations, chunk_size=20000):
+    """
+    Load validation rows as arrays: the dense index of each row's contribution,
+    the row's id and verdict, and the content type code of each contribution
+    """
+    index = {}
+    codes, items, ids, labels = array('b'), array('l'), array('q'), array('b')
+    code_for = {content_type: code for code, content_type in enumerate(CONTENT_TYPES)}
+    rows = validations.order_by().values_list('contribution_id', 'contribution__content_type', 'id', 'is_valid')
+    for contribution_id, content_type, pk, is_valid in rows.iterator(chunk_size=chunk_size):
+        position = index.get(contribution_id)
+        if position is None:
+            position = index[contribution_id] = len(index)
+            codes.append(code_for[content_type])
+        items.append(position)
+        ids.append(pk)
+        labels.append(is_valid)
+    return (
+        np.frombuffer(items, dtype=np.dtype(items.typecode)),
+        np.frombuffer(ids, dtype=np.int64),
+        np.frombuffer(labels, dtype=np.int8).astype(float),
+        np.frombuffer(codes, dtype=np.int8).astype(np.intp),
+    )
+
+
+def item_stats(accepts, ratings, codes):
+    """
+    Sum STATS per content type for contributions with `accepts` positive out
+    of `ratings` reviews. Returns an array of shape (len(CONTENT_TYPES), len(STATS)).
+    """
+    pairable = ratings >= 2
+    accepts, ratings, codes = accepts[pairable], ratings[pairable], codes[pairable]
+    rejects = ratings - accepts
+    columns = (
+        np.ones_like(ratings),
+        ratings,
+        accepts,
+        (accepts * (accepts - 1) + rejects * (rejects - 1)) / (ratings * (ratings - 1)),
+        accepts * rejects / (ratings - 1),
+    )
+    return np.stack([
+        np.bincount(codes, weights=column, minlength=len(CONTENT_TYPES)) for column in columns
+    ], axis=1)
+
+
+def build_stats(language_id):
+    """Sum STATS for every validated contribution of a language"""
+    items, ids, labels, codes = load_columns(Validation.objects.filter(contribution__language_id=language_id))
+    stats = item_stats(
+        np.bincount(items, weights=labels, minlength=len(codes)),
+        np.bincount(items, minlength=len(codes)).astype(float),
+        codes,
+    )
+    return {'stats': stats.tolist(), 'watermark': int(ids.max()) if len(ids) else 0, 'built_at': time.time()}
+
+
+def refresh_stats(language_id, cached):
+    """
+    Bring cached sums up to date with the validations added since they were
+    computed. Returns None when there are none.
+    """
+    touched = Validation.objects.filter(
+        contribution__language_id=language_id, id__gt=cached['watermark']
+    ).values('contribution_id')
+    items, ids, labels, codes = load_columns(Validation.objects.filter(contribution_id__in=touched))
+    if not len(ids):
+        return None
+
+    earlier = (ids <= cached['watermark']).astype(float)
+    n = len(codes)
+    stats = np.array(cached['stats']) \
+        - item_stats(np.bincount(items, weights=labels * earlier, minlength=n),
+                     np.bincount(items, weights=earlier, minlength=n), codes) \
+        + item_stats(np.bincount(items, weights=labels, minlength=n),
+                     np.bincount(items, minlength=n).astype(float), codes)
+    return {'stats': stats.tolist(), 'watermark': int(ids.max()), 'built_at': cached['built_at']}
+
+
+def agreement_metrics(row):
+    """Fleiss' kappa and Krippendorff's alpha from one row of STATS"""
+    items, ratings, accepts, agreement, disagreement = row
+    items, ratings = int(round(items)), int(round(ratings))
+    metrics = {
+        'contributions': items,
+        'validations': ratings,
+        'accept_share': None,
+        'observed_agreement': None,
+        'fleiss_kappa': None,
+        'krippendorff_alpha': None,
+    }
+    if not items:
+        return metrics
+
+    share = accepts / ratings
+    observed = agreement / items
+    expected = share ** 2 + (1 - share) ** 2
+    metrics['accept_share'] = round(share, 4)
+    metrics['observed_agreement'] = round(observed, 4)
+    # Both metrics are undefined when every verdict is the same
+    if 1 - expected > 1e-9:
+        metrics['fleiss_kappa'] = round((observed - expected) / (1 - expected), 4)
+        metrics['krippendorff_alpha'] = round(1 - (ratings - 1) * disagreement / (accepts * (ratings - accepts)), 4)
+    return metrics
+
+
+def language_agreement(language_id):
+    """
+    Agreement metrics for a language, overall and per content type, from
+    the cached sums brought up to date
+    """
+    key = CACHE_KEY.format(language_id=language_id)
+    cached = cache.get(key)
+    if cached is None or time.time() - cached['built_at'] > get_rebuild_interval():
+        cached = build_stats(language_id)
+        cache.set(key, cached, None)
+    else:
+        refreshed = refresh_stats(language_id, cached)
+        if refreshed is not None:
+            cached = refreshed
+            cache.set(key, cached, None)
+
+    stats = np.array(cached['stats'])
+    return {
+        'overall': agreement_metrics(stats.sum(axis=0)),
+        'content_types': {
+            content_type: agreement_metrics(row)
+            for content_type, row in zip(CONTENT_TYPES, stats)
+            if round(row[0])
+        },
+    }
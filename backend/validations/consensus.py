@@ -0,0 +1,111 @@
+"""
+Consensus rules that turn validation counts into a contribution status.
+"""
+from math import ceil
+
+from django.utils import timezone
+
+from contributions.models import Contribution
+from contributions.rollup import collect_status_change, collect_validation
+
+
+def consensus_status(validations_count, positive_validations, language, current_status):
+    """
+    Status a contribution should have after `validations_count` reviews, of
+    which `positive_validations` were positive, under `language`'s thresholds.
+
+    Below the minimum number of reviews, or between the two ratios, the
+    current status is kept.
+    """
+    if validations_count < language.consensus_min_reviews:
+        return current_status
+    return status_for_score(positive_validations / validations_count, language, current_status)
+
+
+def status_for_score(score, language, current_status):
+    """
+    Status for a consensus score in [0, 1], either the raw share of positive
+    reviews or a reputation-weighted posterior, under `language`'s thresholds
+    """
+    if score >= language.consensus_accept_ratio:
+        return 'validated'
+    if score <= language.consensus_reject_ratio:
+        return 'rejected'
+    return current_status
+
+
+# Stands in for "no number of further reviews can settle it", and fits the column
+MAX_REVIEWS_NEEDED = 32767
+_EPS = 1e-9
+
+
+def reviews_needed(validations_count, positive_validations, language):
+    """
+    Fewest further reviews after which a pending contribution with these
+    counts could be accepted or rejected under `language`'s thresholds,
+    if they all went the same way. At least one, since the status only
+    changes on a new verdict.
+    """
+    n, positive = validations_count, positive_validations
+    accept, reject = language.consensus_accept_ratio, language.consensus_reject_ratio
+    # k further accepts settle it once (positive + k) / (n + k) >= accept
+    if positive >= accept * n:
+        to_accept = 0
+    elif accept < 1:
+        to_accept = ceil((accept * n - positive) / (1 - accept) - _EPS)
+    else:
+        to_accept = MAX_REVIEWS_NEEDED
+    # k further rejects settle it once positive / (n + k) <= reject
+    if positive <= reject * n:
+        to_reject = 0
+    elif reject > 0:
+        to_reject = ceil(positive / reject - n - _EPS)
+    else:
+        to_reject = MAX_REVIEWS_NEEDED
+    needed = max(language.consensus_min_reviews - n, min(to_accept, to_reject), 1)
+    return min(needed, MAX_REVIEWS_NEEDED)
+
+
+def refresh_reviews_needed(language):
+    """
+    Recompute reviews_needed for a language's pending contributions after its
+    thresholds change, with one UPDATE per distinct pair of counts
+    """
+    pending = Contribution.objects.filter(language=language, status='pending')
+    pairs = list(pending.order_by().values_list('validations_count', 'positive_validations').distinct())
+    for validations_count, positive_validations in pairs:
+        needed = reviews_needed(validations_count, positive_validations, language)
+        pending.filter(
+            validations_count=validations_count, positive_validations=positive_validations
+        ).exclude(reviews_needed=needed).update(reviews_needed=needed)
+
+
+def apply_verdict(contribution, is_valid, rollup_deltas=None):
+    """
+    Count one new verdict on a contribution and write its counts and status
+    back with a single UPDATE.
+
+    The contribution must be locked by the caller and loaded with its
+    language. Returns the rollup deltas for the verdict and any status change.
+    """
+    previous_status = contribution.status
+    contribution.validations_count += 1
+    if is_valid:
+        contribution.positive_validations += 1
+    contribution.status = consensus_status(
+        contribution.validations_count, contribution.positive_validations,
+        contribution.language, contribution.status
+    )
+    contribution.reviews_needed = 0 if contribution.status != 'pending' else reviews_needed(
+        contribution.validations_count, contribution.positive_validations, contribution.language
+    )
+    contribution.updated_at = timezone.now()
+    Contribution.objects.filter(pk=contribution.pk).update(
+        validations_count=contribution.validations_count,
+        positive_validations=contribution.positive_validations,
+        status=contribution.status,
+        reviews_needed=contribution.reviews_needed,
+        updated_at=contribution.updated_at,
+    )
+    rollup_deltas = collect_status_change(contribution, previous_status, rollup_deltas)
+    return collect_validation(contribution, is_valid, rollup_deltas)
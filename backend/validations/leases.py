@@ -0,0 +1,135 @@
+"""
+Leased validation work queue.
+
+Validators ask for a batch of pending contributions and get each one reserved
+for a limited time. Candidate rows are locked with SELECT ... FOR UPDATE SKIP
+LOCKED, so concurrent validators never wait on each other and never receive
+the same contribution beyond the per-contribution lease cap. A contribution
+holds at most as many active leases as the reviews it still needs (see
+consensus.reviews_needed), and never more than
+VALIDATION_MAX_OUTSTANDING_REVIEWS. Expired leases simply stop counting and
+are purged lazily or by `expire_validation_leases`.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Least
+from django.utils import timezone
+
+from contributions.models import Contribution
+from .models import ValidationLease
+
+DEFAULT_LEASE_TTL = timedelta(minutes=15)
+DEFAULT_MAX_OUTSTANDING_REVIEWS = 3
+MAX_BATCH_SIZE = 50
+
+
+def get_lease_ttl():
+    return getattr(settings, 'VALIDATION_LEASE_TTL', DEFAULT_LEASE_TTL)
+
+
+def get_max_outstanding_reviews():
+    return getattr(settings, 'VALIDATION_MAX_OUTSTANDING_REVIEWS', DEFAULT_MAX_OUTSTANDING_REVIEWS)
+
+
+def _active_lease_counts(now):
+    """Subquery counting unexpired leases per contribution"""
+    return Coalesce(
+        Subquery(
+            ValidationLease.objects.filter(contribution=OuterRef('pk'), expires_at__gt=now)
+            .order_by()
+            .values('contribution')
+            .annotate(n=Count('id'))
+            .values('n')[:1]
+        ),
+        Value(0),
+    )
+
+
+def lease_contributions(validator, limit=10, language=None):
+    """
+    Reserve up to `limit` pending contributions for `validator`.
+
+    Leases the validator already holds are renewed and returned first.
+    Returns a list of (contribution, expires_at) ordered by priority.
+    """
+    limit = max(1, min(limit, MAX_BATCH_SIZE))
+    max_outstanding = get_max_outstanding_reviews()
+    now = timezone.now()
+    expires_at = now + get_lease_ttl()
+
+    with transaction.atomic():
+        # Reclaim this validator's expired leases so they can be re-issued
+        ValidationLease.objects.filter(validator=validator, expires_at__lte=now).delete()
+
+        held = ValidationLease.objects.filter(validator=validator, contribution__status='pending')
+        if language is not None:
+            held = held.filter(contribution__language=language)
+        held_ids = list(held.values_list('contribution_id', flat=True)[:limit])
+        if held_ids:
+            ValidationLease.objects.filter(
+                validator=validator, contribution_id__in=held_ids
+            ).update(expires_at=expires_at)
+
+        leased_ids = list(held_ids)
+        wanted = limit - len(leased_ids)
+        if wanted > 0:
+            candidates = Contribution.objects.filter(status='pending').exclude(
+                user=validator
+            ).exclude(
+                validations__validator=validator
+            ).exclude(
+                validation_leases__validator=validator
+            ).annotate(
+                active_leases=_active_lease_counts(now)
+            ).filter(
+                active_leases__lt=Least('reviews_needed', Value(max_outstanding))
+            )
+            if language is not None:
+                candidates = candidates.filter(language=language)
+
+            # Rows other validators are currently leasing are skipped rather
+            # than waited on. Items closest to consensus go first, then oldest.
+            locked = dict(
+                candidates.order_by('reviews_needed', 'created_at')
+                .select_for_update(skip_locked=True, of=('self',))
+                .values_list('id', 'reviews_needed')[:wanted]
+            )
+            locked_ids = list(locked)
+
+            if locked_ids:
+                # Re-count under the row locks: a lease committed after this
+                # statement's snapshot would otherwise slip past the cap
+                counts = dict(
+                    ValidationLease.objects.filter(
+                        contribution_id__in=locked_ids, expires_at__gt=now
+                    ).order_by().values('contribution_id').annotate(n=Count('id'))
+                    .values_list('contribution_id', 'n')
+                )
+                new_ids = [
+                    pk for pk in locked_ids if counts.get(pk, 0) < min(locked[pk], max_outstanding)
+                ]
+                ValidationLease.objects.filter(
+                    contribution_id__in=new_ids, expires_at__lte=now
+                ).delete()
+                ValidationLease.objects.bulk_create([
+                    ValidationLease(contribution_id=pk, validator=validator, expires_at=expires_at)
+                    for pk in new_ids
+                ])
+                leased_ids.extend(new_ids)
+
+    contributions = Contribution.objects.select_related('user').in_bulk(leased_ids)
+    return [(contributions[pk], expires_at) for pk in leased_ids if pk in contributions]
+
+
+def release_lease(contribution, validator):
+    """Drop the validator's lease once their verdict has been recorded"""
+    ValidationLease.objects.filter(contribution=contribution, validator=validator).delete()
+
+
+def purge_expired_leases(now=None):
+    """Delete every expired lease; returns the number removed"""
+    deleted, _ = ValidationLease.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    return deleted
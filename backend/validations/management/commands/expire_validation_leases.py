@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from validations.leases import purge_expired_leases
+
+class Command(BaseCommand):
+    help = 'Delete expired validation leases so their contributions can be re-issued'
+
+    def handle(self, *args, **kwargs):
+        deleted = purge_expired_leases()
+        self.stdout.write(self.style.SUCCESS(f'Removed {deleted} expired leases'))
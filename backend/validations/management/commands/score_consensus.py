@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from validations.reputation import CHUNK_SIZE, MAX_ITERATIONS, TOLERANCE, run_consensus
+
+
+class Command(BaseCommand):
+    help = 'Re-score contributions with reputation-weighted (Dawid-Skene) consensus and update their status'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only re-score contributions validated since the last run')
+        parser.add_argument('--max-iterations', type=int, default=MAX_ITERATIONS)
+        parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Report the changes without writing them')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        run = run_consensus(
+            incremental=options['incremental'],
+            max_iterations=options['max_iterations'],
+            tolerance=options['tolerance'],
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+        )
+        mode = 'Incremental' if run.incremental else f'Full ({run.iterations} iterations)'
+        prefix = '[dry run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}{mode}: scored {run.contributions_scored} contributions, '
+            f'{run.status_changes} status changes in {time.monotonic() - started:.1f}s'
+        ))
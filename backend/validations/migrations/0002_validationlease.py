@@ -0,0 +1,31 @@
+# Generated by Django 4.2.21 on 2026-10-18 15:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('contributions', '0003_contribution_search_index'),
+        ('validations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValidationLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('contribution', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='validation_leases', to='contributions.contribution')),
+                ('validator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='validation_leases', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['contribution', 'expires_at'], name='lease_contribution_exp_idx'), models.Index(fields=['validator', 'expires_at'], name='lease_validator_exp_idx')],
+                'unique_together': {('contribution', 'validator')},
+            },
+        ),
+    ]
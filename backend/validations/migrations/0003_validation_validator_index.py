@@ -0,0 +1,17 @@
+# Generated by Django 4.2.21 on 2026-10-18 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('validations', '0002_validationlease'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='validation',
+            index=models.Index(fields=['validator', '-created_at'], name='validation_validator_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.21 on 2026-10-18 16:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('validations', '0003_validation_validator_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsensusRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('incremental', models.BooleanField(default=False)),
+                ('prevalence', models.FloatField(blank=True, null=True)),
+                ('iterations', models.PositiveIntegerField(default=0)),
+                ('contributions_scored', models.PositiveIntegerField(default=0)),
+                ('status_changes', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ValidatorReliability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sensitivity', models.FloatField()),
+                ('specificity', models.FloatField()),
+                ('validations_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('validator', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='validation_reliability', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Validator reliabilities',
+            },
+        ),
+    ]
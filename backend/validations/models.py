@@ -1,6 +1,13 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
+from accounts.leaderboards import apply_score_deltas, collect_validation_score
+from accounts.profiles import invalidate_cached_profile
+from contributions.models import Contribution
+from contributions.rollup import apply_rollup_deltas
+from .consensus import apply_verdict
 
 class Validation(models.Model):
     """
@@ -15,34 +22,105 @@ class Validation(models.Model):
     class Meta:
         unique_together = ('contribution', 'validator')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['validator', '-created_at'], name='validation_validator_idx'),
+        ]
         
     def __str__(self):
         return f"Validation on {self.contribution.id} by {self.validator.username}"
         
     def save(self, *args, **kwargs):
+        """
+        Save the validation and apply it to the contribution's consensus.
+
+        Everything happens in one transaction, and the contribution row is
+        locked before the validation is inserted. Concurrent validations of one
+        contribution therefore apply one after another, each starting from the
+        counts and status the previous one left.
+        """
         # Track if this is a new validation
         is_new = self.pk is None
-        
-        # Call the original save method
-        super().save(*args, **kwargs)
-        
-        # Update contribution validation counters
-        if is_new:
-            contribution = self.contribution
-            contribution.validations_count += 1
-            if self.is_valid:
-                contribution.positive_validations += 1
-                
-            # Auto-update status based on validation threshold (customizable)
-            if contribution.validations_count >= 3:  # minimum 3 validations
-                if contribution.validation_ratio >= 0.7:  # 70% positive threshold
-                    contribution.status = 'validated'
-                elif contribution.validation_ratio <= 0.3:  # 30% positive threshold
-                    contribution.status = 'rejected'
-                    
-            contribution.save()
+        if not is_new:
+            return super().save(*args, **kwargs)
+            
+        with transaction.atomic():
+            # Lock the contribution first, so that nothing is written before
+            # the lock is held. NO KEY lets rows that merely reference the
+            # contribution (leases, other validations' inserts) proceed
+            contribution = Contribution.objects.select_related('language')\
+                .select_for_update(no_key=True, of=('self',))\
+                .get(pk=self.contribution_id)
+            self.contribution = contribution
+            super().save(*args, **kwargs)
+            
+            # Update contribution validation counters and re-evaluate consensus,
+            # keeping the daily stats rollup and leaderboards in step
+            rollup_deltas = apply_verdict(contribution, self.is_valid)
+            apply_score_deltas(collect_validation_score(self))
             
             # Update validator's validation count
-            validator = self.validator
-            validator.total_validations += 1
-            validator.save()
+            get_user_model().objects.filter(pk=self.validator_id).update(
+                total_validations=F('total_validations') + 1
+            )
+            invalidate_cached_profile(self.validator_id)
+            # The shared daily rollup row last, so its lock is held only until commit
+            apply_rollup_deltas(rollup_deltas)
+
+class ValidationLease(models.Model):
+    """
+    A time-limited reservation of a pending contribution for one validator
+    """
+    contribution = models.ForeignKey('contributions.Contribution', on_delete=models.CASCADE, related_name='validation_leases')
+    validator = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='validation_leases')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ('contribution', 'validator')
+        indexes = [
+            models.Index(fields=['contribution', 'expires_at'], name='lease_contribution_exp_idx'),
+            models.Index(fields=['validator', 'expires_at'], name='lease_validator_exp_idx'),
+        ]
+        
+    def __str__(self):
+        return f"Lease on {self.contribution_id} for {self.validator_id} until {self.expires_at}"
+
+class ValidatorReliability(models.Model):
+    """
+    A validator's reliability as estimated by the reputation-weighted consensus job
+
+    Sensitivity is the chance they accept a correct contribution, specificity
+    the chance they reject an incorrect one. Written by validations/reputation.py.
+    """
+    validator = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='validation_reliability')
+    sensitivity = models.FloatField()
+    specificity = models.FloatField()
+    validations_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'Validator reliabilities'
+        
+    def __str__(self):
+        return f"{self.validator_id}: sensitivity {self.sensitivity:.2f}, specificity {self.specificity:.2f}"
+
+class ConsensusRun(models.Model):
+    """
+    One run of the reputation-weighted consensus job
+
+    The start time of the last finished run is the watermark for incremental runs.
+    """
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    incremental = models.BooleanField(default=False)
+    prevalence = models.FloatField(null=True, blank=True)
+    iterations = models.PositiveIntegerField(default=0)
+    contributions_scored = models.PositiveIntegerField(default=0)
+    status_changes = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-started_at']
+        
+    def __str__(self):
+        mode = 'incremental' if self.incremental else 'full'
+        return f"{mode} consensus run at {self.started_at}"
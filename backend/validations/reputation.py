@@ -0,0 +1,239 @@
+"""
+Reputation-weighted consensus with the Dawid-Skene model.
+
+Each contribution is assumed to be either correct or not, and each validator
+accepts a correct contribution with probability `sensitivity` and rejects an
+incorrect one with probability `specificity`. EM alternates between estimating
+those reliabilities from the current posteriors (M-step) and re-estimating
+each contribution's posterior from the reliabilities of its validators
+(E-step). Verdicts are held as flat (item, validator, label) arrays, and both
+steps are a few np.bincount calls over them.
+
+A full run fits the model on every verdict and stores the reliabilities in
+ValidatorReliability. An incremental run only re-scores contributions that got
+a verdict since the last run started, holding the stored reliabilities fixed.
+Posteriors are written to Contribution.consensus_score, and once a contribution
+has the language's minimum number of reviews its status follows the
+language's accept/reject thresholds applied to the posterior.
+"""
+from array import array
+from collections import defaultdict, namedtuple
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from contributions.models import Contribution
+from contributions.rollup import apply_rollup_deltas, collect_status_change
+from languages.models import Language
+
+from .consensus import status_for_score
+from .models import ConsensusRun, Validation, ValidatorReliability
+
+# Beta prior on every sensitivity and specificity, as pseudo-counts of right
+# and wrong verdicts; validators with few verdicts stay close to 0.8
+PRIOR_RIGHT = 4.0
+PRIOR_WRONG = 1.0
+DEFAULT_RELIABILITY = PRIOR_RIGHT / (PRIOR_RIGHT + PRIOR_WRONG)
+
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-4
+CHUNK_SIZE = 2000
+# Stored scores are rounded, so that rows can be written with one UPDATE per
+# distinct (status, score) pair instead of one CASE expression per row
+SCORE_DECIMALS = 2
+_EPS = 1e-6
+
+VerdictMatrix = namedtuple('VerdictMatrix', 'contribution_ids validator_ids items validators labels')
+DawidSkeneFit = namedtuple('DawidSkeneFit', 'posterior sensitivity specificity prevalence iterations')
+
+
+def load_verdicts(validations, chunk_size=20000):
+    """
+    Stream the (contribution, validator, is_valid) rows of `validations` into
+    a VerdictMatrix.
+
+    Contributions and validators are renumbered densely: `items[k]` indexes
+    `contribution_ids` and `validators[k]` indexes `validator_ids`.
+    """
+    contribution_index = {}
+    items, validators, labels = array('l'), array('l'), array('b')
+    rows = validations.order_by().values_list('contribution_id', 'validator_id', 'is_valid')
+    for contribution_id, validator_id, is_valid in rows.iterator(chunk_size=chunk_size):
+        items.append(contribution_index.setdefault(contribution_id, len(contribution_index)))
+        validators.append(validator_id)
+        labels.append(is_valid)
+
+    validator_ids, validator_positions = np.unique(
+        np.frombuffer(validators, dtype=np.dtype(validators.typecode)), return_inverse=True
+    )
+    return VerdictMatrix(
+        contribution_ids=list(contribution_index),
+        validator_ids=validator_ids,
+        items=np.frombuffer(items, dtype=np.dtype(items.typecode)),
+        validators=validator_positions,
+        labels=np.frombuffer(labels, dtype=np.int8).astype(bool),
+    )
+
+
+def posteriors(matrix, sensitivity, specificity, prevalence):
+    """E-step: probability that each contribution is correct, given the validators' reliabilities"""
+    # Log-likelihood ratio (correct vs incorrect) carried by an accept and by a reject
+    accept = np.log(sensitivity) - np.log1p(-specificity)
+    reject = np.log1p(-sensitivity) - np.log(specificity)
+    evidence = np.where(matrix.labels, accept[matrix.validators], reject[matrix.validators])
+    logit = np.log(prevalence) - np.log1p(-prevalence) + np.bincount(
+        matrix.items, weights=evidence, minlength=len(matrix.contribution_ids)
+    )
+    return np.exp(-np.logaddexp(0.0, -logit))
+
+
+def reliabilities(matrix, posterior):
+    """M-step: each validator's sensitivity and specificity, and the prevalence of correct contributions"""
+    truth = posterior[matrix.items]
+    labels = matrix.labels.astype(float)
+    n = len(matrix.validator_ids)
+    sensitivity = (np.bincount(matrix.validators, weights=truth * labels, minlength=n) + PRIOR_RIGHT) \
+        / (np.bincount(matrix.validators, weights=truth, minlength=n) + PRIOR_RIGHT + PRIOR_WRONG)
+    specificity = (np.bincount(matrix.validators, weights=(1 - truth) * (1 - labels), minlength=n) + PRIOR_RIGHT) \
+        / (np.bincount(matrix.validators, weights=1 - truth, minlength=n) + PRIOR_RIGHT + PRIOR_WRONG)
+    prevalence = float(np.clip(posterior.mean(), _EPS, 1 - _EPS)) if len(posterior) else 0.5
+    return sensitivity, specificity, prevalence
+
+
+def dawid_skene(matrix, max_iterations=MAX_ITERATIONS, tolerance=TOLERANCE):
+    """
+    Fit the model by EM, starting from the (smoothed) majority vote.
+
+    Stops once no posterior moves by more than `tolerance` in an iteration.
+    """
+    n_items = len(matrix.contribution_ids)
+    positive = np.bincount(matrix.items, weights=matrix.labels, minlength=n_items)
+    posterior = (positive + 0.5) / (np.bincount(matrix.items, minlength=n_items) + 1.0)
+
+    iterations = 0
+    sensitivity, specificity, prevalence = reliabilities(matrix, posterior)
+    while iterations < max_iterations:
+        iterations += 1
+        updated = posteriors(matrix, sensitivity, specificity, prevalence)
+        change = float(np.abs(updated - posterior).max()) if n_items else 0.0
+        posterior = updated
+        sensitivity, specificity, prevalence = reliabilities(matrix, posterior)
+        if change < tolerance:
+            break
+    return DawidSkeneFit(posterior, sensitivity, specificity, prevalence, iterations)
+
+
+def stored_reliabilities(validator_ids):
+    """Sensitivity and specificity arrays for `validator_ids`, from the last full run"""
+    stored = {
+        validator_id: (sensitivity, specificity)
+        for validator_id, sensitivity, specificity
+        in ValidatorReliability.objects.values_list('validator_id', 'sensitivity', 'specificity')
+    }
+    default = (DEFAULT_RELIABILITY, DEFAULT_RELIABILITY)
+    pairs = np.array([stored.get(validator_id, default) for validator_id in validator_ids.tolist()], dtype=float)
+    pairs = pairs.reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def save_reliabilities(matrix, sensitivity, specificity, chunk_size=CHUNK_SIZE):
+    counts = np.bincount(matrix.validators, minlength=len(matrix.validator_ids))
+    ValidatorReliability.objects.bulk_create([
+        ValidatorReliability(
+            validator_id=validator_id, sensitivity=sens, specificity=spec, validations_count=count
+        )
+        for validator_id, sens, spec, count in zip(
+            matrix.validator_ids.tolist(), sensitivity.tolist(), specificity.tolist(), counts.tolist()
+        )
+    ], batch_size=chunk_size, update_conflicts=True, unique_fields=['validator'],
+        update_fields=['sensitivity', 'specificity', 'validations_count', 'updated_at'])
+
+
+def write_scores(matrix, posterior, chunk_size=CHUNK_SIZE, dry_run=False):
+    """
+    Store posteriors and apply the status changes they imply, one transaction
+    per chunk of contributions. Returns the number of status changes.
+
+    Rows are locked in primary key order, as the online validation paths do,
+    and only rows whose rounded score or status changes are written. A
+    verdict that lands after the matrix was loaded is picked up by the next
+    incremental run.
+    """
+    languages = Language.objects.in_bulk()
+    counts = np.bincount(matrix.items, minlength=len(matrix.contribution_ids)).tolist()
+    scores = posterior.tolist()
+    stored_scores = np.round(posterior, SCORE_DECIMALS).tolist()
+    status_changes = 0
+
+    for start in range(0, len(matrix.contribution_ids), chunk_size):
+        chunk = {
+            contribution_id: (scores[i], stored_scores[i], counts[i])
+            for i, contribution_id in enumerate(matrix.contribution_ids[start:start + chunk_size], start)
+        }
+        with transaction.atomic():
+            contributions = Contribution.objects.filter(pk__in=list(chunk)).order_by('pk')\
+                .select_for_update(no_key=True)\
+                .only('id', 'language_id', 'type', 'content_type', 'status', 'consensus_score')
+            decided, rescored, rollup_deltas = defaultdict(list), defaultdict(list), None
+            for contribution in contributions:
+                score, stored_score, reviews = chunk[contribution.pk]
+                language = languages[contribution.language_id]
+                previous_status = contribution.status
+                if reviews >= language.consensus_min_reviews:
+                    contribution.status = status_for_score(score, language, previous_status)
+
+                if contribution.status != previous_status:
+                    rollup_deltas = collect_status_change(contribution, previous_status, rollup_deltas)
+                    decided[(contribution.status, stored_score)].append(contribution.pk)
+                elif contribution.consensus_score != stored_score:
+                    rescored[stored_score].append(contribution.pk)
+
+            status_changes += sum(len(pks) for pks in decided.values())
+            if dry_run:
+                continue
+            now = timezone.now()
+            for (status, score), pks in decided.items():
+                Contribution.objects.filter(pk__in=pks).update(status=status, consensus_score=score, updated_at=now)
+            for score, pks in rescored.items():
+                Contribution.objects.filter(pk__in=pks).update(consensus_score=score)
+            if rollup_deltas:
+                apply_rollup_deltas(rollup_deltas)
+    return status_changes
+
+
+def run_consensus(incremental=False, max_iterations=MAX_ITERATIONS, tolerance=TOLERANCE,
+                  chunk_size=CHUNK_SIZE, dry_run=False):
+    """
+    Score contributions and return the ConsensusRun describing the run.
+
+    An incremental run without a finished run before it falls back to a
+    full run. Nothing is written when `dry_run` is set.
+    """
+    run = ConsensusRun(started_at=timezone.now(), incremental=incremental)
+    last_run = ConsensusRun.objects.filter(finished_at__isnull=False).first()
+    if last_run is None or last_run.prevalence is None:
+        run.incremental = False
+
+    validations = Validation.objects.all()
+    if run.incremental:
+        touched = Validation.objects.filter(created_at__gte=last_run.started_at).values('contribution_id')
+        validations = validations.filter(contribution_id__in=touched)
+    matrix = load_verdicts(validations)
+
+    if run.incremental:
+        sensitivity, specificity = stored_reliabilities(matrix.validator_ids)
+        run.prevalence = last_run.prevalence
+        posterior = posteriors(matrix, sensitivity, specificity, run.prevalence)
+    else:
+        fit = dawid_skene(matrix, max_iterations=max_iterations, tolerance=tolerance)
+        posterior, run.prevalence, run.iterations = fit.posterior, fit.prevalence, fit.iterations
+        if not dry_run:
+            save_reliabilities(matrix, fit.sensitivity, fit.specificity, chunk_size=chunk_size)
+
+    run.contributions_scored = len(matrix.contribution_ids)
+    run.status_changes = write_scores(matrix, posterior, chunk_size=chunk_size, dry_run=dry_run)
+    if not dry_run:
+        run.finished_at = timezone.now()
+        run.save()
+    return run
@@ -21,6 +21,24 @@ class ValidationCreateSerializer(serializers.ModelSerializer):
         model = Validation
         fields = ['contribution', 'is_valid', 'feedback']
         
+class ValidationBatchItemSerializer(serializers.Serializer):
+    """
+    Serializer for one verdict of a batch submission
+
+    The contribution is taken as a plain id here and resolved for the whole
+    batch at once by the view.
+    """
+    contribution = serializers.UUIDField()
+    is_valid = serializers.BooleanField()
+    feedback = serializers.CharField(required=False, allow_blank=True, default='')
+        
+class ValidationLeaseRequestSerializer(serializers.Serializer):
+    """
+    Serializer for a request to lease the next contributions to validate
+    """
+    limit = serializers.IntegerField(required=False, default=10)
+    language_code = serializers.CharField(required=False, allow_blank=True, default='')
+        
 class ValidationListSerializer(serializers.ModelSerializer):
     """
     Serializer for listing validations
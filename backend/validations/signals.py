@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from languages.models import Language
+
+from .consensus import refresh_reviews_needed
+
+
+@receiver(post_save, sender=Language)
+def refresh_review_queue(sender, instance, created, **kwargs):
+    # The thresholds may have changed, and with them what the queue serves first
+    if not created:
+        refresh_reviews_needed(instance)
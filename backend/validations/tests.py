@@ -1,3 +1,544 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User, UserLanguageFluency
+from contributions.models import Contribution, DailyContributionStats
+from languages.models import Language
+from languages.registry import language_registry
+from .agreement import language_agreement
+from .consensus import reviews_needed
+from .leases import lease_contributions, purge_expired_leases
+from .models import ConsensusRun, Validation, ValidationLease, ValidatorReliability
+from .reputation import run_consensus
+
+
+def make_contribution(user, language, text='Habari'):
+    return Contribution.objects.create(
+        user=user, language=language, type='text', content_type='word',
+        original_text=text, translated_text='Hello',
+    )
+
+
+class ConsensusTests(TestCase):
+    """
+    Counters and status transitions applied by Validation.save
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author', email='author@example.com', password='pass')
+        cls.validators = [
+            User.objects.create_user(username=f'validator{i}', email=f'validator{i}@example.com', password='pass')
+            for i in range(4)
+        ]
+        cls.language = Language.objects.create(name='Swahili', code='sw', category='bantu')
+
+    def validate(self, contribution, verdicts):
+        for validator, is_valid in zip(self.validators, verdicts):
+            Validation.objects.create(contribution=contribution, validator=validator, is_valid=is_valid)
+        contribution.refresh_from_db()
+        return contribution
+
+    def test_default_thresholds(self):
+        accepted = self.validate(make_contribution(self.author, self.language, 'a'), [True, True, False])
+        self.assertEqual(accepted.status, 'pending')  # 2/3 is below 0.7
+        self.assertEqual((accepted.validations_count, accepted.positive_validations), (3, 2))
+
+        rejected = self.validate(make_contribution(self.author, self.language, 'b'), [False, False, False])
+        self.assertEqual(rejected.status, 'rejected')
+        self.assertEqual(User.objects.get(pk=self.validators[0].pk).total_validations, 2)
+
+    def test_per_language_thresholds(self):
+        self.language.consensus_min_reviews = 2
+        self.language.consensus_accept_ratio = 0.5
+        self.language.save()
+        contribution = self.validate(make_contribution(self.author, self.language), [True, False])
+        self.assertEqual(contribution.status, 'validated')
+
+
+class ValidationReadPathTests(TestCase):
+    """
+    Query budgets for the validation list and detail endpoints
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.owners = [
+            User.objects.create_user(username=f'owner{i}', email=f'owner{i}@example.com', password='pass')
+            for i in range(3)
+        ]
+        cls.validator = User.objects.create_user(username='validator', email='validator@example.com', password='pass')
+        cls.outsider = User.objects.create_user(username='outsider', email='outsider@example.com', password='pass')
+        cls.languages = [
+            Language.objects.create(name=f'Language {i}', code=f'l{i}', category='bantu')
+            for i in range(2)
+        ]
+        for i in range(25):
+            contribution = make_contribution(cls.owners[i % 3], cls.languages[i % 2], text=f'Neno {i}')
+            Validation.objects.create(contribution=contribution, validator=cls.validator, is_valid=bool(i % 2))
+
+    def setUp(self):
+        self.client = APIClient()
+        language_registry.invalidate()
+        language_registry.snapshot()
+
+    def test_list_page_costs_count_plus_one_query(self):
+        self.client.force_authenticate(self.validator)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('validation_list'))
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 20)
+        row = response.data['results'][0]
+        self.assertEqual(row['validator_username'], 'validator')
+        self.assertIn(row['contribution_data']['username'], {'owner0', 'owner1', 'owner2'})
+        self.assertIn(row['contribution_data']['language_name'], {'Language 0', 'Language 1'})
+
+    def test_owner_listing_for_contribution_stays_within_budget(self):
+        contribution = Contribution.objects.filter(user=self.owners[0]).first()
+        self.client.force_authenticate(self.owners[0])
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('validation_list'), {'contribution_id': contribution.pk})
+        self.assertEqual(response.data['count'], 1)
+
+    def test_detail_costs_one_query(self):
+        validation = Validation.objects.filter(contribution__user=self.owners[1]).first()
+        url = reverse('validation_detail', kwargs={'pk': validation.pk})
+        for user in (self.validator, self.owners[1]):
+            self.client.force_authenticate(user)
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['validator_username'], 'validator')
+
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+
+class PendingValidationTests(TestCase):
+    """
+    The review queue served by /api/validations/pending/
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author', email='author@example.com', password='pass')
+        cls.reviewer = User.objects.create_user(username='reviewer', email='reviewer@example.com', password='pass')
+        cls.others = [
+            User.objects.create_user(username=f'other{i}', email=f'other{i}@example.com', password='pass')
+            for i in range(6)
+        ]
+        cls.swahili = Language.objects.create(name='Swahili', code='sw', category='bantu')
+        cls.luo = Language.objects.create(name='Luo', code='luo', category='nilotic')
+        cls.kikuyu = Language.objects.create(name='Kikuyu', code='ki', category='bantu')
+        UserLanguageFluency.objects.create(user=cls.reviewer, language=cls.swahili, fluency='native')
+        UserLanguageFluency.objects.create(user=cls.reviewer, language=cls.luo, fluency='fluent')
+
+        # A 3-3 split has more reviews than anything else, but needs four more
+        # to settle, so it comes after a fresh item that needs three
+        cls.split = make_contribution(cls.author, cls.swahili, 'split')
+        for i, validator in enumerate(cls.others):
+            Validation.objects.create(contribution=cls.split, validator=validator, is_valid=i % 2 == 0)
+        cls.fresh = make_contribution(cls.author, cls.swahili, 'fresh')
+        cls.one_review = make_contribution(cls.author, cls.luo, 'one review')
+        cls.two_reviews = make_contribution(cls.author, cls.swahili, 'two reviews')
+        for i, contribution in enumerate([cls.one_review, cls.two_reviews, cls.two_reviews]):
+            Validation.objects.create(contribution=contribution, validator=cls.others[i % 2], is_valid=True)
+        make_contribution(cls.author, cls.kikuyu, 'not fluent')
+        make_contribution(cls.reviewer, cls.swahili, 'own')
+        Validation.objects.create(
+            contribution=make_contribution(cls.author, cls.luo, 'reviewed'), validator=cls.reviewer, is_valid=True
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reviewer)
+        language_registry.invalidate()
+        language_registry.snapshot()
+
+    def queue(self, **params):
+        response = self.client.get(reverse('pending_validations'), params)
+        self.assertEqual(response.status_code, 200)
+        return [row['original_text'] for row in response.data['results']]
+
+    def test_queue_is_restricted_and_ordered(self):
+        self.assertEqual(self.queue(), ['two reviews', 'one review', 'fresh', 'split'])
+
+    def test_reviews_needed(self):
+        language = self.swahili  # at least 3 reviews, accept at 0.7, reject at 0.3
+        cases = {(0, 0): 3, (1, 1): 2, (2, 1): 2, (3, 2): 1, (6, 3): 4, (10, 6): 4}
+        for (validations_count, positive_validations), expected in cases.items():
+            self.assertEqual(
+                reviews_needed(validations_count, positive_validations, language), expected,
+                (validations_count, positive_validations)
+            )
+
+    def test_threshold_change_reorders_the_queue(self):
+        self.swahili.consensus_min_reviews = 10
+        self.swahili.save()
+        self.assertEqual(self.queue(), ['one review', 'split', 'two reviews', 'fresh'])
+
+    def test_users_without_fluencies_see_every_language(self):
+        self.client.force_authenticate(self.others[0])
+        # Fluencies, then one scan of the queue whatever the number of languages
+        with self.assertNumQueries(2):
+            queue = self.queue()
+        self.assertEqual(queue, ['reviewed', 'fresh', 'not fluent', 'own'])
+        self.assertEqual(self.queue(language_code='ki'), ['not fluent'])
+
+    def test_queue_for_one_language(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('pending_validations'), {'language_code': 'sw', 'limit': 1})
+        self.assertEqual([row['original_text'] for row in response.data['results']], ['two reviews'])
+
+
+class ValidationLeaseTests(TestCase):
+    """
+    The leased work queue served by /api/validations/next/
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author', email='author@example.com', password='pass')
+        cls.validators = [
+            User.objects.create_user(username=f'validator{i}', email=f'validator{i}@example.com', password='pass')
+            for i in range(5)
+        ]
+        cls.language = Language.objects.create(name='Swahili', code='sw', category='bantu')
+        cls.almost = make_contribution(cls.author, cls.language, 'almost')
+        for validator in cls.validators[:2]:
+            Validation.objects.create(contribution=cls.almost, validator=validator, is_valid=True)
+        cls.fresh = make_contribution(cls.author, cls.language, 'fresh')
+
+    def setUp(self):
+        language_registry.invalidate()
+        language_registry.snapshot()
+
+    def leased(self, validator):
+        return [contribution.original_text for contribution, _ in lease_contributions(validator)]
+
+    def test_leases_are_capped_by_reviews_needed(self):
+        # Two reviews are in, so only one more lease is handed out for it
+        self.assertEqual(self.leased(self.validators[2]), ['almost', 'fresh'])
+        self.assertEqual(self.leased(self.validators[3]), ['fresh'])
+        self.assertEqual(self.leased(self.validators[4]), ['fresh'])
+        self.assertEqual(self.leased(self.validators[0]), [])
+        # Renewing the leases one already holds does not take new ones
+        self.assertEqual(self.leased(self.validators[3]), ['fresh'])
+        self.assertEqual(ValidationLease.objects.filter(contribution=self.fresh).count(), 3)
+
+    def test_expired_leases_are_reclaimed(self):
+        self.leased(self.validators[2])
+        self.assertEqual(self.leased(self.validators[3]), ['fresh'])
+        ValidationLease.objects.filter(contribution=self.almost).update(expires_at=timezone.now() - timedelta(seconds=1))
+        # Leases already held come back first
+        self.assertEqual(self.leased(self.validators[3]), ['fresh', 'almost'])
+
+        ValidationLease.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(purge_expired_leases(), 3)
+
+    def test_request_body_is_validated(self):
+        client = APIClient()
+        client.force_authenticate(self.validators[2])
+        url = reverse('validation_next')
+        self.assertEqual(client.post(url, [{'limit': 5}], format='json').status_code, 400)
+        self.assertEqual(client.post(url, {'limit': 'many'}, format='json').status_code, 400)
+        self.assertEqual(client.post(url, {'language_code': 'xx'}, format='json').status_code, 404)
+
+        response = client.post(url, {'limit': 1, 'language_code': 'sw'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['original_text'] for row in response.data['results']], ['almost'])
+        self.assertIn('lease_expires_at', response.data['results'][0])
+
+
+class ValidationBatchTests(TestCase):
+    """
+    Batch verdicts through /api/validations/batch/
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author', email='author@example.com', password='pass')
+        cls.validator = User.objects.create_user(username='validator', email='validator@example.com', password='pass')
+        cls.language = Language.objects.create(name='Swahili', code='sw', category='bantu')
+        cls.contributions = [make_contribution(cls.author, cls.language, f'Neno {i}') for i in range(6)]
+        cls.own = make_contribution(cls.validator, cls.language, 'Yangu')
+        Validation.objects.create(contribution=cls.contributions[5], validator=cls.validator, is_valid=True)
+
+    def setUp(self):
+        language_registry.invalidate()
+        language_registry.snapshot()
+        self.client = APIClient()
+        self.client.force_authenticate(self.validator)
+        self.url = reverse('validation_batch')
+
+    def verdict(self, contribution, is_valid=True):
+        return {'contribution': str(contribution.pk), 'is_valid': is_valid}
+
+    def post(self, items):
+        return self.client.post(self.url, items, format='json')
+
+    def test_results_are_reported_per_item(self):
+        first, second = self.contributions[:2]
+        response = self.post([
+            self.verdict(first),
+            self.verdict(first, is_valid=False),
+            self.verdict(second, is_valid=False),
+            self.verdict(self.contributions[5]),
+            self.verdict(self.own),
+            {'contribution': '00000000-0000-0000-0000-000000000000', 'is_valid': True},
+            {'is_valid': 'perhaps'},
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 5))
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results],
+                         ['created', 'error', 'created', 'error', 'error', 'error', 'error'])
+        self.assertIn('more than once', str(results[1]['errors']))
+        self.assertIn('already validated', str(results[3]['errors']))
+        self.assertIn('own contribution', str(results[4]['errors']))
+        self.assertIn('not found', str(results[5]['errors']))
+
+        self.assertEqual(Validation.objects.get(contribution=first, validator=self.validator).is_valid, True)
+        self.assertEqual(Validation.objects.filter(validator=self.validator).count(), 3)
+        first.refresh_from_db()
+        self.assertEqual(first.validations_count, 1)
+        self.validator.refresh_from_db()
+        self.assertEqual(self.validator.total_validations, 3)  # Including the one from setUpTestData
+
+        # Resubmitting the same verdicts only reports them as already given
+        response = self.post([self.verdict(first), self.verdict(second)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([result['status'] for result in response.data['results']], ['error', 'error'])
+
+    def test_contributions_are_read_once(self):
+        def run(contributions):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post([self.verdict(contribution) for contribution in contributions])
+            self.assertEqual({result['status'] for result in response.data['results']}, {'created'})
+            return [query['sql'] for query in queries.captured_queries]
+
+        small = run(self.contributions[:2])
+        large = run(self.contributions[2:5])
+        for sql in (small, large):
+            reads = [query for query in sql
+                     if query.startswith('SELECT') and 'FROM "contributions_contribution"' in query]
+            self.assertEqual(len(reads), 1)
+        # The only per-item statement is the contribution's own UPDATE
+        self.assertEqual(len(large) - len(small), 1)
+
+    def test_batch_limits(self):
+        self.assertEqual(self.post({'contribution': str(self.contributions[0].pk)}).status_code, 400)
+        with override_settings(VALIDATION_BATCH_MAX_ITEMS=2):
+            response = self.post([self.verdict(contribution) for contribution in self.contributions[:3]])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Validation.objects.filter(contribution__in=self.contributions[:3]).exists())
+
+
+class ReputationConsensusTests(TestCase):
+    """
+    Dawid-Skene scoring by validations/reputation.py
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author', email='author@example.com', password='pass')
+        cls.experts = [
+            User.objects.create_user(username=f'expert{i}', email=f'expert{i}@example.com', password='pass')
+            for i in range(3)
+        ]
+        cls.careless = [
+            User.objects.create_user(username=f'careless{i}', email=f'careless{i}@example.com', password='pass')
+            for i in range(2)
+        ]
+        language = Language.objects.create(name='Swahili', code='sw', category='bantu', consensus_min_reviews=5)
+        cls.truth = {}
+        for i in range(40):
+            contribution = make_contribution(cls.author, language, f'neno {i}')
+            cls.truth[contribution.pk] = correct = i % 3 != 0
+            # Experts agree with the truth except for one slip each; the
+            # careless validators accept everything
+            for j, expert in enumerate(cls.experts):
+                verdict = correct if i != j else not correct
+                Validation.objects.create(contribution=contribution, validator=expert, is_valid=verdict)
+            for validator in cls.careless:
+                Validation.objects.create(contribution=contribution, validator=validator, is_valid=True)
+
+    def test_full_run_outweighs_careless_validators(self):
+        run = run_consensus()
+        self.assertFalse(run.incremental)
+        self.assertEqual(run.contributions_scored, 40)
+
+        reliability = dict(ValidatorReliability.objects.values_list('validator__username', 'specificity'))
+        self.assertGreater(reliability['expert0'], 0.8)
+        self.assertLess(reliability['careless0'], 0.3)
+        for contribution in Contribution.objects.all():
+            expected = 'validated' if self.truth[contribution.pk] else 'rejected'
+            self.assertEqual(contribution.status, expected)
+
+    def test_incremental_run_only_rescores_touched_contributions(self):
+        run_consensus()
+        contribution = Contribution.objects.filter(status='validated').first()
+        late = User.objects.create_user(username='late', email='late@example.com', password='pass')
+        Validation.objects.create(contribution=contribution, validator=late, is_valid=False)
+
+        run = run_consensus(incremental=True)
+        self.assertTrue(run.incremental)
+        self.assertEqual(run.contributions_scored, 1)
+        self.assertEqual(ConsensusRun.objects.filter(finished_at__isnull=False).count(), 2)
+
+
+class AgreementTests(TestCase):
+    """
+    Agreement metrics computed by validations/agreement.py
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author', email='author@example.com', password='pass')
+        cls.validators = [
+            User.objects.create_user(username=f'validator{i}', email=f'validator{i}@example.com', password='pass')
+            for i in range(3)
+        ]
+        cls.language = Language.objects.create(name='Swahili', code='sw', category='bantu')
+
+    def setUp(self):
+        cache.clear()
+        language_registry.invalidate()
+
+    def review(self, verdicts, content_type='word'):
+        contribution = make_contribution(self.author, self.language, f'neno {Contribution.objects.count()}')
+        if content_type != 'word':
+            Contribution.objects.filter(pk=contribution.pk).update(content_type=content_type)
+        for validator, is_valid in zip(self.validators, verdicts):
+            Validation.objects.create(contribution=contribution, validator=validator, is_valid=is_valid)
+
+    def test_known_values(self):
+        # One split pair and one agreeing pair: kappa -1/3, alpha 0
+        self.review([True, False])
+        self.review([True, True])
+        self.review([True])  # a single review is not pairable
+        overall = language_agreement(self.language.pk)['overall']
+        self.assertEqual((overall['contributions'], overall['validations']), (2, 4))
+        self.assertEqual(overall['fleiss_kappa'], -0.3333)
+        self.assertEqual(overall['krippendorff_alpha'], 0.0)
+
+    def test_incremental_refresh_matches_rebuild(self):
+        self.review([True, True, False])
+        self.review([False, False], content_type='sentence')
+        language_agreement(self.language.pk)
+
+        # New contributions, and a new verdict on one already counted
+        self.review([True, False, False], content_type='sentence')
+        self.review([True, True])
+        contribution = Contribution.objects.get(content_type='sentence', validations_count=2)
+        Validation.objects.create(contribution=contribution, validator=self.validators[2], is_valid=True)
+
+        refreshed = language_agreement(self.language.pk)
+        cache.clear()
+        self.assertEqual(refreshed, language_agreement(self.language.pk))
+        self.assertEqual(set(refreshed['content_types']), {'word', 'sentence'})
+
+    def test_endpoint(self):
+        self.review([True, True, False])
+        response = APIClient().get(reverse('language_agreement', kwargs={'code': 'sw'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['overall']['contributions'], 1)
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentValidationTests(TransactionTestCase):
+    """
+    Validations of the same contributions racing each other stay exact
+    """
+    reviews = 3
+
+    def test_concurrent_reviews_reach_consensus_once(self):
+        author = User.objects.create_user(username='author', email='author@example.com', password='pass')
+        validators = [
+            User.objects.create_user(username=f'validator{i}', email=f'validator{i}@example.com', password='pass')
+            for i in range(self.reviews)
+        ]
+        language = Language.objects.create(name='Swahili', code='sw', category='bantu')
+        verdicts = [True] * 6 + [False] * 4
+        contributions = [make_contribution(author, language, f'word {i}') for i in range(len(verdicts))]
+
+        # Every review of every contribution is released at the same moment
+        jobs = [
+            (contribution, validator, is_valid)
+            for contribution, is_valid in zip(contributions, verdicts)
+            for validator in validators
+        ]
+        barrier = threading.Barrier(len(jobs))
+        errors = []
+
+        def review(contribution, validator, is_valid):
+            try:
+                barrier.wait()
+                Validation.objects.create(contribution_id=contribution.pk, validator=validator, is_valid=is_valid)
+            except Exception as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=review, args=job) for job in jobs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+        for contribution, is_valid in zip(contributions, verdicts):
+            contribution.refresh_from_db()
+            self.assertEqual(contribution.validations_count, self.reviews)
+            self.assertEqual(contribution.positive_validations, self.reviews if is_valid else 0)
+            self.assertEqual(contribution.status, 'validated' if is_valid else 'rejected')
+        for validator in validators:
+            validator.refresh_from_db()
+            self.assertEqual(validator.total_validations, len(contributions))
+
+        # Each status flip was recorded exactly once
+        stats = DailyContributionStats.objects.filter(language=language)
+        totals = {
+            status: stats.filter(status=status).aggregate(entered=Sum('entered_count'), left=Sum('left_count'))
+            for status in ('validated', 'rejected')
+        }
+        self.assertEqual(totals['validated']['entered'], verdicts.count(True))
+        self.assertEqual(totals['rejected']['entered'], verdicts.count(False))
+        self.assertEqual(stats.aggregate(n=Sum('validations_count'))['n'], len(jobs))
+
+
+@skipUnlessDBFeature('has_select_for_update_skip_locked')
+class SkipLockedLeaseTests(TransactionTestCase):
+    """
+    Leasing passes over rows another transaction holds instead of waiting
+    """
+    def test_locked_contribution_is_skipped(self):
+        author = User.objects.create_user(username='author', email='author@example.com', password='pass')
+        validator = User.objects.create_user(username='validator', email='validator@example.com', password='pass')
+        language = Language.objects.create(name='Swahili', code='sw', category='bantu')
+        held = make_contribution(author, language, 'held')
+        free = make_contribution(author, language, 'free')
+
+        locked, release = threading.Event(), threading.Event()
+
+        def hold():
+            try:
+                with transaction.atomic():
+                    Contribution.objects.select_for_update().get(pk=held.pk)
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            leased = [contribution.pk for contribution, _ in lease_contributions(validator)]
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(leased, [free.pk])
+        self.assertEqual([contribution.pk for contribution, _ in lease_contributions(validator)], [free.pk, held.pk])
@@ -1,11 +1,16 @@
 from django.urls import path
-from .views import ValidationListView, ValidationCreateView, ValidationDetailView
+from .views import (
+    ValidationListView, ValidationCreateView, ValidationBatchCreateView,
+    ValidationDetailView, ValidationLeaseView, PendingValidationListView
+)
 
 urlpatterns = [
     path('', ValidationListView.as_view(), name='validation_list'),
     path('create/', ValidationCreateView.as_view(), name='validation_create'),
+    path('batch/', ValidationBatchCreateView.as_view(), name='validation_batch'),
     path('<int:pk>/', ValidationDetailView.as_view(), name='validation_detail'),
+    path('next/', ValidationLeaseView.as_view(), name='validation_next'),
     
     # Additional endpoint for pending validations
-    path('pending/', ValidationListView.as_view(), {'pending_only': True}, name='pending_validations'),
+    path('pending/', PendingValidationListView.as_view(), name='pending_validations'),
 ]
\ No newline at end of file
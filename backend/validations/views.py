@@ -1,11 +1,31 @@
+import heapq
+from itertools import islice
+
 from django.shortcuts import render
 from rest_framework import generics, permissions, status, filters
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Validation
-from .serializers import ValidationSerializer, ValidationCreateSerializer, ValidationListSerializer
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from accounts.leaderboards import apply_score_deltas, collect_validation_score
+from accounts.profiles import invalidate_cached_profile
+from contributions.rollup import apply_rollup_deltas
+from .models import Validation, ValidationLease
+from .serializers import (
+    ValidationSerializer, ValidationCreateSerializer, ValidationListSerializer,
+    ValidationBatchItemSerializer, ValidationLeaseRequestSerializer
+)
+from .leases import lease_contributions, release_lease
+from .consensus import apply_verdict
 from contributions.models import Contribution
+from contributions.serializers import ContributionListSerializer, ContributionRowSerializer
+from accounts.models import UserLanguageFluency
+from languages.registry import language_registry
 
 class ValidationListView(generics.ListAPIView):
     """
@@ -19,31 +39,37 @@ class ValidationListView(generics.ListAPIView):
     
     def get_queryset(self):
         # Return validations performed by the current user
-        queryset = Validation.objects.filter(validator=self.request.user)
-        
-        # Check if we should only return pending validations
-        if self.kwargs.get('pending_only'):
-            # Get contributions pending validation that the user hasn't validated yet
-            # and is qualified to validate (not their own)
-            contributions_to_validate = Contribution.objects.filter(
-                status='pending'
-            ).exclude(
-                user=self.request.user  # Exclude user's own contributions
-            ).exclude(
-                validations__validator=self.request.user  # Exclude already validated
-            )
-            return Validation.objects.none()  # Return empty queryset with placeholder for pending validations
+        queryset = self.with_related(Validation.objects.filter(validator=self.request.user))
         
         # If contribution_id is specified, get all validations for that contribution
         contribution_id = self.request.query_params.get('contribution_id')
         if contribution_id:
-            contribution = Contribution.objects.get(id=contribution_id)
             # Only allow seeing all validations if the user is the contribution owner
             # or an admin (we would add role-based check here)
-            if contribution.user == self.request.user:
-                queryset = Validation.objects.filter(contribution=contribution)
+            try:
+                owns_contribution = Contribution.objects.filter(
+                    id=contribution_id, user=self.request.user
+                ).exists()
+            except DjangoValidationError:
+                raise ValidationError({'contribution_id': 'Must be a valid UUID'})
+            if owns_contribution:
+                queryset = self.with_related(Validation.objects.filter(contribution_id=contribution_id))
                 
         return queryset
+        
+    def with_related(self, queryset):
+        # Load the validator and the contribution with its owner in the same
+        # query, and only the columns the serializer reads. Language names come
+        # from the language registry, so no language join is needed.
+        return queryset.select_related('validator', 'contribution__user').only(
+            'id', 'contribution_id', 'validator_id', 'is_valid', 'feedback', 'created_at',
+            'validator__username',
+            'contribution__id', 'contribution__type', 'contribution__content_type',
+            'contribution__language_id', 'contribution__user_id', 'contribution__user__username',
+            'contribution__original_text', 'contribution__translated_text', 'contribution__status',
+            'contribution__created_at', 'contribution__validations_count',
+            'contribution__positive_validations',
+        )
 
 class ValidationCreateView(generics.CreateAPIView):
     """
@@ -69,16 +95,122 @@ class ValidationCreateView(generics.CreateAPIView):
         if contribution.user == self.request.user:
             raise ValidationError('You cannot validate your own contribution')
             
-        # Save the validation with the current user as validator
-        serializer.save(validator=self.request.user)
+        # Save the validation with the current user as validator; a concurrent
+        # duplicate from the same user trips the unique constraint instead
+        try:
+            serializer.save(validator=self.request.user)
+        except IntegrityError:
+            raise ValidationError('You have already validated this contribution')
+        release_lease(contribution, self.request.user)
         
         # The contribution stats are updated in the Validation model's save() method
 
+class ValidationBatchCreateView(APIView):
+    """
+    API endpoint for submitting many verdicts at once
+
+    Takes a JSON array of {contribution, is_valid, feedback} objects and
+    returns a result per item. Valid items are saved even when others fail.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_max_items(self):
+        return getattr(settings, 'VALIDATION_BATCH_MAX_ITEMS', 500)
+        
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError('Expected a JSON array of verdicts')
+        max_items = self.get_max_items()
+        if len(items) > max_items:
+            raise ValidationError(f'A batch may contain at most {max_items} verdicts')
+            
+        results = [None] * len(items)
+        verdicts = {}
+        for index, item in enumerate(items):
+            serializer = ValidationBatchItemSerializer(data=item)
+            if not serializer.is_valid():
+                results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+            elif serializer.validated_data['contribution'] in verdicts:
+                results[index] = self.error(index, 'This contribution appears more than once in the batch')
+            else:
+                verdicts[serializer.validated_data['contribution']] = (index, serializer.validated_data)
+                
+        created = []
+        with transaction.atomic():
+            # One locking read for existence, ownership and current counts, in
+            # primary key order so concurrent batches lock in the same order
+            contributions = {
+                contribution.pk: contribution
+                for contribution in Contribution.objects.select_related('language')
+                .select_for_update(no_key=True, of=('self',))
+                .filter(pk__in=list(verdicts)).order_by('pk')
+            }
+            # One read for the verdicts this user has already given
+            already_validated = set(
+                Validation.objects.filter(validator=request.user, contribution_id__in=list(contributions))
+                .values_list('contribution_id', flat=True)
+            )
+            
+            for contribution_id, (index, data) in verdicts.items():
+                contribution = contributions.get(contribution_id)
+                if contribution is None:
+                    results[index] = self.error(index, 'Contribution not found')
+                elif contribution.user_id == request.user.pk:
+                    results[index] = self.error(index, 'You cannot validate your own contribution')
+                elif contribution_id in already_validated:
+                    results[index] = self.error(index, 'You have already validated this contribution')
+                else:
+                    created.append((index, Validation(
+                        contribution=contribution, validator=request.user,
+                        is_valid=data['is_valid'], feedback=data['feedback'],
+                    )))
+                    
+            if created:
+                try:
+                    Validation.objects.bulk_create([validation for _, validation in created])
+                except IntegrityError:
+                    raise ValidationError('Some of these contributions were validated concurrently, please retry')
+                
+                # One UPDATE per contribution, then grouped leaderboard, user
+                # counter, lease and (last, as the most contended) rollup
+                # writes for the whole batch
+                rollup_deltas, score_deltas = None, None
+                for _, validation in sorted(created, key=lambda entry: entry[1].contribution_id):
+                    rollup_deltas = apply_verdict(validation.contribution, validation.is_valid, rollup_deltas)
+                    score_deltas = collect_validation_score(validation, score_deltas)
+                apply_score_deltas(score_deltas)
+                get_user_model().objects.filter(pk=request.user.pk).update(
+                    total_validations=F('total_validations') + len(created)
+                )
+                invalidate_cached_profile(request.user.pk)
+                ValidationLease.objects.filter(
+                    validator=request.user,
+                    contribution_id__in=[validation.contribution_id for _, validation in created]
+                ).delete()
+                apply_rollup_deltas(rollup_deltas)
+                
+        for index, validation in created:
+            results[index] = {
+                'index': index,
+                'status': 'created',
+                'id': validation.pk,
+                'contribution_status': validation.contribution.status,
+            }
+            
+        return Response({
+            'created': len(created),
+            'failed': len(results) - len(created),
+            'results': results,
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+        
+    def error(self, index, message):
+        return {'index': index, 'status': 'error', 'errors': {'non_field_errors': [message]}}
+
 class ValidationDetailView(generics.RetrieveAPIView):
     """
     API endpoint for retrieving a single validation
     """
-    queryset = Validation.objects.all()
     serializer_class = ValidationSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -86,10 +218,90 @@ class ValidationDetailView(generics.RetrieveAPIView):
         # Only allow retrieving validations performed by the user
         # or validations on the user's own contributions
         user = self.request.user
-        return Validation.objects.filter(
-            # Either the user is the validator
-            validator=user
-        ).union(
-            # Or the user is the contribution owner
-            Validation.objects.filter(contribution__user=user)
+        return Validation.objects.select_related('validator').filter(
+            # Either the user is the validator or the contribution owner
+            Q(validator=user) | Q(contribution__user=user)
         )
+
+class PendingValidationListView(APIView):
+    """
+    API endpoint for listing contributions awaiting the user's review
+
+    Contributions in languages the user is fluent in are listed, or in every
+    language for users who have not declared any, leaving out their own and
+    those they have already validated. Items that the fewest further reviews
+    could settle come first (see consensus.reviews_needed), then the oldest.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 50
+    
+    def get(self, request):
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), self.max_limit))
+        except (TypeError, ValueError):
+            raise ValidationError({'limit': 'Must be an integer'})
+            
+        # None stands for every language
+        language_ids = set(
+            UserLanguageFluency.objects.filter(user=request.user).values_list('language_id', flat=True)
+        ) or None
+        language_code = request.query_params.get('language_code')
+        if language_code:
+            language_id = language_registry.id_for_code(language_code)
+            language_ids = {language_id} if language_ids is None else language_ids & {language_id}
+            
+        # One short scan of the pending queue index per fluent language, merged
+        # here, or a single scan of the global queue index for every language.
+        # Each scan reads rows already in queue order and stops at `limit`.
+        pending = Contribution.objects.filter(status='pending').exclude(
+            user=request.user
+        ).exclude(
+            validations__validator=request.user
+        ).order_by('reviews_needed', 'created_at')
+        if language_ids is None:
+            querysets = [pending]
+        else:
+            querysets = [pending.filter(language_id=language_id) for language_id in sorted(language_ids)]
+        queues = [
+            queryset.values(
+                'reviews_needed', *ContributionRowSerializer.value_fields, **ContributionRowSerializer.value_expressions
+            )[:limit]
+            for queryset in querysets
+        ]
+            
+        rows = list(islice(
+            heapq.merge(*queues, key=lambda row: (row['reviews_needed'], row['created_at'])),
+            limit
+        ))
+        return Response({
+            'count': len(rows),
+            'results': ContributionRowSerializer(rows, many=True).data,
+        })
+
+class ValidationLeaseView(APIView):
+    """
+    API endpoint for leasing the next batch of contributions to validate
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        # Options come in the body, or in the query string when it is empty
+        serializer = ValidationLeaseRequestSerializer(data=request.data or request.query_params)
+        serializer.is_valid(raise_exception=True)
+        limit = serializer.validated_data['limit']
+            
+        language = None
+        language_code = serializer.validated_data['language_code']
+        if language_code:
+            language = language_registry.id_for_code(language_code)
+            if language is None:
+                return Response({'error': 'Language not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        leases = lease_contributions(request.user, limit=limit, language=language)
+        results = []
+        for contribution, expires_at in leases:
+            data = ContributionListSerializer(contribution).data
+            data['lease_expires_at'] = expires_at
+            results.append(data)
+            
+        return Response({'count': len(results), 'results': results})
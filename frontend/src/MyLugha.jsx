@@ -1257,21 +1257,13 @@ function ValidationForm({ language }) {
       setIsLoading(true);
       try {
         // Get contributions that need validation for the current language
-        const response = await contributionService.getPendingValidations();
+        const response = await validationService.getPendingValidations({ language_code: language.code });
         
         // Check if response has the expected structure
         console.log('API Response:', response.data);
         
         // Get results from response - handle different response structures
-        const contributions = response.data.results || response.data || [];
-        
-        // Filter to only include items for the current language
-        // Check for both language_code and language fields
-        const languageItems = contributions.filter(item => 
-          item.language_code === language.code || 
-          item.language === language.code ||
-          (item.language_name && item.language_name.toLowerCase() === language.name.toLowerCase())
-        );
+        const languageItems = response.data.results || response.data || [];
         
         // Transform the data to match expected format
         const formattedItems = languageItems.map(item => ({
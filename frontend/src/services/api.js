@@ -81,7 +81,7 @@ export const authService = {
         return response;
       });
   },
-  socialLogin: (provider, accessToken) => api.post('/auth/login/social/', { provider, access_token: accessToken }),
+  socialLogin: (provider, accessToken) => api.post('/auth/login/social/async/', { provider, access_token: accessToken }),
   getCurrentUser: () => api.get('/auth/profile/'),
   updateProfile: (data) => api.patch('/auth/profile/', data),
   getUserLanguages: () => api.get('/auth/profile/languages/'),
@@ -114,7 +114,7 @@ export const validationService = {
   getValidations: (params) => api.get('/validations/', { params }),
   createValidation: (data) => api.post('/validations/create/', data),
   getValidationDetails: (id) => api.get(`/validations/${id}/`),
-  getPendingValidations: () => api.get('/validations/pending/')
+  getPendingValidations: (params) => api.get('/validations/pending/', { params })
 };
 
 export default api;
\ No newline at end of file